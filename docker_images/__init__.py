@@ -1,3 +1,3 @@
-from osbot_utils.utils.Files import parent_folder
+import os
 
-folder = parent_folder(__file__)
\ No newline at end of file
+folder = os.path.dirname(__file__)
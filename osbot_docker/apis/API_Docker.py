@@ -1,27 +1,47 @@
 from collections import defaultdict
 
-import docker
-from docker                                         import APIClient
-
-from osbot_utils.utils.Misc import bytes_to_str
-
+from osbot_docker.apis.Docker_Clients               import docker_clients, DEFAULT__CLIENT_POOL_SIZE
+from osbot_docker.apis.Docker_Instrumentation       import Docker_Instrumentation
+from osbot_docker.apis.Docker_Records               import Docker_Container_Record, Docker_Image_Record
+from osbot_docker.apis.Docker_Stats                 import Docker_Stats, DEFAULT__STATS_CAPACITY, DEFAULT__STATS_INTERVAL, DEFAULT__STATS_MAX_WORKERS
 from osbot_utils.decorators.lists.group_by          import group_by
 from osbot_utils.decorators.lists.index_by          import index_by
-from osbot_utils.utils.Process                      import exec_process
-from osbot_utils.decorators.methods.cache_on_self   import cache_on_self
 from osbot_utils.decorators.methods.catch           import catch
-from osbot_utils.utils.Str import trim
 
 
+DEFAULT__BULK_MAX_WORKERS = DEFAULT__CLIENT_POOL_SIZE  # one connection (of the shared client's pool) per worker
+DEFAULT__PULL_MAX_WORKERS = 4                        # concurrent pulls (the daemon also limits its concurrent layer downloads)
+
 class API_Docker:
 
-    def __init__(self, debug=False):
+    def __init__(self, debug=False, base_url=None):
+        self.base_url           = base_url          # None uses DOCKER_HOST (or the default socket), for example 'unix:///tmp/fake_docker.sock' (see Fake_Docker_Engine)
         self.debug              = debug
+        self.docker_index       = None              # set by live_index_start() (opt-in in-memory index kept up to date by the events stream)
+        self.instrumentation    = None              # set by instrumentation_enable() (records the Engine API calls made by this API_Docker, see Docker_Instrumentation)
         self.docker_run_timeout = None
+        self.docker_run_engine  = 'cli'             # 'cli' (spawns the docker executable) or 'api' (uses the Engine API, see Docker_Run)
+        self.docker_run_cache   = None              # set by docker_run_cache_enable() (opt-in on-disk cache of docker_run results, see Docker_Run_Cache)
+
+    def api_calls(self):
+        """Context manager with the Engine API calls made inside the block: with api_docker.api_calls() as calls: ... calls.report()"""
+        return self.instrumentation_enable().block()
+
+    def bulk_execute(self, items, action, max_workers=DEFAULT__BULK_MAX_WORKERS):
+        """Runs action(item) for each item on a thread pool, returns a dict with the result (or error) of each item"""
+        def execute(item):
+            try:
+                return item, {'status': 'ok', 'result': action(item)}
+            except Exception as exception:
+                return item, {'status': 'error', 'error': f'{exception}', 'exception': exception}
+        if not items:
+            return {}
+        from concurrent.futures import ThreadPoolExecutor                   # note: imported here to keep the import of this module fast
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return dict(executor.map(execute, items))
 
-    @cache_on_self
     def client_api(self):
-        return APIClient(version='auto')
+        return docker_clients.client_api(base_url=self.base_url)            # shared by all API_Docker objects that use the same daemon
 
     def client_api_version(self):
         return self.client_api_version_raw().get('ApiVersion')
@@ -29,9 +49,8 @@ class API_Docker:
     def client_api_version_raw(self):
         return self.client_api().version()
 
-    @cache_on_self
     def client_docker(self):
-        return docker.from_env()
+        return docker_clients.client_docker(base_url=self.base_url)         # uses the (shared) client_api
 
     def client_docker_version_raw(self):
         return self.client_docker().version()
@@ -54,6 +73,8 @@ class API_Docker:
         image = Docker_Image(image_name=image_name, image_tag=tag, api_docker=self).image_name_with_tag()
 
         output = self.client_docker().containers.run(image, command, auto_remove=auto_remove, detach=detach, tty=tty)
+        from osbot_utils.utils.Misc import bytes_to_str                     # note: imported here to keep the import of this module fast
+        from osbot_utils.utils.Str  import trim
         return {'status': 'ok', 'output': trim(bytes_to_str(output))}
 
     @index_by
@@ -74,27 +95,40 @@ class API_Docker:
         return self.containers(all=True, **kwargs)
 
     def containers_all__by_id(self):
+        if self.docker_index:
+            return self.docker_index.containers_by_id()
         containers_by_id = {}
         for container in self.containers_all():
             containers_by_id[container.short_id()] = container
         return containers_by_id
 
-    def containers_all__by_labels(self):
+    def containers_all__by_labels(self, labels=None):
+        """Containers grouped by label key and value, labels (see Docker_Query) limits the containers fetched from the daemon"""
+        if self.docker_index and labels is None:
+            return self.docker_index.containers_by_labels()
         containers_by_labels = defaultdict(lambda: defaultdict(dict))
-        for container in self.containers_all():
-            labels = container.container_raw.labels or {}
-            for label_id, label_value in labels.items():
-                containers_by_labels[label_id][label_value][container.short_id()] = container
+        for record in self.containers_query(labels=labels):
+            container = record.container()
+            for label_id, label_value in record.labels.items():
+                containers_by_labels[label_id][label_value][record.short_id()] = container
         return containers_by_labels
 
     def containers_all__with_image(self, image_name, tag='latest'):
+        """Containers whose image contains image_name:tag (substring match, so 'hello-world:latest' also matches
+           'docker.io/library/hello-world:latest'), use containers_query(image=...) for the exact image reference"""
         from osbot_docker.apis.Docker_Image import Docker_Image
         image = Docker_Image(image_name=image_name, image_tag=tag, api_docker=self).image_name_with_tag()
-        containers_with_image = []
-        for container in self.containers_all():
-            if image in container.image():
-                containers_with_image.append(container)
-        return containers_with_image
+        if self.docker_index:
+            return self.docker_index.containers_with_image(image, exact=False)
+        return [record.container() for record in self.containers_query() if image in (record.image or '')]
+
+    def containers_query(self, all=True, limit=None, labels=None, image=None, name=None, **filters):
+        """Generator of the Docker_Container_Record objects that match the predicates (see Docker_Query for the options),
+           the predicates are compiled into the daemon's filters and only the ones the daemon can't express are applied here"""
+        from osbot_docker.apis.Docker_Query import Docker_Query                   # note: imported here to keep the import of this module fast (its Docker_Index imports docker-py)
+        query   = Docker_Query(labels=labels, image=image, name=name, **filters)
+        records = self.containers_records(all=all, filters=query.filters, limit=query.daemon_limit(limit))
+        return query.apply(records, limit=limit)
 
     def containers_raw(self, all=True, filters=None, since=None, before=None, limit=None, sparse  = False):
         kwargs = dict(all     = all     ,
@@ -105,6 +139,47 @@ class API_Docker:
                       sparse  = sparse  )           # set to True when we mainly want to container id
         return self.client_docker().containers.list(**kwargs)
 
+    def containers_records(self, all=True, filters=None, limit=None):
+        """Lightweight listing: one /containers/json call (no per-container inspect) into compact Docker_Container_Record objects"""
+        containers_raw = self.client_api().containers(all=all, filters=filters, limit=limit or -1)
+        return [Docker_Container_Record(container_raw, api_docker=self) for container_raw in containers_raw]
+
+    def containers_delete(self, container_ids=None, filters=None, force=False, max_workers=DEFAULT__BULK_MAX_WORKERS):
+        def delete(container_id):
+            self.client_api().remove_container(container_id, force=force)
+            return True
+        container_ids = self.containers_select(container_ids=container_ids, filters=filters)
+        return self.bulk_execute(container_ids, delete, max_workers=max_workers)
+
+    def containers_select(self, container_ids=None, filters=None):
+        """Returns container_ids or the ids of the containers that match filters (for example {'label': 'key=value'} or
+           {'ancestor': 'image:tag'}), note that filters={} selects all containers and that no args selects none"""
+        if container_ids is not None:
+            return list(container_ids)
+        if filters is None:
+            return []
+        return [container.id for container in self.containers_raw(filters=filters, sparse=True)]
+
+    def containers_start(self, container_ids=None, filters=None, max_workers=DEFAULT__BULK_MAX_WORKERS):
+        def start(container_id):
+            self.client_api().start(container_id)
+            return True
+        container_ids = self.containers_select(container_ids=container_ids, filters=filters)
+        return self.bulk_execute(container_ids, start, max_workers=max_workers)
+
+    def containers_stats(self, container_ids=None, labels=None, image=None, capacity=None, interval=None, max_workers=None):
+        """Returns a (not started) Docker_Stats sampler of the running containers selected by ids and/or labels and image
+           (all running containers when none is set), use it as a context manager or call its start() and stop()"""
+        return Docker_Stats(api_docker=self, container_ids=container_ids, labels=labels, image=image, capacity=capacity or DEFAULT__STATS_CAPACITY,
+                            interval=interval or DEFAULT__STATS_INTERVAL, max_workers=max_workers or DEFAULT__STATS_MAX_WORKERS)
+
+    def containers_stop(self, container_ids=None, filters=None, timeout=0, max_workers=DEFAULT__BULK_MAX_WORKERS):
+        def stop(container_id):                                    # the daemon only replies after the container has stopped
+            self.client_api().stop(container_id, timeout=timeout)
+            return True
+        container_ids = self.containers_select(container_ids=container_ids, filters=filters)
+        return self.bulk_execute(container_ids, stop, max_workers=max_workers)
+
     def docker_params_append_options(self, docker_params, options):
         if options:
             if type(options) is not list:                # todo: create decorator for this code pattern (i.e. make sure the value is a list)
@@ -118,17 +193,34 @@ class API_Docker:
 
     def docker_run(self, image_params, options=None):
         """Use this method to invoke the docker executable directly
-            image_params is an image name of an array of image name + image params"""
-
-        if image_params:
-            if type(image_params) is str:
-                image_params = [image_params]
+            image_params is an image name of an array of image name + image params
+            (with docker_run_engine set to 'api' the container is run via the Engine API, without spawning the docker executable)"""
 
-        docker_params = ['run', '--rm']
-        self.docker_params_append_options(docker_params=docker_params, options=options)
-        docker_params.extend(image_params)
+        docker_params = self.docker_run_params(image_params, options=options)
         self.print_docker_command(docker_params)                # todo: refactor to use logging class
+        if self.docker_run_cache:
+            return self.docker_run_cache.run(docker_params, self.docker_run_execute)
+        return self.docker_run_execute(docker_params)
+
+    def docker_run_cache_disable(self):
+        self.docker_run_cache = None
+        return self
 
+    def docker_run_cache_enable(self, **kwargs):
+        """Enables the docker_run results cache (kwargs: path, max_bytes and ttl), returns the Docker_Run_Cache (with its stats()).
+           The cache needs the 'api' docker_run_engine, since only its results have the exit code (see Docker_Run_Cache)"""
+        from osbot_docker.apis.Docker_Run_Cache import Docker_Run_Cache  # note: imported here to keep the import of this module fast (it imports docker-py)
+        if self.docker_run_engine != 'api':
+            raise ValueError("the docker_run cache needs the 'api' docker_run_engine (the docker CLI results have no exit code), call set_docker_run_engine('api') first")
+        if self.docker_run_cache is None:
+            self.docker_run_cache = Docker_Run_Cache(api_docker=self, **kwargs)
+        return self.docker_run_cache
+
+    def docker_run_execute(self, docker_params):
+        if self.docker_run_engine == 'api':
+            from osbot_docker.apis.Docker_Run import Docker_Run     # note: imported here to keep the import of this module fast (it imports docker-py)
+            return Docker_Run(api_docker=self, timeout=self.docker_run_timeout).run(docker_params[1:])
+        from osbot_utils.utils.Process import exec_process                  # note: imported here to keep the import of this module fast
         return exec_process('docker', docker_params, timeout=self.docker_run_timeout)
 
     def docker_run_bash(self, image_name, image_params, options=None, bash_binary='/bin/bash'):
@@ -139,6 +231,22 @@ class API_Docker:
             bash_params.extend(image_params)
         return self.docker_run_entrypoint(entrypoint=bash_binary, image_params=bash_params, options=options)
 
+    def docker_run_params(self, image_params, options=None):
+        if image_params:
+            if type(image_params) is str:
+                image_params = [image_params]
+
+        docker_params = ['run', '--rm']
+        self.docker_params_append_options(docker_params=docker_params, options=options)
+        docker_params.extend(image_params)
+        return docker_params
+
+    def docker_run_stream(self, image_params, options=None):
+        """Runs the container via the Engine API, yielding ('stdout'|'stderr', text) chunks as they are written, the
+           last item is ('exit_code', exit_code)"""
+        from osbot_docker.apis.Docker_Run import Docker_Run         # note: imported here to keep the import of this module fast (it imports docker-py)
+        return Docker_Run(api_docker=self, timeout=self.docker_run_timeout).stream(self.docker_run_params(image_params, options=options)[1:])
+
     def docker_run_entrypoint(self, entrypoint, image_params, options=None):
         entrypoint_params = ['--entrypoint', entrypoint]
         if type(image_params) is str:
@@ -147,29 +255,89 @@ class API_Docker:
             entrypoint_params.extend(image_params)
         return self.docker_run(entrypoint_params, options=options)
 
+    def events(self, since=None, until=None, filters=None):
+        """Returns a (blocking) stream of decoded daemon events, call .close() on it to stop listening"""
+        return self.client_api().events(since=since, until=until, filters=filters, decode=True)
 
     @index_by
     @group_by
     def images(self):
         from osbot_docker.apis.Docker_Image import Docker_Image     # note: we have to import here due to circular dependency
         images = []
-        for image_data in self.client_api().images():
+        for image_data in self.client_api().images(filters={'dangling': False}):      # dangling images only have <none>:<none> tags
             for tag in image_data.get('RepoTags') or []:
                 if tag != '<none>:<none>':
-                    image_name, tag = tag.split(':')
+                    image_name, tag = tag.rsplit(':', 1)
                     image_id        = image_data.get('Id').split(':')[1]
-                    image = Docker_Image(image_id = image_id, image_name=image_name, image_tag=tag)
+                    image = Docker_Image(image_id = image_id, image_name=image_name, image_tag=tag, api_docker=self)
                     images.append(image)
         #for image in self.client_docker().images.list():
         #    images.append(self.format_image(image))
         return images
 
+    def images_delete(self, images, force=False, max_workers=DEFAULT__BULK_MAX_WORKERS):
+        """Deletes images (by name:tag or id) in parallel"""
+        def delete(image):
+            self.client_api().remove_image(image, force=force)
+            return True
+        return self.bulk_execute(images, delete, max_workers=max_workers)
+
+    def images_records(self, all=False, filters=None):
+        """Lightweight listing: one /images/json call into compact Docker_Image_Record objects"""
+        return [Docker_Image_Record(image_raw, api_docker=self) for image_raw in self.client_api().images(all=all, filters=filters)]
+
+    def images_pull(self, images, max_workers=DEFAULT__PULL_MAX_WORKERS):
+        """Pulls images concurrently, returns the summary (status, bytes downloaded, duration and layers of each image)"""
+        for event in self.images_pull_stream(images, max_workers=max_workers):
+            if event.get('event') == 'pulls_summary':
+                return event
+
+    def images_pull_stream(self, images, max_workers=DEFAULT__PULL_MAX_WORKERS):
+        """Yields the per-layer progress events of the concurrent pulls (layers shared between images are reported once)"""
+        from osbot_docker.apis.Docker_Images_Pull import Docker_Images_Pull          # note: we have to import here due to circular dependency
+        return Docker_Images_Pull(api_docker=self, images=images, max_workers=max_workers).events()
+
+    def images_query(self, all=False, limit=None, labels=None, **filters):
+        """Generator of the Docker_Image_Record objects that match the predicates (for example image='lambda_python:latest', reference='lambda_*', dangling=False, labels={..})"""
+        from osbot_docker.apis.Docker_Query import Docker_Query                   # note: imported here to keep the import of this module fast (its Docker_Index imports docker-py)
+        query = Docker_Query(labels=labels, target='images', **filters)
+        return query.apply(self.images_records(all=all, filters=query.filters), limit=limit)
+
     def images_names(self):
         names = []
         for image in self.images():
             names.append(image.name())
         return sorted(names)
 
+    def instrumentation_disable(self):
+        if self.instrumentation:
+            self.instrumentation.uninstall()
+            self.instrumentation = None
+        return self
+
+    def instrumentation_enable(self, trace=False, capture_caller=True):
+        """Records the calls made by this API_Docker (and by the objects that use it) through client_api() and client_docker():
+           method, endpoint, latency, bytes and calling method.
+           Those clients are shared by every API_Docker of the process, so calls made directly on them (i.e. not from a
+           method of this API_Docker or of an object whose api_docker it is) are not recorded"""
+        if self.instrumentation is None:
+            self.instrumentation = Docker_Instrumentation(trace=trace, capture_caller=capture_caller, owner=self)
+            self.instrumentation.install(self.client_api())                              # also client_docker's (see Docker_Clients)
+        return self.instrumentation
+
+    def live_index_start(self):
+        """Starts (once) a background subscription to the events stream that keeps an in-memory index of containers and images"""
+        if self.docker_index is None:
+            from osbot_docker.apis.Docker_Index import Docker_Index
+            self.docker_index = Docker_Index(api_docker=self).start()
+        return self.docker_index
+
+    def live_index_stop(self):
+        if self.docker_index:
+            self.docker_index.stop()
+            self.docker_index = None
+        return self
+
     def print_docker_command(self, docker_params):
         if self.debug:
             print('******** Docker Command *******')
@@ -189,5 +357,13 @@ class API_Docker:
     def server_info(self):
         return self.client_docker().info()
 
+    def set_docker_run_engine(self, value):
+        if value not in ('api', 'cli'):
+            raise ValueError(f"docker_run_engine must be 'api' or 'cli', not: {value}")
+        if value == 'cli' and self.docker_run_cache:
+            raise ValueError("the docker_run cache needs the 'api' docker_run_engine, call docker_run_cache_disable() first")
+        self.docker_run_engine = value
+        return self
+
     def set_docker_run_timeout(self, value):
         self.docker_run_timeout = value
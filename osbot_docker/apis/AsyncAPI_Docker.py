@@ -0,0 +1,132 @@
+import json
+from os                                 import environ
+
+import aiohttp
+from docker.errors                      import APIError, NotFound
+
+DEFAULT__DOCKER_SOCKET   = '/var/run/docker.sock'
+DEFAULT__POOL_SIZE       = 100                          # max number of concurrent connections to the daemon
+
+
+class AsyncAPI_Docker:
+    """asyncio version of API_Docker, which talks to the Engine API over the unix socket via a pooled aiohttp session"""
+
+    def __init__(self, socket_path=None, api_version=None, pool_size=DEFAULT__POOL_SIZE):
+        self.socket_path = socket_path or self.socket_path_from_env()
+        self.api_version = api_version                  # when None, it is negotiated (once) on the first request
+        self.pool_size   = pool_size
+        self.session     = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        if self.session:
+            await self.session.close()
+            self.session = None
+
+    def client_session(self):
+        if self.session is None:
+            connector    = aiohttp.UnixConnector(path=self.socket_path, limit=self.pool_size)
+            timeout      = aiohttp.ClientTimeout(total=None)            # builds, pulls and event streams can take longer than aiohttp's default timeout
+            self.session = aiohttp.ClientSession(connector=connector, base_url='http://localhost', timeout=timeout)
+        return self.session
+
+    async def client_api_version(self):
+        if self.api_version is None:
+            version_raw      = await self.request('GET', '/version', versioned=False)
+            self.api_version = version_raw.get('ApiVersion')
+        return self.api_version
+
+    def container(self, container_id):
+        from osbot_docker.apis.AsyncDocker_Container import AsyncDocker_Container
+        return AsyncDocker_Container(container_id=container_id, api_docker=self)
+
+    async def container_create(self, image_name, command='', tag='latest', volumes=None, tty=False, port_bindings=None, labels=None):
+        from osbot_docker.apis.AsyncDocker_Image import AsyncDocker_Image
+        image = AsyncDocker_Image(image_name=image_name, image_tag=tag, api_docker=self)
+        return await image.create_container(command=command, volumes=volumes, tty=tty, port_bindings=port_bindings, labels=labels)
+
+    async def containers(self, all=True, filters=None):
+        from osbot_docker.apis.AsyncDocker_Container import AsyncDocker_Container
+        containers = []
+        for container_raw in await self.containers_raw(all=all, filters=filters):
+            containers.append(AsyncDocker_Container(container_id=container_raw.get('Id'), api_docker=self, container_raw=container_raw))
+        return containers
+
+    async def containers_raw(self, all=True, filters=None):
+        params = dict(all=int(all))
+        if filters:
+            params['filters'] = json.dumps(filters)
+        return await self.request('GET', '/containers/json', params=params)
+
+    async def events(self, since=None, until=None, filters=None):
+        """Async generator with the decoded daemon events"""
+        async with await self.events_open(since=since, until=until, filters=filters) as response:
+            async for line in response.content:
+                if line.strip():
+                    yield json.loads(line)
+
+    async def events_open(self, since=None, until=None, filters=None):
+        """Opens the events stream (the subscription is active when this returns), the caller must close the response"""
+        params = {}
+        if since  : params['since'  ] = since
+        if until  : params['until'  ] = until
+        if filters: params['filters'] = json.dumps(filters)
+        return await self.request('GET', '/events', params=params, stream=True)
+
+    async def images(self):
+        from osbot_docker.apis.AsyncDocker_Image import AsyncDocker_Image
+        images = []
+        for image_data in await self.request('GET', '/images/json'):
+            for tag in image_data.get('RepoTags') or []:
+                if tag != '<none>:<none>':
+                    image_name, tag = tag.rsplit(':', 1)
+                    image_id        = image_data.get('Id').split(':')[1]
+                    images.append(AsyncDocker_Image(image_id=image_id, image_name=image_name, image_tag=tag, api_docker=self))
+        return images
+
+    async def images_names(self):
+        names = []
+        for image in await self.images():
+            names.append(image.name())
+        return sorted(names)
+
+    async def request(self, method, path, params=None, json_data=None, data=None, headers=None, versioned=True, stream=False, raw=False):
+        """Makes an Engine API call, returning the decoded json (or bytes when raw=True, or the open response when stream=True)"""
+        if versioned:
+            path = f'/v{await self.client_api_version()}{path}'
+        response = await self.client_session().request(method, path, params=params, json=json_data, data=data, headers=headers)
+        if response.status >= 400:
+            body = await response.text()
+            response.release()
+            error_class = NotFound if response.status == 404 else APIError
+            try:
+                explanation = json.loads(body).get('message')
+            except ValueError:
+                explanation = body
+            raise error_class(f'{response.status} Client Error for {method} {path}', explanation=explanation)
+        if stream:
+            return response
+        async with response:
+            body = await response.read()
+        if raw:
+            return body
+        if body:
+            return json.loads(body)
+        return {}
+
+    async def server_info(self):
+        return await self.request('GET', '/info')
+
+    def socket_path_from_env(self):
+        """The socket of DOCKER_HOST (when set), which has to be a unix:// one since only unix sockets are supported"""
+        docker_host = environ.get('DOCKER_HOST') or ''
+        if not docker_host:
+            return DEFAULT__DOCKER_SOCKET
+        if docker_host.startswith('unix://'):
+            return docker_host[len('unix://'):]
+        raise ValueError(f'AsyncAPI_Docker only supports unix:// sockets, but DOCKER_HOST is {docker_host} (use API_Docker, or pass socket_path)')
@@ -0,0 +1,187 @@
+import asyncio
+import shlex
+from codecs                                 import getincrementaldecoder
+
+from docker.errors                          import NotFound, DockerException
+from aiohttp                                import ClientError
+
+from osbot_docker.apis.AsyncAPI_Docker      import AsyncAPI_Docker
+from osbot_docker.apis.Docker_Container     import Docker_Container, DEFAULT__WAIT_TIMEOUT, DEFAULT__WAIT_DELTA_MAX, WAIT_FOR_STATUS__EVENTS, container_status_result
+from osbot_docker.apis.Docker_Container     import DEFAULT__LOGS_CHUNK_SIZE, DEFAULT__LOGS_MAX_LINE, LOGS_STREAMS, LOGS_TYPE__MULTIPLEXED, LOGS_TYPE__RAW
+
+
+def frames_payload(data):
+    """Removes the 8 byte headers that the daemon adds to each stdout/stderr frame of non-tty streams"""
+    payload  = bytearray()
+    position = 0
+    while position + 8 <= len(data):
+        size      = int.from_bytes(data[position + 4: position + 8], 'big')
+        position += 8
+        payload  += data[position: position + size]
+        position += size
+    return bytes(payload)
+
+
+class AsyncDocker_Container:
+
+    def __init__(self, container_id, api_docker:AsyncAPI_Docker=None, container_raw=None):
+        self.api_docker    = api_docker or AsyncAPI_Docker()
+        self.container_id  = container_id
+        self.container_raw = container_raw     # initial container_raw data (from /containers/json)
+
+    def __repr__(self):
+        return f"<AsyncDocker_Container: {self.short_id()}>"
+
+    async def delete(self):
+        if await self.status() not in ('not found', 'running'):
+            await self.request('DELETE', f'/containers/{self.container_id}')
+            return True
+        return False
+
+    async def exists(self):
+        return await self.info_raw() != {}
+
+    async def exec(self, command, workdir=None):
+        """Executes a command inside a running Docker container (a str command is split like Docker_Container.exec's, without a shell)"""
+        if type(command) is str:
+            command = shlex.split(command)
+        exec_config   = dict(Cmd=command, WorkingDir=workdir, AttachStdout=True, AttachStderr=True)
+        exec_instance = await self.request('POST', f'/containers/{self.container_id}/exec', json_data=exec_config)
+        result        = await self.request('POST', f"/exec/{exec_instance['Id']}/start", json_data=dict(Detach=False, Tty=False), raw=True)
+        return frames_payload(result).decode('utf-8')
+
+    async def image(self):
+        return (await self.info()).get('image')
+
+    async def info(self):
+        return Docker_Container.info_raw_parse(await self.info_raw())
+
+    async def info_raw(self):
+        try:
+            return await self.request('GET', f'/containers/{self.container_id}/json')
+        except NotFound:
+            return {}
+
+    async def labels(self):
+        return (await self.info()).get('labels') or {}
+
+    async def logs(self):
+        """The whole log as one string (use logs_stream for large or followed logs, since this one is kept in memory)"""
+        try:
+            return ''.join([line async for line in self.logs_stream()])
+        except NotFound:
+            return ''
+
+    async def logs_frames(self, response, chunk_size=DEFAULT__LOGS_CHUNK_SIZE):
+        """Async version of Docker_Container.logs_frames: (stream, bytes) tuples without the frame headers of non-tty containers"""
+        if await self.logs_multiplexed(response) is False:
+            async for chunk in response.content.iter_chunked(chunk_size):
+                yield 'stdout', chunk
+            return
+        buffer = bytearray()
+        async for chunk in response.content.iter_chunked(chunk_size):
+            buffer += chunk
+            while len(buffer) >= 8:
+                size = int.from_bytes(buffer[4:8], 'big')
+                if len(buffer) < 8 + size:
+                    break
+                yield LOGS_STREAMS.get(buffer[0]), bytes(buffer[8:8 + size])
+                del buffer[:8 + size]
+
+    async def logs_multiplexed(self, response):
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == LOGS_TYPE__MULTIPLEXED:
+            return True
+        if content_type == LOGS_TYPE__RAW:
+            return False
+        return not ((await self.info_raw()).get('Config') or {}).get('Tty')
+
+    async def logs_stream(self, follow=False, tail='all', stdout=True, stderr=True, timestamps=False, demux=False,
+                                chunk_size=DEFAULT__LOGS_CHUNK_SIZE, max_line=DEFAULT__LOGS_MAX_LINE):
+        """Async generator with the container's log lines (like Docker_Container.logs_stream), memory use is bounded
+           by chunk_size and max_line, whatever the size of the logs"""
+        def line(stream, text):
+            return (stream, text) if demux else text
+
+        decoders = {}
+        pending  = {}
+        params   = dict(follow=int(follow), stdout=int(stdout), stderr=int(stderr), timestamps=int(timestamps), tail=tail)
+        async with await self.request('GET', f'/containers/{self.container_id}/logs', params=params, stream=True) as response:
+            async for stream, data in self.logs_frames(response, chunk_size=chunk_size):
+                decoder = decoders.get(stream) or decoders.setdefault(stream, getincrementaldecoder('utf-8')(errors='replace'))
+                parts   = (pending.pop(stream, '') + decoder.decode(data)).split('\n')
+                for part in parts[:-1]:
+                    yield line(stream, part + '\n')
+                if len(parts[-1]) > max_line:
+                    yield line(stream, parts[-1])
+                elif parts[-1]:
+                    pending[stream] = parts[-1]
+        for stream, text in pending.items():                                          # last line(s) without line ending
+            yield line(stream, text + decoders[stream].decode(b'', final=True))
+
+    async def name(self):
+        return (await self.info()).get('name')
+
+    async def request(self, method, path, **kwargs):
+        return await self.api_docker.request(method, path, **kwargs)
+
+    def short_id(self):
+        return self.container_id[:12]
+
+    async def start(self, wait_for_running=True, wait_timeout=DEFAULT__WAIT_TIMEOUT):
+        await self.request('POST', f'/containers/{self.container_id}/start')
+        if wait_for_running:
+            return await self.wait_for_container_status('running', timeout=wait_timeout)
+        return True
+
+    async def status(self):
+        return (await self.info()).get('status') or 'not found'
+
+    async def stop(self, wait_for_exit=True, timeout=0, wait_timeout=DEFAULT__WAIT_TIMEOUT):
+        if await self.status() != 'running':
+            return False
+        await self.request('POST', f'/containers/{self.container_id}/stop', params=dict(t=timeout))
+        if wait_for_exit:
+            await self.wait_for_container_status('exited', timeout=wait_timeout)
+        return True
+
+    async def wait_for_container_status(self, desired_status, wait_delta=.2, timeout=DEFAULT__WAIT_TIMEOUT, use_events=True):     # same positional order as Docker_Container's
+        if use_events:
+            try:
+                return await asyncio.wait_for(self.wait_for_container_status__events(desired_status, timeout), timeout)
+            except asyncio.TimeoutError:
+                return False
+            except (DockerException, ClientError):
+                pass                                                            # events stream not available, so fallback to polling
+        return await self.wait_for_container_status__polling(desired_status, timeout, wait_delta)
+
+    async def wait_for_container_status__check(self, desired_status):       # returns True, False (container not found or stopped) or None (keep waiting)
+        return container_status_result(await self.info(), desired_status)
+
+    async def wait_for_container_status__events(self, desired_status, timeout):
+        filters  = dict(container=[self.container_id], event=WAIT_FOR_STATUS__EVENTS)     # (the timeout is enforced by the caller's asyncio.wait_for)
+        response = await self.api_docker.events_open(filters=filters)                  # subscribe before checking, so that no transition is missed
+        async with response:
+            result = await self.wait_for_container_status__check(desired_status)
+            while result is None:
+                line = await response.content.readline()
+                if not line:                                                            # the daemon closed the stream
+                    return await self.wait_for_container_status__check(desired_status) or False
+                if line.strip():
+                    result = await self.wait_for_container_status__check(desired_status)
+            return result
+
+    async def wait_for_container_status__polling(self, desired_status, timeout, wait_delta):
+        loop = asyncio.get_running_loop()
+        end  = None if timeout is None else loop.time() + timeout
+        while True:
+            result = await self.wait_for_container_status__check(desired_status)
+            if result is not None:
+                return result
+            if end is not None:
+                remaining = end - loop.time()
+                if remaining <= 0:
+                    return False
+                wait_delta = min(wait_delta, remaining)
+            await asyncio.sleep(wait_delta)
+            wait_delta = min(wait_delta * 2, DEFAULT__WAIT_DELTA_MAX)
@@ -0,0 +1,117 @@
+import asyncio
+import json
+import shlex
+
+from docker.errors                          import APIError
+from docker.types                           import HostConfig
+from docker.utils                           import tar
+
+from osbot_docker.apis.AsyncAPI_Docker      import AsyncAPI_Docker
+from osbot_docker.apis.AsyncDocker_Container import AsyncDocker_Container
+from osbot_docker.apis.Docker_Build_Context import Docker_Build_Context
+
+
+class AsyncDocker_Image:
+
+    def __init__(self, image_name, image_tag='latest', image_id=None, api_docker:AsyncAPI_Docker=None):
+        self.api_docker = api_docker or AsyncAPI_Docker()
+        self.image_id   = image_id or ''
+        self.image_name = image_name
+        self.image_tag  = image_tag
+
+    def __repr__(self):
+        return f"{self.image_name}:{self.image_tag} {self.short_id()}"
+
+    async def architecture(self):
+        return (await self.info()).get('Architecture')
+
+    async def build(self, path):
+        try:
+            image_name = self.image_name_with_tag()
+            build_logs = []
+            loop       = asyncio.get_running_loop()
+            with await loop.run_in_executor(None, self.build_context, path) as build_context:      # creating the tar is blocking (so it runs on a thread)
+                headers  = {'Content-Type': 'application/x-tar'}
+                data     = getattr(build_context, 'file', build_context)                      # (aiohttp only streams io.IOBase objects, not the tempfile wrapper)
+                response = await self.request('POST', '/build', params=dict(t=image_name), data=data, headers=headers, stream=True)
+                async with response:
+                    async for line in response.content:
+                        if line.strip():
+                            build_log = json.loads(line)
+                            build_logs.append(build_log)
+                            if 'error' in build_log:
+                                return {'status': 'error', 'error': build_log.get('error'), 'build_logs': build_logs}
+            image = await self.info()
+            return {'status': 'ok', 'image': image, 'tags': image.get('Tags'), 'build_logs': build_logs}
+        except Exception as exception:
+            return {'status': 'error', 'error': f'{exception}', 'exception': exception}
+
+    def build_context(self, path_build):
+        if not path_build:
+            raise ValueError('You must specify a directory to build in path')
+        return tar(path_build, exclude=Docker_Build_Context(path_build).dockerignore_patterns())
+
+    async def create_container(self, command='', volumes=None, tty=False, port_bindings=None, labels=None):
+        """Creates a Docker container and returns its ID."""
+        api_version      = await self.api_docker.client_api_version()
+        container_config = dict(Image      = self.image_name_with_tag()                                           ,
+                                Cmd        = shlex.split(command) if type(command) is str and command else command or None,
+                                Tty        = tty                                                                  ,
+                                Labels     = labels                                                               ,
+                                HostConfig = HostConfig(api_version, binds=volumes, port_bindings=port_bindings)   )
+        if port_bindings:
+            container_config['ExposedPorts'] = {self.port_key(port): {} for port in port_bindings}
+        container_raw = await self.request('POST', '/containers/create', json_data=container_config)
+        container_id  = container_raw.get('Id')
+        return AsyncDocker_Container(container_id=container_id, api_docker=self.api_docker)
+
+    async def delete(self):
+        if await self.exists():
+            await self.request('DELETE', f'/images/{self.image_name_with_tag()}')
+            return await self.exists() is False
+        return False
+
+    async def exists(self):
+        return await self.info() != {}
+
+    def format_image(self, data):
+        data['Labels' ] = (data.get('Config') or {}).get('Labels')
+        data['ShortId'] = data.get('Id', '')[:19]
+        data['Tags'   ] = [tag for tag in data.get('RepoTags') or [] if tag != '<none>:<none>']
+        return data
+
+    def image_name_with_tag(self):
+        if self.image_tag:
+            return f"{self.image_name}:{self.image_tag}"
+        return self.image_name
+
+    async def info(self):
+        try:
+            result = await self.request('GET', f'/images/{self.image_name_with_tag()}/json')
+            return self.format_image(result)
+        except APIError:
+            return {}
+
+    def name(self):
+        return self.image_name
+
+    def port_key(self, port):
+        port = str(port)
+        return port if '/' in port else f'{port}/tcp'
+
+    async def pull(self):
+        params   = dict(fromImage=self.image_name, tag=self.image_tag)
+        response = await self.request('POST', '/images/create', params=params, stream=True)
+        async with response:
+            async for line in response.content:
+                if line.strip():
+                    progress = json.loads(line)
+                    if 'error' in progress:
+                        raise APIError(f'Pull of {self.image_name_with_tag()} failed', explanation=progress.get('error'))
+        return await self.exists()
+
+    async def request(self, method, path, **kwargs):
+        return await self.api_docker.request(method, path, **kwargs)
+
+    def short_id(self):
+        return self.image_id[:12]
@@ -0,0 +1,132 @@
+import hashlib
+import io
+import os
+import re
+import tarfile
+import zlib
+
+ARCHIVE__CHUNK_SIZE  = 256 * 1024
+EXTRACT__KWARGS      = dict(filter='data') if hasattr(tarfile, 'data_filter') else {}     # the 'data' filter blocks absolute paths and links outside the target folder
+REGEX__SHA256SUM     = re.compile(r'^([0-9a-f]{64})  (.+)$')
+
+
+class Docker_Archive:
+    """Streams tar archives (to and from the daemon) without holding whole files, or whole archives, in memory"""
+
+    def __init__(self, chunk_size=ARCHIVE__CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        self.bytes      = 0                     # bytes of the last archive created or extracted
+
+    def extract_stream(self, chunks, local_dir, skip=None):
+        """Extracts the tar archive in chunks (iterable of bytes) into local_dir as it arrives, returns the names extracted.
+           Members whose name is in skip are not written (used to skip unchanged files)"""
+        skip      = skip or set()
+        extracted = []
+        reader    = Chunks_Reader(chunks)
+        with tarfile.open(fileobj=reader, mode='r|') as tar:
+            for member in tar:
+                if member.name in skip:
+                    continue
+                tar.extract(member, local_dir, **EXTRACT__KWARGS)
+                extracted.append(member.name)
+        self.bytes = reader.bytes
+        return extracted
+
+    def file_sha256(self, path):
+        digest = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(self.chunk_size), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    def local_entries(self, local_paths):
+        """(full_path, arcname) of local_paths (files or folders, recursively) with the arcnames relative to each path's parent"""
+        if type(local_paths) is str:
+            local_paths = [local_paths]
+        for local_path in local_paths:
+            local_path = os.path.abspath(local_path)
+            parent     = os.path.dirname(local_path)
+            yield local_path, os.path.relpath(local_path, parent)
+            if os.path.isdir(local_path) and not os.path.islink(local_path):
+                for root, folders, files in os.walk(local_path):
+                    folders.sort()
+                    for name in folders + sorted(files):
+                        full_path = os.path.join(root, name)
+                        yield full_path, os.path.relpath(full_path, parent)
+
+    def parse_sha256sum(self, output, prefix=''):
+        """Parses the output of sha256sum into a {path (without prefix): digest} dict"""
+        checksums = {}
+        for line in output.splitlines():
+            match = REGEX__SHA256SUM.match(line)
+            if match:
+                digest, path = match.groups()
+                if path.startswith(prefix):
+                    checksums[path[len(prefix):]] = digest
+        return checksums
+
+    def tar_stream(self, entries, gzip=False):
+        """Yields the tar (or tar.gz) of entries ((full_path, arcname) tuples) in chunks, created while the files are read"""
+        if gzip:
+            compressor = zlib.compressobj(wbits=31)                     # 31 = gzip header and trailer
+            for chunk in self.tar_stream(entries):
+                compressed = compressor.compress(chunk)
+                if compressed:
+                    yield compressed
+            yield compressor.flush()
+            return
+
+        tar_file   = tarfile.TarFile(fileobj=io.BytesIO(), mode='w')     # only used for gettarinfo (nothing is written to it)
+        self.bytes = 0
+        for full_path, arcname in entries:
+            tar_info  = tar_file.gettarinfo(full_path, arcname=arcname)
+            if tar_info is None:                                        # sockets can't be added to a tar
+                continue
+            if tar_info.mtime < 0 or tar_info.mtime > 8**11 - 1:
+                tar_info.mtime = int(tar_info.mtime)
+            header      = tar_info.tobuf(tarfile.PAX_FORMAT, 'utf-8', 'surrogateescape')
+            self.bytes += len(header)
+            yield header
+            if tar_info.isfile():
+                remaining = tar_info.size
+                with open(full_path, 'rb') as file:
+                    while remaining > 0:
+                        size        = min(self.chunk_size, remaining)
+                        chunk       = file.read(size) or tarfile.NUL * size     # keep the tar valid if the file shrinks while being read
+                        remaining  -= len(chunk)
+                        self.bytes += len(chunk)
+                        yield chunk
+                padding = -tar_info.size % tarfile.BLOCKSIZE
+                if padding:
+                    self.bytes += padding
+                    yield tarfile.NUL * padding
+        end_of_archive  = tarfile.NUL * (2 * tarfile.BLOCKSIZE)
+        end_of_archive += tarfile.NUL * (-(self.bytes + len(end_of_archive)) % tarfile.RECORDSIZE)
+        self.bytes     += len(end_of_archive)
+        yield end_of_archive
+
+
+class Chunks_Reader(io.RawIOBase):
+    """File-like (read only) view of an iterable of bytes chunks"""
+
+    def __init__(self, chunks):
+        self.chunks  = iter(chunks)
+        self.pending = b''
+        self.offset  = 0                                                    # position in pending (so a large chunk is not copied on every read)
+        self.bytes   = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while self.offset >= len(self.pending):                             # only drop the chunk once it is used up
+            self.pending = next(self.chunks, None)
+            self.offset  = 0
+            if self.pending is None:
+                self.pending = b''
+                return 0
+        size              = min(len(buffer), len(self.pending) - self.offset)
+        buffer[:size]     = memoryview(self.pending)[self.offset:self.offset + size]
+        self.offset      += size
+        self.bytes       += size
+        return size
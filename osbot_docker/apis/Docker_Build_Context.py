@@ -0,0 +1,103 @@
+import hashlib
+import json
+import os
+import stat
+import tempfile
+from time                               import time_ns
+
+from osbot_docker.apis.Docker_Archive   import Docker_Archive
+
+DEFAULT__DOCKERFILE           = 'Dockerfile'
+LABEL__BUILD_CONTEXT_HASH     = 'osbot_docker.build_context_hash'
+HASH__CHUNK_SIZE              = 1024 * 1024
+TAR__CHUNK_SIZE               = 256 * 1024
+MANIFEST__RACY_WINDOW_NS      = 2 * 10**9                  # files changed this close to the last manifest save are always re-hashed
+
+
+class Docker_Build_Context:
+    """Files of a docker build context (respecting .dockerignore) and an incremental content hash of them"""
+
+    def __init__(self, path, dockerfile=DEFAULT__DOCKERFILE, manifest_path=None):
+        self.path          = os.path.abspath(path)
+        self.dockerfile    = dockerfile
+        self.manifest_path = manifest_path or self.manifest_path_default()
+        self.files_hashed  = 0                              # files read in the last hash() call (i.e. not reused from the manifest)
+
+    def dockerignore_patterns(self):
+        path_dockerignore = os.path.join(self.path, '.dockerignore')
+        if os.path.exists(path_dockerignore):
+            with open(path_dockerignore) as file:
+                lines = [line.strip() for line in file.read().splitlines()]
+                return [line for line in lines if line and line[0] != '#']
+        return []
+
+    def file_digest(self, full_path):
+        digest = hashlib.sha256()
+        with open(full_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(HASH__CHUNK_SIZE), b''):
+                digest.update(chunk)
+        self.files_hashed += 1
+        return digest.hexdigest()
+
+    def files(self):
+        """Sorted paths (relative to the context's root) of the files and folders sent to the daemon"""
+        from docker.utils.build import exclude_paths                            # note: docker-py is imported on first use (it is slow to import)
+        return sorted(exclude_paths(self.path, self.dockerignore_patterns(), dockerfile=self.dockerfile))
+
+    def hash(self):
+        manifest          = self.manifest_load()
+        manifest_time_ns  = manifest.get('time_ns', 0)
+        entries           = manifest.get('entries', {})
+        new_entries       = {}
+        context_hash      = hashlib.sha256()
+        self.files_hashed = 0
+        for relative_path in self.files():
+            full_path = os.path.join(self.path, relative_path)
+            file_stat = os.lstat(full_path)
+            if stat.S_ISDIR(file_stat.st_mode):
+                digest = 'dir'
+            elif stat.S_ISLNK(file_stat.st_mode):
+                digest = 'link:' + os.readlink(full_path)
+            else:
+                key      = [file_stat.st_size, file_stat.st_mtime_ns]
+                previous = entries.get(relative_path)
+                if previous and previous[:2] == key and file_stat.st_mtime_ns + MANIFEST__RACY_WINDOW_NS < manifest_time_ns:
+                    digest = previous[2]                                    # size and mtime unchanged, so reuse the digest
+                else:
+                    digest = self.file_digest(full_path)
+                new_entries[relative_path] = key + [digest]
+            context_hash.update(f'{relative_path}\0{stat.S_IMODE(file_stat.st_mode):o}\0{digest}\n'.encode())
+        self.manifest_save(dict(time_ns=time_ns(), entries=new_entries))
+        return context_hash.hexdigest()
+
+    def files_walk(self):
+        """Yields the paths of the context's files and folders while the folders are walked (i.e. without listing them all first)"""
+        from docker.utils.build import PatternMatcher
+        patterns = self.dockerignore_patterns() + [f'!{self.dockerfile}']       # the Dockerfile is always sent (same rule as docker-py)
+        return PatternMatcher(patterns).walk(self.path)
+
+    def manifest_load(self):
+        try:
+            with open(self.manifest_path) as file:
+                return json.load(file)
+        except (OSError, ValueError):
+            return {}
+
+    def manifest_path_default(self):
+        path_id = hashlib.sha256(f'{self.path}:{self.dockerfile}'.encode()).hexdigest()[:16]
+        return os.path.join(tempfile.gettempdir(), f'osbot_docker__build_context__{path_id}.json')
+
+    def manifest_save(self, manifest):
+        temp_path = f'{self.manifest_path}.{os.getpid()}.tmp'
+        try:
+            with open(temp_path, 'w') as file:
+                json.dump(manifest, file)
+            os.replace(temp_path, self.manifest_path)                     # atomic, so concurrent builds never see a partial manifest
+        except OSError:
+            pass                                                            # the manifest is only an optimisation
+
+    def tar_stream(self, gzip=False, chunk_size=TAR__CHUNK_SIZE):
+        """Yields the build context as tar (or tar.gz) chunks, created while the files are walked and read, so that
+           memory use is bounded by chunk_size whatever the size of the context"""
+        entries = ((os.path.join(self.path, relative_path), relative_path) for relative_path in self.files_walk())
+        return Docker_Archive(chunk_size=chunk_size).tar_stream(entries, gzip=gzip)
@@ -0,0 +1,110 @@
+import re
+from time                               import monotonic
+
+REGEX__STEP_START   = re.compile(r'^Step (\d+)/(\d+) : (.*)$'      )
+REGEX__STEP_RUNNING = re.compile(r'^ ---> Running in ([0-9a-f]+)$' )
+REGEX__STEP_LAYER   = re.compile(r'^ ---> ([0-9a-f]{12,})$'        )
+REGEX__BUILT        = re.compile(r'^Successfully built ([0-9a-f]+)$')
+REGEX__TAGGED       = re.compile(r'^Successfully tagged (.+)$'     )
+
+
+class Docker_Build_Log:
+    """Converts the raw (classic builder) build log messages into structured events and keeps per-step timings"""
+
+    def __init__(self):
+        self.start_time = monotonic()
+        self.end_time   = None
+        self.error      = None
+        self.image_id   = None
+        self.step       = None                  # current step
+        self.steps      = []
+        self.tags       = []
+
+    def elapsed(self):
+        return round(monotonic() - self.start_time, 3)
+
+    def event(self, event_type, **kwargs):
+        return dict(event=event_type, elapsed=self.elapsed(), **kwargs)
+
+    def parse(self, message):
+        """Returns the list of events contained in one (decoded) build log message"""
+        events = []
+        if 'error' in message:
+            self.error = message.get('error')
+            events.extend(self.step_end())
+            events.append(self.event('error', error=self.error, step=self.step_id()))
+        if 'aux' in message:
+            image_id = (message.get('aux') or {}).get('ID')
+            if image_id:
+                self.image_id = image_id
+        for line in (message.get('stream') or '').splitlines():
+            events.extend(self.parse_line(line))
+        return events
+
+    def parse_line(self, line):
+        match = REGEX__STEP_START.match(line)
+        if match:
+            events    = self.step_end()
+            self.step = dict(step        = int(match.group(1)),
+                             steps       = int(match.group(2)),
+                             instruction = match.group(3)     ,
+                             cached      = None               ,
+                             layer       = None               ,
+                             start       = monotonic()        )
+            events.append(self.event('step_start', step=self.step.get('step'), steps=self.step.get('steps'), instruction=self.step.get('instruction')))
+            return events
+        if line == ' ---> Using cache':
+            return self.step_cache(True)
+        match = REGEX__STEP_RUNNING.match(line)
+        if match:
+            return self.step_cache(False, container_id=match.group(1))
+        match = REGEX__STEP_LAYER.match(line)
+        if match and self.step:
+            self.step['layer'] = match.group(1)
+            return [self.event('step_layer', step=self.step_id(), layer=match.group(1))]
+        match = REGEX__BUILT.match(line)
+        if match:
+            events = self.step_end()
+            self.image_id = self.image_id or match.group(1)
+            return events
+        match = REGEX__TAGGED.match(line)
+        if match:
+            self.tags.append(match.group(1))
+            return [self.event('tagged', tag=match.group(1))]
+        if line.strip():
+            return [self.event('output', step=self.step_id(), line=line)]
+        return []
+
+    def step_cache(self, cached, **kwargs):
+        if self.step is None:
+            return []
+        self.step['cached'] = cached
+        return [self.event('step_cache_hit' if cached else 'step_cache_miss', step=self.step_id(), **kwargs)]
+
+    def step_end(self):
+        if self.step is None:
+            return []
+        step      = self.step
+        self.step = None
+        duration  = round(monotonic() - step.pop('start'), 3)
+        step['duration'] = duration
+        self.steps.append(step)
+        return [self.event('step_end', **step)]
+
+    def step_id(self):
+        return self.step and self.step.get('step')
+
+    def summary(self):
+        self.end_time = self.end_time or monotonic()
+        cache_hits    = len([step for step in self.steps if step.get('cached') is True ])
+        cache_misses  = len([step for step in self.steps if step.get('cached') is False])
+        cacheable     = cache_hits + cache_misses
+        return dict(status          = 'error' if self.error else 'ok'                     ,
+                    error           = self.error                                          ,
+                    image_id        = self.image_id                                       ,
+                    tags            = self.tags                                           ,
+                    duration        = round(self.end_time - self.start_time, 3)           ,
+                    steps           = self.steps                                          ,
+                    cache_hits      = cache_hits                                          ,
+                    cache_misses    = cache_misses                                        ,
+                    cache_hit_ratio = round(cache_hits / cacheable, 3) if cacheable else 0.0)
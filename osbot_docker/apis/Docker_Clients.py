@@ -0,0 +1,77 @@
+import os
+from threading                          import Lock
+
+DEFAULT__CLIENT_POOL_SIZE = 10                      # keep-alive connections per daemon (docker-py's default), raise it for heavily multithreaded use
+ENV__DOCKER_API_VERSION   = 'DOCKER_API_VERSION'    # same variable as the docker CLI, pins the API version (skips the /version negotiation)
+
+
+class Docker_Clients:
+    """Process-wide, thread-safe registry of docker-py clients, keyed by daemon endpoint: every API_Docker (and so
+       every Docker_Image and Docker_Container) that talks to the same daemon shares one APIClient (i.e. one API
+       version negotiation and one keep-alive connection pool, of pool_size connections) and one DockerClient on top
+       of it. Clients are per process (a forked process creates its own, since pooled sockets can't be shared).
+       docker-py is only imported when the first client is created, and with a pinned api_version (or the
+       DOCKER_API_VERSION environment variable) the client doesn't negotiate the version with the daemon"""
+
+    def __init__(self, pool_size=DEFAULT__CLIENT_POOL_SIZE, api_version=None):
+        self.pool_size   = pool_size
+        self.api_version = api_version               # None uses DOCKER_API_VERSION or (when not set) negotiates it on first use
+        self.clients     = {}                        # (pid, endpoint) -> dict(client_api=..., client_docker=...)
+        self.lock        = Lock()
+
+    def client_api(self, base_url=None):
+        return self.clients_for(base_url)['client_api']
+
+    def client_docker(self, base_url=None):
+        return self.clients_for(base_url)['client_docker']
+
+    def clients_for(self, base_url):
+        key     = (os.getpid(), base_url)
+        clients = self.clients.get(key)
+        if clients is None:
+            with self.lock:
+                clients = self.clients.get(key)
+                if clients is None:                                             # only one thread negotiates the version
+                    clients = self.clients[key] = self.create(base_url)
+        return clients
+
+    def configure(self, pool_size=None, api_version=None):
+        """Sets the pool size and the (pinned) api version of the clients created from now on (the current ones are
+           closed and re-created on next use)"""
+        if pool_size:
+            self.pool_size = pool_size
+        if api_version:
+            self.api_version = api_version
+        return self.reset()
+
+    def create(self, base_url):
+        import docker                                                                  # note: imported here (on first use) since it is slow to import
+        from docker.utils import kwargs_from_env
+        kwargs        = dict(base_url=base_url) if base_url else kwargs_from_env()     # like docker.from_env (DOCKER_HOST, DOCKER_TLS_VERIFY, DOCKER_CERT_PATH)
+        version       = self.api_version or os.environ.get(ENV__DOCKER_API_VERSION) or 'auto'
+        client_api    = docker.APIClient(version=version, max_pool_size=self.pool_size, **kwargs)
+        client_docker = docker.DockerClient.__new__(docker.DockerClient)              # DockerClient's __init__ only creates its (not shared) APIClient
+        client_docker.api = client_api
+        return dict(client_api=client_api, client_docker=client_docker)
+
+    def endpoints(self):
+        return sorted(str(base_url) for pid, base_url in self.clients if pid == os.getpid())
+
+    def remove(self, base_url):
+        """Closes (and forgets) the clients of base_url"""
+        with self.lock:
+            clients = self.clients.pop((os.getpid(), base_url), None)
+        if clients:
+            clients['client_api'].close()
+        return clients is not None
+
+    def reset(self):
+        """Closes (and forgets) all clients, for example after the daemon restarted"""
+        with self.lock:
+            clients, self.clients = self.clients, {}
+        for item in clients.values():
+            item['client_api'].close()
+        return self
+
+
+docker_clients = Docker_Clients()
@@ -1,15 +1,54 @@
-from docker.errors                       import NotFound
+import json
+import os
+from codecs                             import getincrementaldecoder
+from datetime                           import datetime
+from threading                          import Timer
+from time                               import monotonic, sleep
+from urllib.parse                       import quote
 
 from osbot_docker.apis.API_Docker                import API_Docker
-from osbot_utils.utils.Misc                 import date_time_from_to_str, wait_for
+from osbot_docker.apis.Docker_Stats              import STATS__METRICS, stats_sample
+
+
+DEFAULT__SNAPSHOT_MAX_AGE  = 1.0                    # seconds that a snapshot of the container's attributes is considered fresh
+DEFAULT__WAIT_TIMEOUT      = 30                     # seconds to wait for a container to reach a status
+DEFAULT__WAIT_DELTA_MAX    = 2                      # max seconds between polls (when the events stream is not available)
+COPY__CHECKSUMS_BATCH      = 500                    # files per sha256sum exec
+COPY__FETCH_FILES_MAX      = 100                    # copy_from fetches up to these changed files one by one (above it, the whole archive)
+DEFAULT__LOGS_CHUNK_SIZE   = 8192
+DEFAULT__LOGS_MAX_LINE     = 64 * 1024              # longer lines are yielded in pieces (so that memory stays bounded)
+LOGS_STREAMS               = {0: 'stdin', 1: 'stdout', 2: 'stderr'}
+LOGS_TYPE__MULTIPLEXED     = 'application/vnd.docker.multiplexed-stream'
+LOGS_TYPE__RAW             = 'application/vnd.docker.raw-stream'
+WAIT_FOR_STATUS__EVENTS    = ['destroy', 'die', 'health_status', 'kill', 'oom', 'pause', 'restart', 'start', 'stop', 'unpause']
+WAIT_FOR_STATUS__STOPPED   = ('dead', 'exited')                                     # statuses that only change when the container is (re)started or removed
+WAIT_FOR_STATUS__FROM_STOP = ('dead', 'exited', 'not found', 'removing', 'restarting')    # statuses a stopped container can still reach
+
+
+def container_status_result(info, desired_status):
+    """True when the container's status (or health) is desired_status, False when it can't get there (the container was
+       not found, or it stopped while waiting for a status of a live container, e.g. it exited straight after start),
+       None when it can (i.e. keep waiting)"""
+    if desired_status in (info.get('status'), info.get('health')):
+        return True
+    if info == {}:
+        return desired_status == 'not found'
+    if info.get('status') in WAIT_FOR_STATUS__STOPPED and desired_status not in WAIT_FOR_STATUS__FROM_STOP:
+        return False
+    return None
 
 
 class Docker_Container:
 
-    def __init__(self, container_id, api_docker:API_Docker=None, container_raw=None):
-        self.api_docker    = api_docker or API_Docker()
-        self.container_id  = container_id
-        self.container_raw = container_raw     # initial docker_api container_raw data
+    def __init__(self, container_id, api_docker:API_Docker=None, container_raw=None, snapshot_max_age=DEFAULT__SNAPSHOT_MAX_AGE, snapshot_live=False):
+        self.api_docker       = api_docker or API_Docker()
+        self.container_id     = container_id
+        self.container_raw    = container_raw       # initial docker_api container_raw data
+        self.snapshot         = None                # parsed info() data, used by the status/name/image/labels accessors
+        self.snapshot_time    = None
+        self.snapshot_max_age = snapshot_max_age    # None means the snapshot only changes on refresh()
+        self.snapshot_live    = snapshot_live       # when True every accessor makes a live inspect call
+        self.snapshot_from_container_raw()
 
     def __repr__(self):
         return f"<Docker_Container: {self.short_id()}>"
@@ -20,11 +59,105 @@ class Docker_Container:
     def client_docker(self):
         return self.api_docker.client_docker()
 
+    def checksums(self, container_paths):
+        """sha256 of files inside the (running) container, as a {path: digest} dict (missing files are not included)"""
+        from osbot_docker.apis.Docker_Archive import Docker_Archive
+        checksums = {}
+        paths     = list(container_paths)
+        for index in range(0, len(paths), COPY__CHECKSUMS_BATCH):
+            output = self.exec(['sha256sum', '--'] + paths[index: index + COPY__CHECKSUMS_BATCH])
+            checksums.update(Docker_Archive().parse_sha256sum(output))
+        return checksums
+
+    def commit(self, repository, tag='latest', message=None, changes=None):
+        """Creates an image from the container's current filesystem, returns it as a Docker_Image"""
+        from osbot_docker.apis.Docker_Image import Docker_Image                 # note: we have to import here due to circular dependency
+        result   = self.client_api().commit(self.container_id, repository=repository, tag=tag, message=message, changes=changes)
+        image_id = result.get('Id', '').split(':')[-1]
+        return Docker_Image(image_name=repository, image_tag=tag, image_id=image_id, api_docker=self.api_docker)
+
+    def copy_from(self, container_path, local_dir, skip_unchanged=True):
+        """Copies container_path (file or folder) into local_dir, streaming the tar from the archive endpoint.
+           With skip_unchanged (and a running container) the container's files are compared (sha256) with the local
+           copies before fetching: the unchanged files are not transferred and the changed (or new) ones are fetched one
+           by one. Above COPY__FETCH_FILES_MAX changed files the whole archive is fetched (and only the writes of the
+           unchanged files are skipped). Note: the file by file fetch only copies regular files (not empty folders or links)"""
+        from osbot_docker.apis.Docker_Archive import Docker_Archive
+        start          = monotonic()
+        docker_archive = Docker_Archive()
+        skip           = set()
+        changed        = None
+        container_path = container_path.rstrip('/') or '/'
+        parent         = container_path.rsplit('/', 1)[0] + '/'
+        if skip_unchanged and self.refresh().status() == 'running':
+            output = self.exec(['find', container_path, '-type', 'f', '-exec', 'sha256sum', '{}', '+'])
+            remote = docker_archive.parse_sha256sum(output, prefix=parent)          # arcname -> digest
+            for arcname, digest in remote.items():
+                local_path = os.path.join(local_dir, arcname)
+                if os.path.isfile(local_path) and docker_archive.file_sha256(local_path) == digest:
+                    skip.add(arcname)
+            if skip:
+                changed = sorted(set(remote) - skip)
+        skipped_bytes = sum(os.path.getsize(os.path.join(local_dir, arcname)) for arcname in skip)
+        if changed is not None and len(changed) <= COPY__FETCH_FILES_MAX:
+            copied, bytes_transferred = self.copy_from__files(parent, changed, local_dir, docker_archive)
+            return self.copy_stats(start, bytes_transferred, copied=copied, skipped=sorted(skip), skipped_bytes=skipped_bytes)
+        chunks, _  = self.client_api().get_archive(self.container_id, container_path, chunk_size=docker_archive.chunk_size)
+        extracted  = docker_archive.extract_stream(chunks, local_dir, skip=skip)
+        return self.copy_stats(start, docker_archive.bytes, copied=extracted, skipped=sorted(skip), skipped_bytes=skipped_bytes)
+
+    def copy_from__files(self, parent, arcnames, local_dir, docker_archive):
+        """Fetches each of the arcnames (files under the container's parent folder) into local_dir, returns (copied, bytes)"""
+        copied            = []
+        bytes_transferred = 0
+        for arcname in arcnames:
+            target_dir = os.path.join(local_dir, os.path.dirname(arcname))
+            os.makedirs(target_dir, exist_ok=True)
+            chunks, _  = self.client_api().get_archive(self.container_id, parent + arcname, chunk_size=docker_archive.chunk_size)
+            docker_archive.extract_stream(chunks, target_dir)
+            bytes_transferred += docker_archive.bytes
+            copied.append(arcname)
+        return copied, bytes_transferred
+
+    def copy_stats(self, start, bytes_transferred, copied, skipped, skipped_bytes=0):
+        duration = monotonic() - start
+        return dict(copied        = copied                                                      ,
+                    skipped       = skipped                                                     ,
+                    bytes         = bytes_transferred                                           ,   # bytes transferred (the tar archives)
+                    skipped_bytes = skipped_bytes                                               ,   # size of the unchanged files (not transferred)
+                    duration      = round(duration, 3)                                          ,
+                    throughput    = round(bytes_transferred / duration) if duration else 0     )   # bytes per second
+
+    def copy_to(self, container_path, local_paths, skip_unchanged=True):
+        """Copies local_paths (files or folders) into the container_path folder, streaming the tar to the archive endpoint.
+           With skip_unchanged (and a running container) files whose sha256 matches the container's copy are not sent"""
+        from osbot_docker.apis.Docker_Archive import Docker_Archive
+        start          = monotonic()
+        docker_archive = Docker_Archive()
+        entries        = list(docker_archive.local_entries(local_paths))
+        skipped        = set()
+        skipped_bytes  = 0
+        if skip_unchanged and self.refresh().status() == 'running':
+            container_path = container_path.rstrip('/') or '/'
+            files          = {f'{container_path}/{arcname}'.replace('//', '/'): (full_path, arcname) for full_path, arcname in entries if os.path.isfile(full_path)}
+            remote         = self.checksums(files)
+            for remote_path, digest in remote.items():
+                full_path, arcname = files[remote_path]
+                if docker_archive.file_sha256(full_path) == digest:
+                    skipped.add(arcname)
+                    skipped_bytes += os.path.getsize(full_path)
+            entries = [entry for entry in entries if entry[1] not in skipped]
+        copied = [arcname for full_path, arcname in entries if not os.path.isdir(full_path)]
+        if entries:
+            self.client_api().put_archive(self.container_id, container_path, docker_archive.tar_stream(entries))
+        return self.copy_stats(start, docker_archive.bytes, copied=copied, skipped=sorted(skipped), skipped_bytes=skipped_bytes)
+
     def delete(self):
-        if self.exists():
-            if self.status() != 'running':
-                self.client_api().remove_container(self.container_id)
-                return True
+        status = self.refresh().status()                        # one inspect call to confirm that the container exists and is not running
+        if status != 'not found' and status != 'running':
+            self.client_api().remove_container(self.container_id)
+            self.snapshot_clear()
+            return True
         return False
 
     def exists(self):
@@ -36,22 +169,48 @@ class Docker_Container:
         result          = self.client_api().exec_start(exec_instance['Id'])
         return result.decode('utf-8')
 
-    def image(self):                             # todo see what are the performance implications of using info here (which make a full rest call to get the data)
+    def exec_session(self, shell='/bin/sh', workdir=None, isolate=True):
+        """Starts a long-lived shell in the container that runs many commands over one socket (see Docker_Exec_Session)"""
+        from osbot_docker.apis.Docker_Exec_Session import Docker_Exec_Session
+        return Docker_Exec_Session(self, shell=shell, workdir=workdir, isolate=isolate).start()
+
+    def exec_stream(self, command, workdir=None):
+        """Executes a command inside a running container, yielding ('stdout'|'stderr', text) chunks as they arrive,
+           the last item is ('exit_code', exit_code)"""
+        exec_instance = self.client_api().exec_create(self.container_id, cmd=command, workdir=workdir)
+        exec_id       = exec_instance['Id']
+        decoders      = dict(stdout=getincrementaldecoder('utf-8')(errors='replace'),
+                             stderr=getincrementaldecoder('utf-8')(errors='replace'))
+        for stdout, stderr in self.client_api().exec_start(exec_id, stream=True, demux=True):
+            for stream, data in (('stdout', stdout), ('stderr', stderr)):
+                if data:
+                    text = decoders[stream].decode(data)
+                    if text:
+                        yield stream, text
+        yield 'exit_code', self.client_api().exec_inspect(exec_id).get('ExitCode')
+
+    def health(self):
+        return self.info().get('health')
+
+    def image(self):
         return self.info().get('image')
 
     def info(self):
-        info_raw = self.info_raw()
-        return self.info_raw_parse(info_raw)
+        if self.snapshot_expired():
+            self.refresh()
+        return self.snapshot
 
     def info_raw(self):
+        from docker.errors import NotFound                                      # note: docker-py is imported on first use (it is slow to import)
         try:
             container = self.client_docker().containers.get(self.container_id)
             return container.attrs
         except NotFound:
             return {}
 
-
-    def info_raw_parse(self, info_raw):
+    @staticmethod
+    def info_raw_parse(info_raw):
+        from osbot_utils.utils.Misc import date_time_from_to_str                # note: imported here to keep the import of this module fast
         if info_raw is None or  info_raw == {}:
             return {}
         config      = info_raw.get('Config'         )
@@ -59,11 +218,13 @@ class Docker_Container:
         created     = date_time_from_to_str(created_raw, '%Y-%m-%dT%H:%M:%S.%fZ', '%Y-%m-%d %H:%M', True)
         network     = info_raw.get('NetworkSettings')
         state       = info_raw.get('State'          )
+        health      = state.get('Health') or {}
 
         return dict(args        = info_raw.get('Args'         ),
                     created     = created                           ,
                     entrypoint  = config       .get('Entrypoint'   ),
                     env         = config       .get('Env'          ),
+                    health      = health       .get('Status'       ),
                     id          = info_raw.get('Id'           ),
                     id_short    = info_raw.get('Id'      )[:12],
                     image       = config       .get('Image'        ),
@@ -78,43 +239,225 @@ class Docker_Container:
         return self.info().get('labels') or {}
 
     def logs(self):
-        if self.exists():
-            logs = self.client_api().logs(self.container_id)
-            if logs:
-                return logs.decode('utf-8')
-        return ''
+        from docker.errors import NotFound
+        try:
+            return ''.join(self.logs_stream())
+        except NotFound:
+            return ''
+
+    def logs_frames(self, response, chunk_size=DEFAULT__LOGS_CHUNK_SIZE):
+        """Yields (stream, bytes) tuples from a logs response, removing the 8 byte frame headers used for non-tty containers"""
+        buffer = bytearray()
+        if self.logs_multiplexed(response) is False:                                  # tty containers send the raw output
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                yield 'stdout', chunk
+            return
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            buffer += chunk
+            while len(buffer) >= 8:
+                size = int.from_bytes(buffer[4:8], 'big')
+                if len(buffer) < 8 + size:
+                    break
+                yield LOGS_STREAMS.get(buffer[0]), bytes(buffer[8:8 + size])
+                del buffer[:8 + size]
+
+    def logs_multiplexed(self, response):
+        """True when the logs response uses the multiplexed (framed) format: from its Content-Type (sent by API 1.42+)
+           or, for older daemons, from the container's Config.Tty (tty containers send the raw output)"""
+        content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+        if content_type == LOGS_TYPE__MULTIPLEXED:
+            return True
+        if content_type == LOGS_TYPE__RAW:
+            return False
+        return not (self.info_raw().get('Config') or {}).get('Tty')
 
-    def name(self):                             # todo see what are the performance implications of using info here (which make a full rest call to get the data)
+    def logs_request(self, follow, tail, since, until, stdout, stderr, timestamps):
+        from docker.errors       import create_api_error_from_http_exception
+        from docker.utils        import datetime_to_timestamp
+        from requests.exceptions import HTTPError
+        client_api = self.client_api()
+        params     = dict(follow     = int(follow    ),
+                          stdout     = int(stdout    ),
+                          stderr     = int(stderr    ),
+                          timestamps = int(timestamps),
+                          tail       = tail          )
+        for key, value in dict(since=since, until=until).items():
+            if isinstance(value, datetime):
+                value = datetime_to_timestamp(value)
+            if value is not None:
+                params[key] = value
+        url      = f'{client_api.base_url}/v{client_api.api_version}/containers/{quote(self.container_id)}/logs'
+        response = client_api.get(url, params=params, stream=True, timeout=None if follow else client_api.timeout)
+        try:
+            response.raise_for_status()
+        except HTTPError as error:
+            raise create_api_error_from_http_exception(error)
+        return response
+
+    def logs_stream(self, follow=False, tail='all', since=None, until=None, stdout=True, stderr=True, timestamps=False, demux=False,
+                          chunk_size=DEFAULT__LOGS_CHUNK_SIZE, max_line=DEFAULT__LOGS_MAX_LINE):
+        """Yields the container's log lines (with line endings) as they arrive, as (stream, line) tuples when demux is True.
+           Memory use is bounded by chunk_size and max_line, whatever the size of the logs"""
+        def line(stream, text):
+            return (stream, text) if demux else text
+
+        decoders = {}
+        pending  = {}
+        response = self.logs_request(follow, tail, since, until, stdout, stderr, timestamps)
+        with response:
+            for stream, data in self.logs_frames(response, chunk_size=chunk_size):
+                decoder = decoders.get(stream) or decoders.setdefault(stream, getincrementaldecoder('utf-8')(errors='replace'))
+                parts   = (pending.pop(stream, '') + decoder.decode(data)).split('\n')
+                for part in parts[:-1]:
+                    yield line(stream, part + '\n')
+                if len(parts[-1]) > max_line:
+                    yield line(stream, parts[-1])
+                elif parts[-1]:
+                    pending[stream] = parts[-1]
+            for stream, text in pending.items():                                      # last line(s) without line ending
+                yield line(stream, text + decoders[stream].decode(b'', final=True))
+
+    def name(self):
         return self.info().get('name')
 
-    def start(self, wait_for_running=True):
+    def refresh(self):
+        return self.snapshot_set(self.info_raw())
+
+    def set_snapshot_live(self, value=True):
+        self.snapshot_live = value
+        return self
+
+    def set_snapshot_max_age(self, value):
+        self.snapshot_max_age = value
+        return self
+
+    def snapshot_clear(self):
+        self.snapshot      = None
+        self.snapshot_time = None
+        return self
+
+    def snapshot_expired(self):
+        if self.snapshot_live or self.snapshot is None:
+            return True
+        if self.snapshot_max_age is None:
+            return False
+        return monotonic() - self.snapshot_time > self.snapshot_max_age
+
+    def snapshot_from_container_raw(self):
+        attrs = getattr(self.container_raw, 'attrs', None) or {}
+        if 'Config' in attrs:                                   # only full inspect data (i.e. not sparse listings) can be used as a snapshot
+            self.snapshot_set(attrs)
+        return self
+
+    def snapshot_set(self, info_raw):
+        self.snapshot      = self.info_raw_parse(info_raw)
+        self.snapshot_time = monotonic()
+        return self
+
+    def start(self, wait_for_running=True, wait_timeout=DEFAULT__WAIT_TIMEOUT):
         self.client_api().start(container=self.container_id)
+        self.snapshot_clear()
         if wait_for_running:
-            return self.wait_for_container_status('running')
+            return self.wait_for_container_status('running', timeout=wait_timeout)
         return True
 
     def short_id(self):
         return self.container_id[:12]
 
-    def stop(self, wait_for_exit=True, timeout=0):
-        if self.status() != 'running':
+    def stop(self, wait_for_exit=True, timeout=0, wait_timeout=DEFAULT__WAIT_TIMEOUT):
+        if self.refresh().status() != 'running':
             return False
         self.client_api().stop(container=self.container_id, timeout=timeout)
+        self.snapshot_clear()
         if wait_for_exit:
-            self.wait_for_container_status('exited')
+            self.wait_for_container_status('exited', timeout=wait_timeout)
         return True
 
+    def stats(self):
+        """One sample of the container's resource usage (cpu percent, memory usage and limit, network and block IO
+           bytes), None when it is not running (see Docker_Stats to sample containers continuously)"""
+        sample = stats_sample(self.client_api().stats(self.container_id, stream=False))
+        return dict(zip(STATS__METRICS, sample)) if sample else None
+
+    def stats_stream(self):
+        """Returns a (blocking) stream of the container's raw stats (one per second), call .close() on it (from any
+           thread) to stop it"""
+        from docker.errors       import create_api_error_from_http_exception
+        from docker.types        import CancellableStream
+        from requests.exceptions import HTTPError
+        client_api = self.client_api()
+        url        = f'{client_api.base_url}/v{client_api.api_version}/containers/{quote(self.container_id)}/stats'
+        response   = client_api.get(url, params=dict(stream=1), stream=True, timeout=None)
+        try:
+            response.raise_for_status()
+        except HTTPError as error:
+            raise create_api_error_from_http_exception(error)
+        stats = (json.loads(line) for line in response.iter_lines() if line)
+        return CancellableStream(stats, response)
+
     def status(self):
         return self.info().get('status') or 'not found'
 
-    def wait_for_container_status(self, desired_status, wait_delta=.2, wait_count=10):
-        while wait_count > 0:
-            container_status = self.status()
-            #print(f'{wait_count}: {self.container_id} : {container_status}')
-            if container_status is None:
-                return False
-            if container_status == desired_status:
-                return True                                 # Container has reached the desired status
-            wait_for(wait_delta)
-            wait_count-=1
-        return False
\ No newline at end of file
+    def wait_for_container_status(self, desired_status, wait_delta=.2, wait_count=None, timeout=DEFAULT__WAIT_TIMEOUT, use_events=True):
+        """Waits until the container's status (or health) is desired_status, returns False on timeout (no timeout if None)
+           or as soon as the container can't reach it (see container_status_result).
+           wait_count is deprecated (use timeout), when set the timeout is wait_delta * wait_count (as the previous polling)"""
+        if wait_count is not None:
+            import warnings
+            warnings.warn('wait_for_container_status: wait_count is deprecated, use timeout', DeprecationWarning, stacklevel=2)
+            timeout = wait_delta * wait_count
+        deadline = None if timeout is None else monotonic() + timeout
+        if use_events:
+            result = self.wait_for_container_status__events(desired_status, timeout)
+            if result is not None:
+                return result
+        remaining = None if deadline is None else max(deadline - monotonic(), 0)      # (polling only gets the time left)
+        return self.wait_for_container_status__polling(desired_status, remaining, wait_delta)
+
+    def wait_for_container_status__check(self, desired_status):         # returns True, False (container not found or stopped) or None (keep waiting)
+        return container_status_result(self.refresh().snapshot, desired_status)
+
+    def wait_for_container_status__events(self, desired_status, timeout):
+        """Uses the daemon's events stream to wake up on each status transition, returns None if that stream is not available.
+           The timeout is enforced here (a timer closes the stream), not with the daemon's 'until' (whole seconds of the daemon's clock)"""
+        filters = dict(container=self.container_id, event=WAIT_FOR_STATUS__EVENTS)
+        from docker.errors       import DockerException
+        from requests.exceptions import RequestException
+        try:
+            events = self.api_docker.events(filters=filters)
+        except (DockerException, RequestException):
+            return None
+        timer = None
+        if timeout is not None:
+            timer = Timer(timeout, events.close)                           # ends the (blocking) iteration below
+            timer.daemon = True
+            timer.start()
+        try:
+            result = self.wait_for_container_status__check(desired_status)    # checked after subscribing, so that no transition is missed
+            if result is not None:
+                return result
+            for _ in events:
+                result = self.wait_for_container_status__check(desired_status)
+                if result is not None:
+                    return result
+            return self.wait_for_container_status__check(desired_status) or False
+        except (DockerException, RequestException):
+            return None
+        finally:
+            if timer:
+                timer.cancel()
+            events.close()
+
+    def wait_for_container_status__polling(self, desired_status, timeout, wait_delta):
+        end = None if timeout is None else monotonic() + timeout
+        while True:
+            result = self.wait_for_container_status__check(desired_status)
+            if result is not None:
+                return result
+            if end is not None:
+                remaining = end - monotonic()
+                if remaining <= 0:
+                    return False
+                wait_delta = min(wait_delta, remaining)
+            sleep(wait_delta)
+            wait_delta = min(wait_delta * 2, DEFAULT__WAIT_DELTA_MAX)      # exponential backoff
@@ -0,0 +1,92 @@
+from threading                          import Thread, Lock
+
+from docker.errors                      import DockerException
+from requests.exceptions                import RequestException
+
+from osbot_utils.utils.Misc             import wait_for
+
+
+class Docker_Events:
+    """Shares one background subscription to the daemon's events stream between many subscribers"""
+
+    def __init__(self, api_docker, filters=None, reconnect_delay=1):
+        self.api_docker        = api_docker
+        self.filters           = filters
+        self.reconnect_delay   = reconnect_delay
+        self.subscribers       = []
+        self.subscriber_errors = 0
+        self.events_received   = 0
+        self.last_event_time   = None             # used to resume (via 'since') after the stream is dropped
+        self.lock              = Lock()
+        self.running           = False
+        self.stream            = None
+        self.thread            = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def dispatch(self, event):
+        self.events_received += 1
+        self.last_event_time  = event.get('time') or self.last_event_time
+        with self.lock:
+            subscribers = list(self.subscribers)
+        for subscriber in subscribers:
+            try:
+                subscriber(event)
+            except Exception:                     # a bad subscriber must not stop the events from reaching the others
+                self.subscriber_errors += 1
+
+    def listen(self):
+        while self.running:
+            try:
+                if self.stream is None:
+                    self.stream_open()
+                for event in self.stream:
+                    self.dispatch(event)
+            except (DockerException, RequestException, OSError):
+                pass
+            self.stream_close()
+            if self.running:
+                wait_for(self.reconnect_delay)
+
+    def start(self):
+        if self.running is False:
+            self.running = True
+            self.stream_open()                     # opened here, so that no events are missed by the caller after start() returns
+            self.thread  = Thread(target=self.listen, name='Docker_Events', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        self.running = False
+        self.stream_close()
+        if self.thread:
+            self.thread.join(timeout=self.reconnect_delay + 1)
+            self.thread = None
+        return self
+
+    def stream_close(self):
+        stream, self.stream = self.stream, None
+        if stream:
+            try:
+                stream.close()
+            except Exception:
+                pass
+
+    def stream_open(self):
+        self.stream = self.api_docker.events(since=self.last_event_time, filters=self.filters)
+        return self.stream
+
+    def subscribe(self, callback):
+        with self.lock:
+            self.subscribers.append(callback)
+        return self
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            if callback in self.subscribers:
+                self.subscribers.remove(callback)
+        return self
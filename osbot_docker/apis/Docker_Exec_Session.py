@@ -0,0 +1,148 @@
+import socket
+from time                               import perf_counter
+from uuid                               import uuid4
+
+DEFAULT__EXEC_SHELL     = '/bin/sh'
+DEFAULT__PIPELINE_SIZE  = 16                     # max commands written to the shell ahead of reading their results
+EXEC_STREAMS            = {1: 'stdout', 2: 'stderr'}
+
+
+class Docker_Exec_Session:
+    """One long-lived shell inside a container (attached over the hijacked exec socket) that runs many commands.
+
+       Each command's output is delimited by unique markers (printed to stdout, with the exit code, and to stderr).
+       With isolate=True commands run in a subshell, so that 'exit' or syntax errors don't end the session
+       (but 'cd' or 'export' don't persist between commands), use isolate=False to keep the shell state"""
+
+    def __init__(self, docker_container, shell=DEFAULT__EXEC_SHELL, workdir=None, isolate=True):
+        self.docker_container = docker_container
+        self.shell            = shell
+        self.workdir          = workdir
+        self.isolate          = isolate
+        self.exec_id          = None
+        self.socket           = None
+        self.socket_io        = None
+        self.buffer           = bytearray()                                  # raw (multiplexed) bytes not yet split into frames
+        self.streams          = dict(stdout=bytearray(), stderr=bytearray())
+        self.commands_run     = 0
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def client_api(self):
+        return self.docker_container.client_api()
+
+    def close(self):
+        if self.socket:
+            try:
+                self.socket.shutdown(socket.SHUT_WR)                         # closing stdin makes the shell exit
+            except OSError:
+                pass
+            self.socket.close()
+            self.socket_io.close()
+            self.socket    = None
+            self.socket_io = None
+        return self
+
+    def command_script(self, command, marker):
+        command_quoted = "'" + command.replace("'", "'\\''") + "'"
+        run            = f"( eval {command_quoted} )" if self.isolate else f"eval {command_quoted}"
+        return (f"{run} < /dev/null\n"
+                f"__osbot_exit_code=$?\n"
+                f"printf '%s %s\\n' '{marker}' \"$__osbot_exit_code\"\n"
+                f"printf '%s\\n' '{marker}' >&2\n").encode()
+
+    def is_open(self):
+        return self.socket is not None
+
+    def read_frames(self, deadline):
+        if deadline is not None:
+            remaining = deadline - perf_counter()
+            if remaining <= 0:
+                raise socket.timeout()
+            self.socket.settimeout(remaining)
+        else:
+            self.socket.settimeout(None)
+        data = self.socket.recv(65536)
+        if not data:
+            raise EOFError('exec session ended (the shell exited)')
+        self.buffer += data
+        while len(self.buffer) >= 8:
+            size = int.from_bytes(self.buffer[4:8], 'big')
+            if len(self.buffer) < 8 + size:
+                break
+            stream = EXEC_STREAMS.get(self.buffer[0])
+            if stream:
+                self.streams[stream] += self.buffer[8:8 + size]
+            del self.buffer[:8 + size]
+
+    def read_result(self, marker, deadline):
+        marker      = marker.encode()
+        stdout      = None
+        stderr      = None
+        exit_code   = None
+        while stdout is None or stderr is None:
+            if stdout is None:
+                buffer = self.streams['stdout']
+                index  = buffer.find(marker + b' ')
+                end    = buffer.find(b'\n', index) if index != -1 else -1
+                if end != -1:
+                    stdout    = bytes(buffer[:index])
+                    exit_code = int(buffer[index + len(marker) + 1: end])
+                    del buffer[:end + 1]
+            if stderr is None:
+                buffer = self.streams['stderr']
+                index  = buffer.find(marker + b'\n')
+                if index != -1:
+                    stderr = bytes(buffer[:index])
+                    del buffer[:index + len(marker) + 1]
+            if stdout is None or stderr is None:
+                self.read_frames(deadline)
+        return stdout, stderr, exit_code
+
+    def run(self, command, timeout=None):
+        """Runs one command, returns a dict with its stdout, stderr, exit_code and duration (in ms, from writing the command to reading its result)"""
+        return self.run_many([command], timeout=timeout)[0]
+
+    def run_many(self, commands, timeout=None, pipeline=DEFAULT__PIPELINE_SIZE):
+        """Runs the commands in order (writing up to 'pipeline' of them ahead), timeout applies to the whole batch.
+           The duration (ms from writing a command to reading its result) is only set for the commands written when no
+           other command was pending, for the others it is None (since it would include the time queued in the shell).
+           After a timeout (or if the shell exits) the session is closed, since the shell's state is then unknown"""
+        if self.is_open() is False:
+            raise ValueError('exec session is not open (call start() first)')
+        deadline = None if timeout is None else perf_counter() + timeout
+        pending  = []
+        results  = []
+        commands = list(commands)
+        try:
+            while commands or pending:
+                while commands and len(pending) < pipeline:
+                    command = commands.pop(0)
+                    marker  = f'__osbot_exec__{uuid4().hex}'
+                    start   = None if pending else perf_counter()          # (a queued command's wait is not its execution time)
+                    self.socket.sendall(self.command_script(command, marker))
+                    pending.append((command, marker, start))
+                command, marker, start    = pending.pop(0)
+                stdout, stderr, exit_code = self.read_result(marker, deadline)
+                self.commands_run        += 1
+                results.append(dict(command   = command                                                             ,
+                                    stdout    = stdout.decode('utf-8', errors='replace')                            ,
+                                    stderr    = stderr.decode('utf-8', errors='replace')                            ,
+                                    exit_code = exit_code                                                           ,
+                                    duration  = None if start is None else round((perf_counter() - start) * 1000, 3)))
+        except (socket.timeout, EOFError, OSError):
+            self.close()
+            raise
+        return results
+
+    def start(self):
+        exec_instance  = self.client_api().exec_create(self.docker_container.container_id, cmd=[self.shell], workdir=self.workdir,
+                                                       stdin=True, stdout=True, stderr=True, tty=False)
+        self.exec_id   = exec_instance.get('Id')
+        self.socket_io = self.client_api().exec_start(self.exec_id, socket=True)
+        self.socket    = getattr(self.socket_io, '_sock', self.socket_io)
+        return self
@@ -1,5 +1,5 @@
-from docker.errors import NotFound, APIError
-
+from osbot_docker.apis.Docker_Build_Context import Docker_Build_Context, LABEL__BUILD_CONTEXT_HASH
+from osbot_docker.apis.Docker_Build_Log import Docker_Build_Log
 from osbot_docker.apis.Docker_Container import Docker_Container
 from osbot_utils.decorators.methods.catch import catch
 from osbot_utils.utils.Dev import pprint
@@ -35,16 +35,50 @@ class Docker_Image:
         host_config     = self.client_api().create_host_config(binds=volumes, port_bindings=port_bindings)
         container_raw   = self.client_api().create_container(image=image, command=command, host_config=host_config, tty=tty, ports=exposed_ports, labels=labels)
         container_id    = container_raw.get('Id')
-        container       = Docker_Container(container_id=container_id, api_docker=self)
+        container       = Docker_Container(container_id=container_id, api_docker=self.api_docker)
         return container
 
-    # todo: add solution that supports streaming of docker file creation, this version will only return when the docker build execute completes
+    # note: use build_stream to get the build events as they happen (this version will only return when the docker build execute completes)
     @catch
-    def build(self, path):
-        image_name = self.image_name_with_tag()
-        (result,build_logs) = self.client_docker().images.build(path=path, tag=image_name)
+    def build(self, path, stream_context=False, gzip=False):
+        image_name    = self.image_name_with_tag()
+        build_context = self.build_context(path, stream_context=stream_context, gzip=gzip)
+        (result,build_logs) = self.client_docker().images.build(tag=image_name, **build_context)
         return {'status': 'ok', 'image': result.attrs, 'tags':result.tags, 'build_logs': build_logs }
 
+    def build_context(self, path, stream_context=False, gzip=False):
+        """Kwargs for docker-py's build, when stream_context is True the context's tar is created and uploaded in chunks
+           (while the files are walked) instead of being created in full before the upload starts"""
+        if stream_context:
+            tar_stream = Docker_Build_Context(path).tar_stream(gzip=gzip)
+            return dict(fileobj=tar_stream, custom_context=True, encoding='gzip' if gzip else None)
+        return dict(path=path, gzip=gzip)
+
+    @catch
+    def build_if_changed(self, path, stream_context=False, gzip=False):
+        """Only builds the image when the existing image doesn't have the build context's content hash in its labels"""
+        context_hash = Docker_Build_Context(path).hash()
+        image_info   = self.info()
+        if (image_info.get('Labels') or {}).get(LABEL__BUILD_CONTEXT_HASH) == context_hash:
+            return {'status': 'ok', 'image': image_info, 'tags': image_info.get('Tags'), 'build_logs': [], 'skipped': True, 'context_hash': context_hash}
+        labels              = {LABEL__BUILD_CONTEXT_HASH: context_hash}
+        build_context       = self.build_context(path, stream_context=stream_context, gzip=gzip)
+        (result,build_logs) = self.client_docker().images.build(tag=self.image_name_with_tag(), labels=labels, **build_context)
+        return {'status': 'ok', 'image': result.attrs, 'tags':result.tags, 'build_logs': build_logs, 'skipped': False, 'context_hash': context_hash}
+
+    def build_stream(self, path, stream_context=False, gzip=False, **kwargs):
+        """Yields structured build events (step start/end, cache hit/miss, layers, errors) as they arrive,
+           the last event is the 'build_summary' (with per-step durations and the cache hit ratio)"""
+        build_log = Docker_Build_Log()
+        try:
+            build_context = self.build_context(path, stream_context=stream_context, gzip=gzip)
+            for message in self.client_api().build(tag=self.image_name_with_tag(), decode=True, **build_context, **kwargs):
+                yield from build_log.parse(message)
+        except Exception as exception:
+            yield from build_log.parse({'error': f'{exception}'})
+        yield from build_log.step_end()
+        yield build_log.event('build_summary', **build_log.summary())
+
     def delete(self):
         if self.exists():
             image = self.image_name_with_tag()
@@ -56,6 +90,7 @@ class Docker_Image:
         return self.info() != {}
 
     def info(self):
+        from docker.errors import APIError                                      # note: docker-py is imported on first use (it is slow to import)
         try:
             image  = self.image_name_with_tag()
             result = self.client_docker().images.get(image)
@@ -79,8 +114,15 @@ class Docker_Image:
         return self.image_name
 
     def pull(self):
-        self.client_docker().images.pull(self.image_name, self.image_tag)
-        return self.exists()
+        """Pulls the image, returns False when the daemon reports an error (the progress stream is read, no extra inspect is made)"""
+        for message in self.pull_stream():
+            if message.get('error'):
+                return False
+        return True
+
+    def pull_stream(self):
+        """Yields the daemon's (decoded) pull progress messages, including the per-layer 'Downloading' ones"""
+        return self.client_api().pull(self.image_name, tag=self.image_tag, stream=True, decode=True)
 
     def image_push(self):
         # note if the there is a ~/.docker/config.json file, any ecr login into client_docker will not be taken into account (at the moment looks like the solution is to delete this file)
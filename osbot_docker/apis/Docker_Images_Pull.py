@@ -0,0 +1,114 @@
+from concurrent.futures                 import ThreadPoolExecutor
+from queue                              import Queue
+from threading                          import Lock
+from time                               import monotonic
+
+from osbot_docker.apis.API_Docker       import DEFAULT__PULL_MAX_WORKERS
+from osbot_docker.apis.Docker_Image     import Docker_Image
+from osbot_docker.apis.Docker_Index     import image_reference
+
+
+
+class Docker_Images_Pull:
+    """Pulls many images concurrently (bounded thread pool), streaming per-layer progress events.
+       Layers shared between the requested images are only reported (and counted) for the first image that has them
+       in flight, the other images get one 'layer_shared' event for it"""
+
+    def __init__(self, api_docker, images, max_workers=DEFAULT__PULL_MAX_WORKERS):
+        self.api_docker  = api_docker
+        self.images      = list(dict.fromkeys(image_reference(image) for image in images))     # de-duplicated, in order
+        self.max_workers = max_workers
+        self.lock        = Lock()
+        self.layers      = {}                   # layer id -> dict(owner, status, current, total, downloaded)
+        self.results     = {}                   # image    -> summary of its pull
+
+    def events(self):
+        """Yields the progress events of all pulls (as they happen), the last one is the 'pulls_summary'"""
+        start  = monotonic()
+        queue  = Queue()
+        if self.images:
+            with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                for image in self.images:
+                    executor.submit(self.pull, image, queue)
+                pending = len(self.images)
+                while pending:
+                    event = queue.get()
+                    if event is None:
+                        pending -= 1
+                        continue
+                    yield event
+        yield self.event('pulls_summary', **self.summary(monotonic() - start))
+
+    def event(self, event_type, **kwargs):
+        return dict(event=event_type, **kwargs)
+
+    def layer_event(self, image, message):
+        """Updates the layer's state and returns the event to report (None for layers owned by another image's pull)"""
+        layer_id = message.get('id')
+        status   = message.get('status', '')
+        detail   = message.get('progressDetail') or {}
+        result   = self.results[image]
+        with self.lock:
+            layer = self.layers.get(layer_id)
+            if layer is None:
+                layer = self.layers[layer_id] = dict(owner=image, status=status, current=0, total=None, downloaded=False)
+            if layer['owner'] != image and status != 'Already exists' and not layer['downloaded']:     # the layer is downloaded by this image's pull
+                self.layer_owner_change(layer_id, layer, image)
+            if layer['owner'] != image:
+                if layer_id in result['shared_layers']:
+                    return None
+                result['shared_layers'].append(layer_id)
+                return self.event('layer_shared', image=image, layer=layer_id, owner=layer['owner'])
+            if status != 'Already exists':
+                layer['downloaded'] = True
+            if layer_id not in result['layers']:
+                result['layers'].append(layer_id)
+            layer['status'] = status
+            if detail.get('total'):
+                layer['total'] = detail['total']
+            if status == 'Downloading' and detail.get('current'):
+                layer['current'] = max(layer['current'], detail['current'])
+            if status == 'Download complete' and layer['total']:
+                layer['current'] = layer['total']
+            return self.event('layer', image=image, layer=layer_id, status=status, current=layer['current'], total=layer['total'])
+
+    def layer_owner_change(self, layer_id, layer, image):
+        previous = self.results[layer['owner']]
+        if layer_id in previous['layers']:
+            previous['layers'].remove(layer_id)
+            previous['shared_layers'].append(layer_id)
+        self.results[image]['shared_layers'] = [item for item in self.results[image]['shared_layers'] if item != layer_id]
+        layer['owner'] = image
+
+    def pull(self, image, queue):
+        start               = monotonic()
+        name, tag           = image.rsplit(':', 1) if '@' not in image else (image, None)
+        self.results[image] = dict(status='ok', error=None, duration=None, bytes=0, layers=[], shared_layers=[])
+        result              = self.results[image]
+        queue.put(self.event('pull_start', image=image))
+        try:
+            for message in Docker_Image(name, tag, api_docker=self.api_docker).pull_stream():
+                if message.get('error'):
+                    result.update(status='error', error=message.get('error'))
+                elif message.get('id') and message.get('progressDetail') is not None:
+                    event = self.layer_event(image, message)
+                    if event:
+                        queue.put(event)
+        except Exception as error:
+            result.update(status='error', error=f'{error}')
+        finally:
+            with self.lock:
+                result['bytes'] = sum(self.layers[layer_id]['current'] for layer_id in result['layers'] if self.layers[layer_id]['owner'] == image)
+            result['duration'] = round(monotonic() - start, 3)
+            queue.put(self.event('pull_end', image=image, **{key: result[key] for key in ('status', 'error', 'duration', 'bytes')}))
+            queue.put(None)
+
+    def summary(self, duration):
+        with self.lock:
+            downloaded = sum(layer['current'] for layer in self.layers.values())
+            layers     = len(self.layers)
+        return dict(status   = 'ok' if all(result['status'] == 'ok' for result in self.results.values()) else 'error',
+                    bytes    = downloaded                   ,
+                    duration = round(duration, 3)           ,
+                    layers   = layers                       ,                       # unique layers across all images
+                    images   = dict(self.results)           )
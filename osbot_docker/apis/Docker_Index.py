@@ -0,0 +1,210 @@
+from collections                        import defaultdict
+from threading                          import RLock
+
+from docker.errors                      import NotFound
+
+from osbot_docker.apis.Docker_Container import Docker_Container
+from osbot_docker.apis.Docker_Events    import Docker_Events
+
+
+def image_reference(image):
+    """Normalises an image reference so that 'hello-world' and 'hello-world:latest' map to the same key"""
+    if not image or '@' in image or image.startswith('sha256:'):
+        return image
+    if ':' in image.split('/')[-1]:
+        return image
+    return f'{image}:latest'
+
+
+class Docker_Index:
+    """In-memory index of the daemon's containers and images, kept up to date by the events stream.
+       The updates (events and reloads) read the daemon's state and apply it while holding update_lock, so that an
+       event can't be applied between a reload's listing and its apply (and then be overwritten by the stale listing).
+       The events received during a reload wait for it, and then refresh from the daemon's (current) state"""
+
+    def __init__(self, api_docker):
+        self.api_docker          = api_docker
+        self.docker_events       = Docker_Events(api_docker, filters={'type': ['container', 'image']})
+        self.lock                = RLock()                              # guards the index data (the readers only wait for the in-memory updates)
+        self.update_lock         = RLock()                              # serialises the updates (which include the daemon calls)
+        self.containers          = {}                                   # container id -> raw container summary (from /containers/json)
+        self.containers_by_image = defaultdict(set)                     # image reference -> container ids
+        self.containers_by_label = defaultdict(lambda: defaultdict(set))# label key -> label value -> container ids
+        self.containers_by_name  = {}                                   # container name -> container id
+        self.images              = {}                                   # image id -> raw image data
+        self.images_by_tag       = {}                                   # 'name:tag' -> image id
+        self.wrappers            = {}                                   # container id -> Docker_Container (created on demand)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def client_api(self):
+        return self.api_docker.client_api()
+
+    def container(self, container_id):
+        with self.lock:
+            wrapper = self.wrappers.get(container_id)
+            if wrapper is None:
+                wrapper = Docker_Container(container_id=container_id, api_docker=self.api_docker)
+                self.wrappers[container_id] = wrapper
+            return wrapper
+
+    def container_by_name(self, name):
+        with self.lock:
+            container_id = self.containers_by_name.get(name.lstrip('/'))
+            if container_id:
+                return self.container(container_id)
+
+    def container_refresh(self, container_id):
+        with self.update_lock:
+            containers = self.client_api().containers(all=True, filters={'id': container_id})
+            if containers:
+                self.container_set(containers[0])
+            else:
+                self.container_remove(container_id)
+
+    def container_remove(self, container_id):
+        with self.lock:
+            container_raw = self.containers.pop(container_id, None)
+            if container_raw is None:
+                return
+            image = image_reference(container_raw.get('Image'))
+            self.containers_by_image[image].discard(container_id)
+            if not self.containers_by_image[image]:
+                del self.containers_by_image[image]
+            for label_key, label_value in (container_raw.get('Labels') or {}).items():
+                label_values = self.containers_by_label[label_key]
+                label_values[label_value].discard(container_id)
+                if not label_values[label_value]:
+                    del label_values[label_value]
+                if not label_values:
+                    del self.containers_by_label[label_key]
+            for name in container_raw.get('Names') or []:
+                self.containers_by_name.pop(name.lstrip('/'), None)
+            wrapper = self.wrappers.pop(container_id, None)
+            if wrapper:
+                wrapper.snapshot_clear()
+
+    def container_set(self, container_raw):
+        container_id = container_raw.get('Id')
+        with self.lock:
+            wrapper = self.wrappers.get(container_id)
+            self.container_remove(container_id)
+            self.containers[container_id] = container_raw
+            self.containers_by_image[image_reference(container_raw.get('Image'))].add(container_id)
+            for label_key, label_value in (container_raw.get('Labels') or {}).items():
+                self.containers_by_label[label_key][label_value].add(container_id)
+            for name in container_raw.get('Names') or []:
+                self.containers_by_name[name.lstrip('/')] = container_id
+            if wrapper:
+                self.wrappers[container_id] = wrapper                   # keep the same wrapper (with its snapshot now cleared)
+
+    def containers_by_id(self):
+        with self.lock:
+            return {container_id[:12]: self.container(container_id) for container_id in self.containers}
+
+    def containers_by_labels(self):
+        containers_by_labels = defaultdict(lambda: defaultdict(dict))
+        with self.lock:
+            for label_key, label_values in self.containers_by_label.items():
+                for label_value, container_ids in label_values.items():
+                    for container_id in container_ids:
+                        containers_by_labels[label_key][label_value][container_id[:12]] = self.container(container_id)
+        return containers_by_labels
+
+    def containers_with_image(self, image, exact=True):
+        """Containers of the image reference (or, when exact is False, of the image references that contain image)"""
+        with self.lock:
+            if exact:
+                container_ids = self.containers_by_image.get(image_reference(image), ())
+            else:
+                container_ids = [container_id for reference, container_ids in self.containers_by_image.items() if image in reference
+                                              for container_id in container_ids]
+            return [self.container(container_id) for container_id in container_ids]
+
+    def containers_with_label(self, label_key, label_value):
+        with self.lock:
+            container_ids = self.containers_by_label.get(label_key, {}).get(label_value, ())
+            return [self.container(container_id) for container_id in container_ids]
+
+    def image_by_tag(self, tag):
+        with self.lock:
+            return self.images.get(self.images_by_tag.get(image_reference(tag)))
+
+    def image_refresh(self, image_id):
+        with self.update_lock:
+            try:
+                self.image_set(self.client_api().inspect_image(image_id))
+            except NotFound:
+                self.image_remove(image_id)
+
+    def image_remove(self, image_id):
+        with self.lock:
+            image_raw = self.images.pop(image_id, None)
+            if image_raw:
+                for tag in image_raw.get('RepoTags') or []:
+                    self.images_by_tag.pop(tag, None)
+
+    def image_set(self, image_raw):
+        image_id = image_raw.get('Id')
+        with self.lock:
+            self.image_remove(image_id)
+            self.images[image_id] = image_raw
+            for tag in image_raw.get('RepoTags') or []:
+                previous_image = self.images.get(self.images_by_tag.get(tag))
+                if previous_image:                                      # the tag moved from another image to this one
+                    previous_image['RepoTags'] = [repo_tag for repo_tag in previous_image.get('RepoTags') or [] if repo_tag != tag]
+                self.images_by_tag[tag] = image_id
+
+    def on_event(self, event):
+        event_type = event.get('Type'  )
+        action     = event.get('Action') or ''
+        actor_id   = (event.get('Actor') or {}).get('ID') or event.get('id')
+        if not actor_id:
+            return
+        with self.update_lock:                                          # waits for a reload in progress (see reload)
+            if event_type == 'container':
+                if action == 'destroy':
+                    self.container_remove(actor_id)
+                elif not action.startswith('exec_'):                    # exec events don't change the container's summary
+                    self.container_refresh(actor_id)
+            elif event_type == 'image':
+                if action == 'delete':
+                    self.image_remove(actor_id)
+                else:
+                    self.image_refresh(actor_id)
+
+    def reload(self):
+        """Replaces the index with the daemon's listings, the events are only applied after it (see update_lock)"""
+        with self.update_lock:
+            containers = self.client_api().containers(all=True)
+            images     = self.client_api().images()
+            with self.lock:
+                for container_id in list(self.containers):
+                    self.container_remove(container_id)
+                for image_id in list(self.images):
+                    self.image_remove(image_id)
+                for container_raw in containers:
+                    self.container_set(container_raw)
+                for image_raw in images:
+                    self.image_set(image_raw)
+        return self
+
+    def start(self):
+        self.docker_events.subscribe(self.on_event)
+        self.docker_events.start()                                      # subscribe before loading, so that no change is missed
+        return self.reload()
+
+    def stop(self):
+        self.docker_events.unsubscribe(self.on_event)
+        self.docker_events.stop()
+        return self
+
+    def stats(self):
+        with self.lock:
+            return dict(containers      = len(self.containers)               ,
+                        events_received = self.docker_events.events_received ,
+                        images          = len(self.images)                   )
@@ -0,0 +1,255 @@
+import json
+import os
+import re
+import sys
+from collections                        import defaultdict, deque
+from threading                          import Lock
+from time                               import time_ns
+from urllib.parse                       import urlparse, unquote
+
+DEFAULT__TRACE_MAX_CALLS = 10000                            # most recent calls kept for the trace export
+REGEX__API_VERSION       = re.compile(r'^/v[\d.]+(?=/)')
+REGEX__ENDPOINT_IDS      = [ (re.compile(r'^/(containers|exec|networks|volumes|plugins)/(?!json$|create$|prune$)[^/]+'), r'/\1/{id}'  ),
+                             (re.compile(r'^/images/(?!json$|create$|prune$|search$|load$|get$)(.+?)(/json|/tag|/push|/history)?$'), r'/images/{name}\2')]
+INSTRUMENTATION__MODULES = ('osbot_docker.apis.', 'osbot_docker.helpers.')     # modules of the methods reported as the calls' caller and call_site
+
+
+class Docker_Instrumentation:
+    """Records every Engine API call made through the (requests) sessions of docker-py's clients: method, endpoint,
+       status, latency, bytes and the osbot_docker method that made it. Keeps aggregate counters, an optional
+       trace (exported as JSON lines or as OpenTelemetry OTLP/JSON spans) and supports 'calls made in this block'
+       reports (see block).
+       The sessions are shared by every API_Docker of the process (see Docker_Clients), so when owner is set only
+       the calls made on its behalf are recorded (see owns_call)"""
+
+    def __init__(self, trace=False, capture_caller=True, trace_max_calls=DEFAULT__TRACE_MAX_CALLS, owner=None):
+        self.capture_caller = capture_caller
+        self.owner          = owner
+        self.trace          = deque(maxlen=trace_max_calls) if trace else None
+        self.lock           = Lock()
+        self.listeners      = []
+        self.sessions       = []
+        self.reset()
+
+    def block(self):
+        """Context manager that collects the calls recorded (from any thread) while it is open"""
+        return Docker_Instrumentation__Block(self)
+
+    def callers_in_stack(self):
+        """(caller, call_site): the outermost and innermost osbot_docker methods in the current stack, for example
+           ('Docker_Container.status', 'Docker_Container.info_raw')"""
+        caller = call_site = None
+        frame  = sys._getframe(2)
+        while frame is not None:
+            module = frame.f_globals.get('__name__', '')
+            if module.startswith(INSTRUMENTATION__MODULES) and module != __name__:
+                instance = frame.f_locals.get('self')
+                function = frame.f_code.co_name
+                caller   = f'{type(instance).__name__}.{function}' if instance is not None else f'{module}.{function}'
+                if call_site is None:
+                    call_site = caller
+            frame = frame.f_back
+        return caller, call_site
+
+    def endpoint(self, path):
+        """Path without the API version and with the ids/names replaced, e.g. /v1.43/containers/abc/json -> /containers/{id}/json"""
+        path = REGEX__API_VERSION.sub('', path)
+        for regex, replacement in REGEX__ENDPOINT_IDS:
+            path = regex.sub(replacement, path)
+        return path
+
+    def install(self, session):
+        """Wraps session.send (a requests.Session, i.e. docker-py's APIClient) so that all its calls are recorded.
+           Since the clients are shared (see Docker_Clients), a session can be wrapped by several instrumentations"""
+        if any(installed is session for installed, _, _ in self.sessions):
+            return self
+        previous = session.__dict__.get('send')                                         # None when it is the class' send
+        send     = session.send
+        def instrumented_send(request, **kwargs):
+            if all(installed is not session for installed, _, _ in self.sessions):      # uninstalled (but still wrapped by a later instrumentation)
+                return send(request, **kwargs)
+            if self.owner is not None and self.owns_call() is False:                     # made by another API_Docker (which shares the session)
+                return send(request, **kwargs)
+            return self.send(send, request, **kwargs)
+        session.send = instrumented_send
+        self.sessions.append((session, previous, instrumented_send))
+        return self
+
+    def on_call(self, call):
+        with self.lock:
+            key                    = (call['method'], call['endpoint'])
+            stats                  = self.stats[key]
+            stats['count'         ] += 1
+            stats['duration_ms'   ] += call['duration_ms']
+            stats['bytes_sent'    ] += call['bytes_sent'    ] or 0
+            stats['bytes_received'] += call['bytes_received'] or 0
+            stats['errors'        ] += 1 if call['error'] or (call['status'] or 0) >= 400 else 0
+            if call['caller']:
+                self.callers[call['caller']] += 1
+            if self.trace is not None:
+                self.trace.append(call)
+            listeners = list(self.listeners)
+        for listener in listeners:
+            listener(call)
+
+    def owns_call(self):
+        """True when a method of owner, or of an object that uses owner (i.e. whose api_docker it is, like Docker_Container
+           and Docker_Image), is in the current stack. Calls from worker threads are covered as long as the thread
+           runs a method of one of those objects"""
+        frame = sys._getframe(1)
+        while frame is not None:
+            instance = frame.f_locals.get('self')
+            if instance is not None:
+                if instance is self.owner or getattr(instance, '__dict__', {}).get('api_docker') is self.owner:
+                    return True
+            frame = frame.f_back
+        return False
+
+    def reset(self):
+        self.stats   = defaultdict(lambda: dict(count=0, duration_ms=0.0, bytes_sent=0, bytes_received=0, errors=0))
+        self.callers = defaultdict(int)
+        if self.trace is not None:
+            self.trace.clear()
+        return self
+
+    def send(self, send, request, **kwargs):
+        url               = urlparse(request.url)
+        path              = unquote(url.path)
+        caller, call_site = self.callers_in_stack() if self.capture_caller else (None, None)
+        body              = request.body
+        call              = dict(method         = request.method                                                  ,
+                                 endpoint       = self.endpoint(path)                                             ,
+                                 path           = path                                                            ,
+                                 query          = url.query                                                       ,
+                                 caller         = caller                                                          ,   # high-level method (the outermost osbot_docker one)
+                                 call_site      = call_site                                                       ,   # method that used the docker-py client
+                                 stream         = kwargs.get('stream', False)                                     ,
+                                 bytes_sent     = len(body) if isinstance(body, (bytes, str)) else None          ,   # None for streamed (generator) bodies
+                                 bytes_received = None                                                            ,
+                                 status         = None                                                            ,
+                                 error          = None                                                            ,
+                                 start_ns       = time_ns()                                                       )
+        try:
+            response = send(request, **kwargs)
+            call['status'] = response.status_code
+            if call['stream']:                                                              # only the time to the response headers
+                content_length         = response.headers.get('Content-Length')
+                call['bytes_received'] = int(content_length) if content_length else None
+            else:
+                call['bytes_received'] = len(response.content)
+            return response
+        except Exception as error:
+            call['error'] = f'{type(error).__name__}: {error}'
+            raise
+        finally:
+            call['end_ns'     ] = time_ns()
+            call['duration_ms'] = (call['end_ns'] - call['start_ns']) / 10**6
+            self.on_call(call)
+
+    def summary(self):
+        with self.lock:
+            endpoints = {f'{method} {endpoint}': dict(stats) for (method, endpoint), stats in sorted(self.stats.items())}
+            callers   = dict(sorted(self.callers.items(), key=lambda item: -item[1]))
+        return dict(calls     = sum(stats['count'] for stats in endpoints.values()),
+                    endpoints = endpoints                                           ,
+                    callers   = callers                                             )
+
+    def uninstall(self):
+        for session, previous, instrumented_send in self.sessions:
+            if session.__dict__.get('send') is instrumented_send:                          # not wrapped since (otherwise it becomes a pass-through)
+                if previous is None:
+                    session.__dict__.pop('send', None)                                     # back to the class' send
+                else:
+                    session.send = previous
+        self.sessions = []
+        return self
+
+    # trace export
+
+    def export_jsonl(self, path):
+        with open(path, 'w') as file:
+            for call in list(self.trace or []):
+                file.write(json.dumps(call) + '\n')
+        return path
+
+    def export_otlp(self, path=None, service_name='osbot_docker'):
+        """The trace as OTLP/JSON (the OpenTelemetry collector's file/http format), one CLIENT span per API call"""
+        trace_id = os.urandom(16).hex()
+        spans    = [self.span(call, trace_id) for call in list(self.trace or [])]
+        otlp     = {'resourceSpans': [{'resource'  : {'attributes': [self.span_attribute('service.name', service_name)]},
+                                       'scopeSpans': [{'scope': {'name': 'osbot_docker.Docker_Instrumentation'}, 'spans': spans}]}]}
+        if path:
+            with open(path, 'w') as file:
+                json.dump(otlp, file)
+        return otlp
+
+    def span(self, call, trace_id):
+        attributes = [ self.span_attribute('http.request.method'      , call['method']        ),
+                       self.span_attribute('url.path'                 , call['path']          ),
+                       self.span_attribute('http.route'               , call['endpoint']      ),
+                       self.span_attribute('code.function'            , call['call_site']     ),
+                       self.span_attribute('osbot_docker.caller'      , call['caller']        ),
+                       self.span_attribute('http.response.status_code', call['status']        ),
+                       self.span_attribute('http.request.body.size'   , call['bytes_sent']    ),
+                       self.span_attribute('http.response.body.size'  , call['bytes_received'])]
+        failed     = call['error'] is not None or (call['status'] or 0) >= 400
+        return { 'traceId'           : trace_id                                                  ,
+                 'spanId'            : os.urandom(8).hex()                                       ,
+                 'name'              : f"{call['method']} {call['endpoint']}"                    ,
+                 'kind'              : 3                                                         ,     # SPAN_KIND_CLIENT
+                 'startTimeUnixNano' : str(call['start_ns'])                                     ,
+                 'endTimeUnixNano'   : str(call['end_ns'])                                       ,
+                 'attributes'        : [attribute for attribute in attributes if attribute]      ,
+                 'status'            : {'code': 2, 'message': call['error'] or ''} if failed else {'code': 1}}
+
+    def span_attribute(self, key, value):
+        if value is None:
+            return None
+        if type(value) is int:
+            return {'key': key, 'value': {'intValue': str(value)}}
+        return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class Docker_Instrumentation__Block:
+    """The API calls made while the block is open: with api_docker.api_calls() as calls: ... ; calls.count, calls.report()"""
+
+    def __init__(self, instrumentation):
+        self.instrumentation = instrumentation
+        self.calls           = []
+        self.lock            = Lock()
+
+    def __enter__(self):
+        self.instrumentation.listeners.append(self.on_call)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.instrumentation.listeners.remove(self.on_call)
+
+    @property
+    def count(self):
+        return len(self.calls)
+
+    def by_caller(self):
+        return self.group_by('caller')
+
+    def by_endpoint(self):
+        return self.group_by('method', 'endpoint')
+
+    def group_by(self, *keys):
+        counts = defaultdict(int)
+        for call in list(self.calls):
+            counts[' '.join(str(call[key]) for key in keys)] += 1
+        return dict(sorted(counts.items(), key=lambda item: -item[1]))
+
+    def on_call(self, call):
+        with self.lock:
+            self.calls.append(call)
+
+    def report(self):
+        calls = list(self.calls)
+        return dict(calls          = len(calls)                                                 ,
+                    duration_ms    = round(sum(call['duration_ms'] for call in calls), 3)       ,
+                    bytes_sent     = sum(call['bytes_sent'    ] or 0 for call in calls)         ,
+                    bytes_received = sum(call['bytes_received'] or 0 for call in calls)         ,
+                    endpoints      = self.by_endpoint()                                         ,
+                    callers        = self.by_caller()                                           )
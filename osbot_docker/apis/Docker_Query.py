@@ -0,0 +1,91 @@
+import re
+
+from osbot_docker.apis.Docker_Index import image_reference
+
+QUERY__TARGETS = ('containers', 'images')                   # the listings (/containers/json and /images/json) a query can filter
+
+
+class Docker_Query:
+    """Compiles query predicates into the daemon's filters (so that the daemon only returns the matches) plus the
+       post filters (applied to the listing records) for the predicates that the daemon can't express:
+         labels   : {key: None}  -> key exists              (daemon)
+                    {key: 'v'}   -> key == 'v'              (daemon)
+                    {key: [...]} -> key in [...]            (post filter, the daemon ANDs the label filters)
+                    {key: func}  -> func(value) is True     (post filter)
+         image    : exact image reference                   (containers: daemon 'ancestor' + post filter, ancestor also matches child images)
+                                                            (images    : daemon 'reference', which /images/json uses instead of 'image')
+         name     : exact container name                    (daemon 'name' is a regex, compiled to ^/name$)
+         dangling : True/False                              (daemon)
+         any other daemon filter (status, health, id, network, ancestor, reference, ...) is passed as is (lists are ORed)"""
+
+    def __init__(self, labels=None, image=None, name=None, target='containers', **filters):
+        if target not in QUERY__TARGETS:
+            raise ValueError(f'target has to be one of {QUERY__TARGETS}, not {target!r}')
+        self.target       = target
+        self.filters      = {}
+        self.post_filters = []
+        self.add_labels(labels)
+        self.add_image (image )
+        self.add_name  (name  )
+        for key, value in filters.items():
+            self.add_filter(key, value)
+
+    def __call__(self, records):
+        return self.apply(records)
+
+    def add_filter(self, key, value):
+        if value is None:
+            return self
+        if type(value) is bool:
+            values = [str(value).lower()]
+        elif type(value) in (list, tuple, set):
+            values = [str(item) for item in value]
+        else:
+            values = [str(value)]
+        self.filters.setdefault(key, []).extend(values)
+        return self
+
+    def add_image(self, image):
+        if image:
+            reference = image_reference(image)
+            if self.target == 'images':
+                return self.add_filter('reference', reference)                 # (exact, so no post filter is needed)
+            self.add_filter('ancestor', image)
+            self.post_filters.append(lambda record: image_reference(record.image) == reference)
+        return self
+
+    def add_labels(self, labels):
+        for key, value in (labels or {}).items():
+            if value is None:
+                self.add_filter('label', key)
+            elif callable(value):
+                self.add_filter('label', key)
+                self.post_filters.append(lambda record, key=key, value=value: value(record.labels.get(key)) is True)
+            elif type(value) in (list, tuple, set):
+                values = {str(item) for item in value}
+                self.add_filter('label', key)
+                self.post_filters.append(lambda record, key=key, values=values: record.labels.get(key) in values)
+            else:
+                self.add_filter('label', f'{key}={value}')
+        return self
+
+    def add_name(self, name):
+        if name:
+            self.add_filter('name', f'^/{re.escape(name)}$')
+        return self
+
+    def apply(self, records, limit=None):
+        """Yields the records that match the post filters (stops after limit matches)"""
+        matches = 0
+        for record in records:
+            if limit is not None and matches >= limit:
+                return
+            if all(post_filter(record) for post_filter in self.post_filters):
+                matches += 1
+                yield record
+
+    def daemon_limit(self, limit):
+        """Limit that can be pushed to the daemon (only when there are no post filters, otherwise matches could be cut)"""
+        if limit is None or self.post_filters:
+            return None
+        return limit
@@ -0,0 +1,107 @@
+from datetime import datetime, timezone
+
+
+def created_to_str(created):
+    return datetime.fromtimestamp(created or 0, timezone.utc).strftime('%Y-%m-%d %H:%M')
+
+
+class Docker_Container_Record:
+    """Compact record of a container listing entry (/containers/json), with only the summary fields.
+       The rest of the raw summary is not kept, the fields are parsed on access and the Docker_Container wrapper is
+       only created when needed (see container)"""
+
+    __slots__ = ('api_docker', 'id', 'image', 'labels', 'state', 'created_raw', 'names_raw', 'ports_raw')
+
+    def __init__(self, container_raw, api_docker=None):
+        self.api_docker  = api_docker
+        self.id          = container_raw.get('Id'     )
+        self.image       = container_raw.get('Image'  )
+        self.labels      = container_raw.get('Labels' ) or {}
+        self.state       = container_raw.get('State'  )
+        self.created_raw = container_raw.get('Created')
+        self.names_raw   = container_raw.get('Names'  )
+        self.ports_raw   = container_raw.get('Ports'  )
+
+    def __repr__(self):
+        return f"{self.name()} {self.short_id()} {self.image} {self.state}"
+
+    def container(self):
+        from osbot_docker.apis.Docker_Container import Docker_Container      # note: we have to import here due to circular dependency
+        return Docker_Container(container_id=self.id, api_docker=self.api_docker)
+
+    def created(self):
+        return created_to_str(self.created_raw)
+
+    def name(self):
+        names = self.names()
+        return names[0] if names else None
+
+    def names(self):
+        return [name.lstrip('/') for name in self.names_raw or []]
+
+    def ports(self):
+        """Port mappings in the same format as Docker_Container.info()['ports'], i.e. {'8080/tcp': [{'HostIp':.., 'HostPort':..}]}"""
+        ports = {}
+        for port in self.ports_raw or []:
+            mappings = ports.setdefault(f"{port.get('PrivatePort')}/{port.get('Type')}", [])
+            if port.get('PublicPort'):
+                mappings.append({'HostIp': port.get('IP', ''), 'HostPort': str(port.get('PublicPort'))})
+        return {key: mappings or None for key, mappings in ports.items()}
+
+    def short_id(self):
+        return self.id[:12]
+
+    def to_dict(self):
+        return dict(created  = self.created()  ,
+                    id       = self.id         ,
+                    image    = self.image      ,
+                    labels   = self.labels     ,
+                    names    = self.names()    ,
+                    ports    = self.ports()    ,
+                    state    = self.state      )
+
+
+class Docker_Image_Record:
+    """Compact record of an image listing entry (/images/json), the Docker_Image wrappers are only created when needed"""
+
+    __slots__ = ('api_docker', 'id', 'labels', 'size', 'created_raw', 'repo_tags')
+
+    def __init__(self, image_raw, api_docker=None):
+        self.api_docker  = api_docker
+        self.id          = image_raw.get('Id'      )
+        self.labels      = image_raw.get('Labels'  ) or {}
+        self.size        = image_raw.get('Size'    )
+        self.created_raw = image_raw.get('Created' )
+        self.repo_tags   = image_raw.get('RepoTags')
+
+    def __repr__(self):
+        return f"{self.tags()} {self.short_id()}"
+
+    def created(self):
+        return created_to_str(self.created_raw)
+
+    def image(self, tag=None):
+        """Docker_Image for tag (default: the first tag), images without tags are wrapped by id"""
+        from osbot_docker.apis.Docker_Image import Docker_Image              # note: we have to import here due to circular dependency
+        tags = self.tags()
+        tag  = tag or (tags[0] if tags else None)
+        if tag is None:
+            return Docker_Image(image_name=self.id, image_tag=None, image_id=self.short_id(), api_docker=self.api_docker)
+        image_name, image_tag = tag.rsplit(':', 1)
+        return Docker_Image(image_name=image_name, image_tag=image_tag, image_id=self.short_id(), api_docker=self.api_docker)
+
+    def images(self):
+        return [self.image(tag) for tag in self.tags()]
+
+    def short_id(self):
+        return self.id.split(':')[-1][:12]
+
+    def tags(self):
+        return [tag for tag in self.repo_tags or [] if tag != '<none>:<none>']
+
+    def to_dict(self):
+        return dict(created = self.created() ,
+                    id      = self.id        ,
+                    labels  = self.labels    ,
+                    size    = self.size      ,
+                    tags    = self.tags()    )
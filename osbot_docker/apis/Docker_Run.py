@@ -0,0 +1,180 @@
+import os
+from codecs                             import getincrementaldecoder
+from threading                          import Timer
+from time                               import monotonic
+
+from docker.errors                      import APIError, ImageNotFound
+
+DOCKER_RUN__FLAGS_BOOL   = { '--rm'         : None          ,           # the container is always removed
+                             '-i'           : None          ,           # no stdin
+                             '--interactive': None          ,
+                             '-t'           : 'tty'         ,
+                             '--tty'        : 'tty'         ,
+                             '--init'       : 'init'        ,
+                             '--privileged' : 'privileged'  }
+DOCKER_RUN__FLAGS_VALUE  = { '-e'           : 'environment' ,
+                             '--env'        : 'environment' ,
+                             '--entrypoint' : 'entrypoint'  ,
+                             '-l'           : 'labels'      ,
+                             '--label'      : 'labels'      ,
+                             '-m'           : 'mem_limit'   ,
+                             '--memory'     : 'mem_limit'   ,
+                             '--cpus'       : 'nano_cpus'   ,
+                             '--name'       : 'name'        ,
+                             '--net'        : 'network_mode',
+                             '--network'    : 'network_mode',
+                             '-p'           : 'ports'       ,
+                             '--publish'    : 'ports'       ,
+                             '--platform'   : 'platform'    ,
+                             '-u'           : 'user'        ,
+                             '--user'       : 'user'        ,
+                             '-v'           : 'binds'       ,
+                             '--volume'     : 'binds'       ,
+                             '-w'           : 'working_dir' ,
+                             '--workdir'    : 'working_dir' }
+DOCKER_RUN__HOST_CONFIG  = ('binds', 'init', 'mem_limit', 'nano_cpus', 'network_mode', 'port_bindings', 'privileged')
+
+
+class Docker_Run:
+    """Engine API version of 'docker run --rm': creates the container, attaches to its output, starts it, streams
+       its stdout/stderr, waits for its exit code and removes it, without spawning the docker CLI.
+       Takes the same arguments as the CLI (the ones built by API_Docker.docker_run) for the options in
+       DOCKER_RUN__FLAGS_BOOL and DOCKER_RUN__FLAGS_VALUE. The timeout is enforced by this client: a timer kills the
+       container via the Engine API (the CLI's timeout only kills the client process, leaving the container running).
+       Note: the daemon has no run time limit, so if this process dies before the timer fires the container keeps running"""
+
+    def __init__(self, api_docker, timeout=None):
+        self.api_docker = api_docker
+        self.timeout    = timeout
+        self.timed_out  = False
+
+    def client_api(self):
+        return self.api_docker.client_api()
+
+    def config(self, args):
+        """create_container kwargs (with host_config) from docker run's arguments (after 'run'), raises ValueError for unsupported options"""
+        options, image, command = self.split(args)
+        config = dict(environment=[], labels={}, binds=[], ports=[], port_bindings={})
+        for flag, value in options:
+            if flag in DOCKER_RUN__FLAGS_BOOL:
+                if DOCKER_RUN__FLAGS_BOOL[flag]:
+                    config[DOCKER_RUN__FLAGS_BOOL[flag]] = True
+            else:
+                self.config_option(config, DOCKER_RUN__FLAGS_VALUE[flag], value)
+        host_config           = {key: config.pop(key) for key in DOCKER_RUN__HOST_CONFIG if key in config}
+        config['image'      ] = image
+        config['command'    ] = command or None
+        config['host_config'] = self.client_api().create_host_config(**{key: value for key, value in host_config.items() if value})
+        config['ports'      ] = config['ports'] or None
+        return config
+
+    def config_option(self, config, name, value):
+        if name == 'environment':
+            config['environment'].append(value)
+        elif name == 'labels':
+            key, _, label_value = value.partition('=')
+            config['labels'][key] = label_value
+        elif name == 'binds':
+            config['binds'].append(value)
+        elif name == 'ports':                                           # [[ip:]host_port:]container_port[/protocol]
+            *host, container_port = value.split(':')
+            port, _, protocol     = container_port.partition('/')
+            port_key              = f'{port}/{protocol}' if protocol else int(port)
+            host_port             = int(host[-1]) if host and host[-1] else None
+            config['ports'        ].append((int(port), protocol) if protocol else int(port))
+            config['port_bindings'][port_key] = (host[0], host_port) if len(host) == 2 else host_port
+        elif name == 'entrypoint':
+            config['entrypoint'] = [value]                              # like the CLI, the value is the executable (not split)
+        elif name == 'nano_cpus':
+            config['nano_cpus'] = int(float(value) * 10**9)
+        else:
+            config[name] = value
+
+    def container_create(self, config):
+        """Creates the container (pulling its image first when it is not available locally, like the CLI)"""
+        try:
+            return self.client_api().create_container(**config)['Id']
+        except ImageNotFound:
+            image     = config['image']
+            name, tag = image.rsplit(':', 1) if '@' not in image and ':' in image.split('/')[-1] else (image, None if '@' in image else 'latest')
+            for _ in self.client_api().pull(name, tag=tag, stream=True, decode=True):
+                pass
+            return self.client_api().create_container(**config)['Id']
+
+    def kill(self, container_id):
+        self.timed_out = True
+        try:
+            self.client_api().kill(container_id)
+        except APIError:                                                # the container exited in the meantime
+            pass
+
+    def run(self, args):
+        """Same result as exec_process('docker', ['run', ...]) plus the exit_code"""
+        result = dict(cwd='.', error=None, exit_code=None, kwargs=dict(timeout=self.timeout), runParams=['docker', 'run', *args],
+                      status='ok', stdout='', stderr='')
+        start  = monotonic()
+        try:
+            for stream, data in self.stream(args):
+                if stream in ('stdout', 'stderr'):
+                    result[stream] += data
+                elif stream == 'exit_code':
+                    result['exit_code'] = data
+        except Exception as error:
+            result.update(status='error', error=error)
+        if self.timed_out:
+            result.update(status='error', error=TimeoutError(f'docker run timed out after {self.timeout} seconds'))
+        result['duration'] = round(monotonic() - start, 3)
+        return result
+
+    def split(self, args):
+        """(options, image, command) of docker run's arguments, options is a list of (flag, value) tuples (value is None for the boolean flags)"""
+        options = []
+        index   = 0
+        while index < len(args) and args[index].startswith('-'):
+            flag, separator, value = args[index].partition('=')
+            if flag in DOCKER_RUN__FLAGS_BOOL:
+                options.append((flag, None))
+                index += 1
+                continue
+            if flag not in DOCKER_RUN__FLAGS_VALUE:
+                raise ValueError(f'docker run option not supported by the api engine: {flag}')
+            if not separator:                                           # (--entrypoint= is an explicit empty value)
+                if index + 1 >= len(args):
+                    raise ValueError(f'docker run option without value: {flag}')
+                index += 1
+                value  = args[index]
+            index += 1
+            if DOCKER_RUN__FLAGS_VALUE[flag] == 'environment' and '=' not in value:     # -e KEY passes the host's KEY (like the CLI)
+                if value not in os.environ:
+                    continue                                            # not set on the host, so not set in the container
+                value = f'{value}={os.environ[value]}'
+            options.append((flag, value))
+        if index >= len(args):
+            raise ValueError('docker run needs an image')
+        return options, args[index], list(args[index + 1:])
+
+    def stream(self, args):
+        """Yields ('stdout'|'stderr', text) chunks as the container writes them, the last item is ('exit_code', exit_code)"""
+        config       = self.config(args)
+        container_id = self.container_create(config)
+        timer        = None
+        decoders     = dict(stdout=getincrementaldecoder('utf-8')(errors='replace'),
+                            stderr=getincrementaldecoder('utf-8')(errors='replace'))
+        try:
+            output = self.client_api().attach(container_id, stream=True, logs=True, demux=True)      # before start, so that no output is missed
+            self.client_api().start(container_id)
+            if self.timeout:
+                timer        = Timer(self.timeout, self.kill, [container_id])
+                timer.daemon = True
+                timer.start()
+            for stdout, stderr in output:
+                for stream, data in (('stdout', stdout), ('stderr', stderr)):
+                    if data:
+                        text = decoders[stream].decode(data)
+                        if text:
+                            yield stream, text
+            yield 'exit_code', self.client_api().wait(container_id).get('StatusCode')
+        finally:
+            if timer:
+                timer.cancel()
+            self.client_api().remove_container(container_id, force=True)
@@ -0,0 +1,153 @@
+import hashlib
+import json
+import os
+import tempfile
+from threading                          import Lock
+from time                               import time
+
+from docker.errors                      import NotFound
+
+from osbot_docker.apis.Docker_Run       import Docker_Run
+
+DEFAULT__RUN_CACHE_MAX_BYTES = 64 * 1024 * 1024                 # total size of the cached results (the least recently used are evicted)
+DEFAULT__RUN_CACHE_TTL       = 24 * 60 * 60                     # seconds a cached result is valid for
+DEFAULT__RUN_CACHE_PATH      = os.path.join(tempfile.gettempdir(), 'osbot_docker', 'docker_run_cache')
+
+
+class Docker_Run_Cache:
+    """Opt-in on-disk cache of docker_run results (stdout, stderr and exit code), for deterministic runs (linters,
+       version probes, ...) of pinned images. The key is the id of the image the tag resolves to (so a tag moved
+       to a new image is a miss), the options (entrypoint included) and the params. Entries expire after ttl seconds
+       and the least recently used ones are evicted when the cache is bigger than max_bytes.
+       Only the results with a known exit code are stored, so API_Docker.docker_run_cache_enable requires the 'api'
+       docker_run_engine (the docker CLI's results don't have it). A hit returns the stored result (the original run's
+       duration included) with cached=True (minus the fields whose values can't be stored as json).
+       Note: runs that depend on anything else (volumes, network, time) should not use it"""
+
+    def __init__(self, api_docker, path=DEFAULT__RUN_CACHE_PATH, max_bytes=DEFAULT__RUN_CACHE_MAX_BYTES, ttl=DEFAULT__RUN_CACHE_TTL):
+        self.api_docker = api_docker
+        self.path       = path
+        self.max_bytes  = max_bytes
+        self.ttl        = ttl
+        self.lock       = Lock()
+        self.counters   = dict(hits=0, misses=0, stores=0, expired=0, evictions=0, uncacheable=0)
+        os.makedirs(self.path, exist_ok=True)
+
+    def clear(self):
+        for file_path in self.files():
+            self.file_delete(file_path)
+        return self
+
+    def count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+
+    def evict(self):
+        """Deletes the least recently used entries until the cache is within max_bytes, returns the number deleted"""
+        files   = []
+        for file_path in self.files():
+            try:
+                stat = os.stat(file_path)
+                files.append((stat.st_mtime, stat.st_size, file_path))
+            except FileNotFoundError:                                   # deleted by another process
+                pass
+        total   = sum(size for _, size, _ in files)
+        evicted = 0
+        for _, size, file_path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            self.file_delete(file_path)
+            total   -= size
+            evicted += 1
+        with self.lock:
+            self.counters['evictions'] += evicted
+        return evicted
+
+    def file_delete(self, file_path):
+        try:
+            os.remove(file_path)
+        except FileNotFoundError:
+            pass
+
+    def file_path(self, key):
+        return os.path.join(self.path, f'{key}.json')
+
+    def files(self):
+        return [os.path.join(self.path, name) for name in os.listdir(self.path) if name.endswith('.json')]
+
+    def get(self, key):
+        """The cached result (None on misses and expired entries), hits are marked as recently used"""
+        file_path = self.file_path(key)
+        try:
+            with open(file_path) as file:
+                entry = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return None
+        if time() - entry.get('created', 0) > self.ttl:
+            self.file_delete(file_path)
+            self.count('expired')
+            return None
+        os.utime(file_path)                                             # the mtime is the 'last used' of the LRU eviction
+        return entry.get('result')
+
+    def image_id(self, image):
+        try:
+            return self.api_docker.client_api().inspect_image(image).get('Id')
+        except NotFound:
+            return None
+
+    def key(self, docker_params):
+        """Key of the run (None when it can't be cached: unparsable params or an image that is not available locally)"""
+        try:
+            options, image, command = Docker_Run(self.api_docker).split(docker_params[1:])
+        except ValueError:
+            return None
+        image_id = self.image_id(image)
+        if image_id is None:
+            return None
+        data = json.dumps(dict(image_id=image_id, options=options, command=command))
+        return hashlib.sha256(data.encode()).hexdigest()
+
+    def run(self, docker_params, execute):
+        """Returns the cached result of docker_params (i.e. ['run', '--rm', ...]) or the result of execute(docker_params),
+           which is cached when its status is 'ok' and its exit code is known (exit codes other than 0 included, since
+           the run is deterministic, but not the results without one, where a failed command can't be told apart)"""
+        key = self.key(docker_params)
+        if key:
+            result = self.get(key)
+            if result is not None:
+                self.count('hits')
+                return {**result, 'cached': True}
+            self.count('misses')
+        else:
+            self.count('uncacheable')
+        result = execute(docker_params)
+        if result.get('status') == 'ok' and type(result.get('exit_code')) is int:
+            key = key or self.key(docker_params)                        # the run might have pulled the image
+            if key:
+                self.set(key, result)
+        return result
+
+    def serializable(self, value):
+        try:
+            json.dumps(value)
+            return True
+        except (TypeError, ValueError):
+            return False
+
+    def set(self, key, result):
+        entry     = dict(created=time(), result={name: value for name, value in result.items() if self.serializable(value)})
+        file_path = self.file_path(key)
+        temp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'w') as file:
+            json.dump(entry, file)
+        os.replace(temp_path, file_path)                                # atomic, so that readers never see a partial entry
+        self.count('stores')
+        self.evict()
+        return self
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        lookups = counters['hits'] + counters['misses']
+        return dict(**counters, hit_ratio=round(counters['hits'] / lookups, 3) if lookups else None)
@@ -0,0 +1,230 @@
+from array                              import array
+from threading                          import Event, Lock, Thread
+from time                               import monotonic, time
+
+from osbot_docker.apis.Docker_Clients   import DEFAULT__CLIENT_POOL_SIZE
+
+STATS__METRICS             = ('time', 'cpu_percent', 'memory_usage', 'memory_limit', 'net_rx', 'net_tx', 'block_read', 'block_write')
+STATS__WIDTH               = len(STATS__METRICS)
+STATS__RATES               = ('net_rx', 'net_tx', 'block_read', 'block_write')        # counters (bytes since the container started), summarised as bytes/second
+DEFAULT__STATS_CAPACITY    = 300                                                      # samples kept per container (5 minutes at the daemon's 1 sample/second)
+DEFAULT__STATS_INTERVAL    = 1.0                                                      # seconds between the starts of the sampling rounds (the daemon's stats refresh once per second)
+DEFAULT__STATS_MAX_WORKERS = DEFAULT__CLIENT_POOL_SIZE - 2                            # concurrent stats requests (so that the other calls still get a pooled connection)
+
+
+def stats_sample(stats_raw, timestamp=None):
+    """Parses a raw stats entry (of the containers/{id}/stats endpoint) into a tuple with the STATS__METRICS values,
+       computed like the docker CLI does ('docker stats'). Returns None for the entries without cpu data (i.e. the
+       ones of containers that are not running)"""
+    cpu_stats    = stats_raw.get('cpu_stats'   ) or {}
+    precpu_stats = stats_raw.get('precpu_stats') or {}
+    if not cpu_stats.get('system_cpu_usage'):
+        return None
+    cpu_delta    = cpu_stats   .get('cpu_usage', {}).get('total_usage', 0) - precpu_stats.get('cpu_usage', {}).get('total_usage', 0)
+    system_delta = cpu_stats   .get('system_cpu_usage', 0)                   - precpu_stats.get('system_cpu_usage', 0)
+    online_cpus  = cpu_stats   .get('online_cpus') or len(cpu_stats.get('cpu_usage', {}).get('percpu_usage') or []) or 1
+    cpu_percent  = cpu_delta / system_delta * online_cpus * 100 if cpu_delta > 0 and system_delta > 0 else 0.0
+
+    memory_stats = stats_raw.get('memory_stats') or {}
+    memory_cache = memory_stats.get('stats', {})
+    memory_usage = memory_stats.get('usage', 0) - (memory_cache.get('inactive_file') or memory_cache.get('total_inactive_file') or 0)   # cgroups v2 or v1
+
+    networks     = (stats_raw.get('networks') or {}).values()
+    blkio        = (stats_raw.get('blkio_stats') or {}).get('io_service_bytes_recursive') or []
+    return (time() if timestamp is None else timestamp                                                      ,
+            cpu_percent                                                                                     ,
+            max(memory_usage, 0)                                                                            ,
+            memory_stats.get('limit', 0)                                                                    ,
+            sum(network.get('rx_bytes', 0) for network in networks)                                         ,
+            sum(network.get('tx_bytes', 0) for network in networks)                                         ,
+            sum(entry.get('value', 0) for entry in blkio if (entry.get('op') or '').lower() == 'read' )     ,
+            sum(entry.get('value', 0) for entry in blkio if (entry.get('op') or '').lower() == 'write')     )
+
+
+class Docker_Stats__Ring:
+    """Fixed-size history of a container's samples: one flat array of doubles (capacity rows of STATS__WIDTH values),
+       where the oldest row is overwritten once the ring is full"""
+
+    __slots__ = ('capacity', 'count', 'data', 'index')
+
+    def __init__(self, capacity=DEFAULT__STATS_CAPACITY):
+        self.capacity = capacity
+        self.count    = 0                                                   # rows with data
+        self.index    = 0                                                   # row the next sample is written to
+        self.data     = array('d', bytes(8 * capacity * STATS__WIDTH))
+
+    def __len__(self):
+        return self.count
+
+    def add(self, sample):
+        offset = self.index * STATS__WIDTH
+        self.data[offset:offset + STATS__WIDTH] = array('d', sample)
+        self.index = (self.index + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+        return self
+
+    def column(self, metric, window=None):
+        """The metric's values (oldest first), only the last window ones when window is set"""
+        values = self.data[STATS__METRICS.index(metric)::STATS__WIDTH]
+        if self.count < self.capacity:
+            values = values[:self.count]
+        else:
+            values = values[self.index:] + values[:self.index]
+        return values[-window:] if window else values
+
+    def last(self):
+        if self.count == 0:
+            return None
+        offset = (self.index - 1) % self.capacity * STATS__WIDTH
+        return dict(zip(STATS__METRICS, self.data[offset:offset + STATS__WIDTH]))
+
+
+class Docker_Stats:
+    """Samples the resource usage (cpu, memory, network and block IO) of a set of containers, selected by ids and/or
+       by labels and image (see Docker_Query), via the daemon's stats endpoint: every interval seconds, one stream=False
+       request per container made by a pool of max_workers threads (so the threads and connections used do not grow with
+       the number of containers). The last capacity samples of each container are kept in a Docker_Stats__Ring, and
+       summary() and aggregate() compute the rolling values over the last window samples (all of them when window is None).
+       Note: the daemon takes about a second to answer each request (it waits for a second cpu reading), so a round
+       over N containers takes about N / max_workers seconds"""
+
+    def __init__(self, api_docker, container_ids=None, labels=None, image=None, capacity=DEFAULT__STATS_CAPACITY,
+                       interval=DEFAULT__STATS_INTERVAL, max_workers=DEFAULT__STATS_MAX_WORKERS):
+        self.api_docker    = api_docker
+        self.container_ids = container_ids
+        self.labels        = labels
+        self.image         = image
+        self.capacity      = capacity
+        self.interval      = interval
+        self.max_workers   = max_workers
+        self.lock          = Lock()
+        self.rings         = {}                     # container id -> Docker_Stats__Ring
+        self.containers    = {}                     # container id -> labels
+        self.active        = set()                  # ids of the containers still sampled (i.e. running on their last sample)
+        self.stopped       = Event()
+        self.thread        = None                   # sampling thread (that submits each round's requests to the worker pool)
+        self.errors        = 0
+        self.running       = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def add(self, container_id, labels=None):
+        """Samples container_id from the next round (labels are the ones used by aggregate)"""
+        with self.lock:
+            if container_id not in self.rings:
+                self.rings     [container_id] = Docker_Stats__Ring(self.capacity)
+                self.containers[container_id] = labels or {}
+                self.active.add(container_id)
+        return self
+
+    def aggregate(self, label, window=None):
+        """Rolling values per value of label (None for the containers without it): the containers' count, the sum (and
+           the max per container) of their cpu and memory usage and the sum of their network and block IO rates"""
+        groups = {}
+        for container_id, labels in list(self.containers.items()):
+            summary = self.summary(container_id, window=window)
+            if summary is None:
+                continue
+            group = groups.setdefault(labels.get(label), dict(containers       = 0  ,
+                                                              cpu_percent      = 0.0,
+                                                              cpu_percent_max  = 0.0,
+                                                              memory_usage     = 0.0,
+                                                              memory_usage_max = 0.0,
+                                                              **{f'{metric}_rate': 0.0 for metric in STATS__RATES}))
+            group['containers'      ] += 1
+            group['cpu_percent'     ] += summary['cpu_percent']
+            group['memory_usage'    ] += summary['memory_usage']
+            group['cpu_percent_max' ]  = max(group['cpu_percent_max' ], summary['cpu_percent_max' ])
+            group['memory_usage_max']  = max(group['memory_usage_max'], summary['memory_usage_max'])
+            for metric in STATS__RATES:
+                group[f'{metric}_rate'] += summary[f'{metric}_rate']
+        return {value: {key: round(item, 3) if type(item) is float else item for key, item in group.items()} for value, group in groups.items()}
+
+    def sample(self, container_id):
+        """Adds one sample of container_id, returns False when it is not running (or does not exist) anymore"""
+        from docker.errors       import DockerException, NotFound           # note: imported here to keep the import of this module fast
+        from requests.exceptions import RequestException
+        if self.stopped.is_set():                                           # (the requests still queued when stop is called)
+            return True
+        try:
+            stats_raw = self.api_docker.client_api().stats(container_id, stream=False)
+        except NotFound:
+            return False
+        except (DockerException, RequestException, OSError, ValueError):
+            with self.lock:
+                self.errors += 1
+            return True
+        sample = stats_sample(stats_raw)
+        if sample is None:                                                  # the container is not running (anymore)
+            return False
+        with self.lock:
+            self.rings[container_id].add(sample)
+        return True
+
+    def sample_round(self, executor):
+        with self.lock:
+            container_ids = sorted(self.active)
+        for container_id, running in zip(container_ids, executor.map(self.sample, container_ids)):
+            if running is False:
+                with self.lock:
+                    self.active.discard(container_id)
+
+    def samples(self, container_id):
+        ring = self.rings.get(container_id)
+        return len(ring) if ring else 0
+
+    def sampling(self):
+        from concurrent.futures import ThreadPoolExecutor                   # note: imported here to keep the import of this module fast
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='Docker_Stats') as executor:
+            while self.stopped.is_set() is False:
+                start = monotonic()
+                self.sample_round(executor)
+                self.stopped.wait(max(self.interval - (monotonic() - start), 0))
+
+    def start(self):
+        """Selects the (running) containers and starts sampling them"""
+        if self.running is False:
+            self.running = True
+            self.stopped.clear()
+            if self.container_ids is None or self.container_ids:                # (an empty list of ids selects no containers)
+                records = self.api_docker.containers_query(all=False, labels=self.labels, image=self.image, id=self.container_ids)
+                for record in records:
+                    self.add(record.id, labels=record.labels)
+            self.thread = Thread(target=self.sampling, name='Docker_Stats', daemon=True)
+            self.thread.start()
+        return self
+
+    def stop(self):
+        """Stops sampling (after the requests in flight, which take up to a couple of seconds on a real daemon)"""
+        self.running = False
+        self.stopped.set()
+        if self.thread:
+            self.thread.join()
+            self.thread = None
+        return self
+
+    def summary(self, container_id, window=None):
+        """Rolling values of the container's last window samples: the mean, max and last cpu percent and memory usage,
+           the memory limit and the network and block IO rates (bytes/second), None when there are no samples"""
+        ring = self.rings.get(container_id)
+        if not ring:
+            return None
+        with self.lock:
+            columns = {metric: ring.column(metric, window) for metric in STATS__METRICS}
+        times    = columns['time']
+        duration = times[-1] - times[0]
+        summary  = dict(samples = len(times))
+        for metric in ('cpu_percent', 'memory_usage'):
+            values = columns[metric]
+            summary[metric          ] = round(sum(values) / len(values), 3)
+            summary[f'{metric}_max' ] = round(max(values), 3)
+            summary[f'{metric}_last'] = round(values[-1] , 3)
+        summary['memory_limit'] = columns['memory_limit'][-1]
+        for metric in STATS__RATES:
+            values = columns[metric]
+            summary[f'{metric}_rate'] = round(max(values[-1] - values[0], 0) / duration, 3) if duration > 0 else 0.0     # (counters restart with the container)
+        return summary
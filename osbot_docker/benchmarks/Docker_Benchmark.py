@@ -0,0 +1,170 @@
+import json
+import platform
+import tracemalloc
+from datetime                                       import datetime, timezone
+from time                                           import perf_counter
+
+from osbot_docker.apis.API_Docker                   import API_Docker
+from osbot_docker.apis.Docker_Image                 import Docker_Image
+from osbot_docker.helpers.Metrics_Histogram         import Metrics_Histogram
+
+BENCHMARK__LABEL            = 'osbot_docker.benchmark'
+BENCHMARK__SCENARIOS        = ['containers', 'containers_all__by_labels', 'containers_records', 'images', 'container_info',
+                               'container_status', 'container_exec', 'container_logs', 'lambda_cycle']
+DEFAULT__ITERATIONS         = 20
+DEFAULT__SCALE              = 50
+DEFAULT__THRESHOLD          = 0.2                       # 20% slower (or more api calls / memory) than the baseline is a regression
+DEFAULT__LIST_IMAGE         = 'hello-world:latest'      # containers created (not started) to populate the listings
+DEFAULT__RUN_IMAGE          = 'alpine:latest'           # container kept running (with RUN_COMMAND) for the exec and logs scenarios
+DEFAULT__RUN_COMMAND        = ['sh', '-c', 'echo benchmark; sleep 3600']
+
+
+class Docker_Benchmark:
+    """Measures the latency percentiles, API calls per operation and memory peak of the osbot_docker hot paths, at a
+       configurable scale (number of containers and image tags), against a real daemon or a Fake_Docker_Engine"""
+
+    def __init__(self, api_docker=None, scale=DEFAULT__SCALE, iterations=DEFAULT__ITERATIONS, scenarios=None, engine='daemon',
+                       list_image=DEFAULT__LIST_IMAGE, run_image=DEFAULT__RUN_IMAGE, run_command=None):
+        self.api_docker    = api_docker or API_Docker()
+        self.scale         = scale
+        self.iterations    = iterations
+        self.scenarios     = scenarios or BENCHMARK__SCENARIOS
+        self.engine        = engine                     # 'daemon' or 'fake' (only used to label the results and to skip lambda_cycle)
+        self.list_image    = list_image
+        self.run_image     = run_image
+        self.run_command   = run_command or DEFAULT__RUN_COMMAND
+        self.run_id        = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S%f')
+        self.containers    = []
+        self.image_tags    = []
+        self.run_container = None
+        self.instrumented  = False                      # True when setup enabled the api_docker's instrumentation (and teardown has to disable it)
+
+    def __enter__(self):
+        return self.setup()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.teardown()
+
+    def labels(self):
+        return {BENCHMARK__LABEL: self.run_id}
+
+    def measure(self, operation):
+        """Runs operation (once to warm up, then iterations times) and returns its latency (ms), api calls and memory peak"""
+        operation()
+        latency = Metrics_Histogram()
+        with self.api_docker.api_calls() as calls:
+            for _ in range(self.iterations):
+                start = perf_counter()
+                operation()
+                latency.add((perf_counter() - start) * 1000)
+        tracemalloc.start()                                             # separate run, since tracing slows down the operation
+        try:
+            operation()
+            memory_peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+        return dict(latency_ms     = {key: value if key == 'count' or value is None else round(value, 3) for key, value in latency.summary().items()},
+                    api_calls      = calls.count / self.iterations  ,
+                    api_endpoints  = calls.by_endpoint()            ,
+                    memory_peak_kb = round(memory_peak / 1024, 1)   )
+
+    def operations(self):
+        container = self.run_container
+        return dict(containers                = lambda: self.api_docker.containers(all=True)                    ,
+                    containers_all__by_labels = lambda: self.api_docker.containers_all__by_labels()             ,
+                    containers_records        = lambda: self.api_docker.containers_records()                    ,
+                    images                    = lambda: self.api_docker.images()                                ,
+                    container_info            = lambda: container.refresh().info()                              ,
+                    container_status          = lambda: container.status()                                      ,
+                    container_exec            = lambda: container.exec(['echo', 'benchmark'])                   ,
+                    container_logs            = lambda: container.logs()                                        ,
+                    lambda_cycle              = self.lambda_cycle                                               )
+
+    def lambda_cycle(self):
+        from osbot_docker.helpers.Container__Lambda_Python import Container__Lambda_Python
+        with Container__Lambda_Python(host_port=None, api_docker=self.api_docker) as container_lambda:
+            container_lambda.wait_for_ready()
+
+    def run(self):
+        results = dict(meta      = dict(created     = datetime.now(timezone.utc).isoformat()   ,
+                                        engine      = self.engine                              ,
+                                        iterations  = self.iterations                          ,
+                                        python      = platform.python_version()                ,
+                                        scale       = self.scale                               ),
+                       scenarios = {})
+        operations = self.operations()
+        for name in self.scenarios:
+            if name == 'lambda_cycle' and self.engine == 'fake':
+                results['scenarios'][name] = dict(skipped='needs the lambda runtime (i.e. a real daemon)')
+                continue
+            try:
+                results['scenarios'][name] = self.measure(operations[name])
+            except Exception as error:
+                results['scenarios'][name] = dict(error=f'{type(error).__name__}: {error}')
+        return results
+
+    def setup(self):
+        """Creates scale containers and image tags (labelled/named with the run id) plus one running container"""
+        self.instrumented = self.api_docker.instrumentation is None
+        self.api_docker.instrumentation_enable()
+        list_name, list_tag = self.list_image.rsplit(':', 1)
+        run_name , run_tag  = self.run_image .rsplit(':', 1)
+        for image in (Docker_Image(list_name, list_tag, api_docker=self.api_docker), Docker_Image(run_name, run_tag, api_docker=self.api_docker)):
+            if image.exists() is False:
+                image.pull()
+        for index in range(self.scale):
+            self.containers.append(self.api_docker.container_create(list_name, tag=list_tag, labels=self.labels()))
+            image_tag = f'{index}-{self.run_id}'
+            self.api_docker.client_api().tag(self.list_image, repository='osbot_docker_benchmark', tag=image_tag)
+            self.image_tags.append(f'osbot_docker_benchmark:{image_tag}')
+        self.run_container = Docker_Image(run_name, run_tag, api_docker=self.api_docker).create_container(command=self.run_command, labels=self.labels())
+        self.run_container.start()
+        return self
+
+    def teardown(self):
+        container_ids = [container.container_id for container in self.containers]
+        if self.run_container:
+            container_ids.append(self.run_container.container_id)
+        self.api_docker.containers_delete(container_ids=container_ids, force=True)
+        self.api_docker.images_delete(self.image_tags)
+        self.containers, self.image_tags, self.run_container = [], [], None
+        if self.instrumented:
+            self.api_docker.instrumentation_disable()
+            self.instrumented = False
+        return self
+
+    # results
+
+    @staticmethod
+    def compare(results, baseline, threshold=DEFAULT__THRESHOLD):
+        """Per scenario ratios (results / baseline) of the p50 and p95 latency, api calls and memory peak,
+           with regression=True when any of them is above 1 + threshold"""
+        comparison = {}
+        for name, current in results.get('scenarios', {}).items():
+            previous = baseline.get('scenarios', {}).get(name)
+            if not previous or 'latency_ms' not in current or 'latency_ms' not in previous:
+                continue
+            ratios = dict(p50            = Docker_Benchmark.ratio(current['latency_ms'].get('p50'), previous['latency_ms'].get('p50')),
+                          p95            = Docker_Benchmark.ratio(current['latency_ms'].get('p95'), previous['latency_ms'].get('p95')),
+                          api_calls      = Docker_Benchmark.ratio(current.get('api_calls')        , previous.get('api_calls')        ),
+                          memory_peak_kb = Docker_Benchmark.ratio(current.get('memory_peak_kb')   , previous.get('memory_peak_kb')   ))
+            regressions      = sorted(key for key, ratio in ratios.items() if ratio is not None and ratio > 1 + threshold)
+            comparison[name] = dict(ratios=ratios, regressions=regressions, regression=len(regressions) > 0)
+        return comparison
+
+    @staticmethod
+    def load(path):
+        with open(path) as file:
+            return json.load(file)
+
+    @staticmethod
+    def ratio(current, previous):
+        if current is None or not previous:
+            return None
+        return round(current / previous, 3)
+
+    @staticmethod
+    def save(results, path):
+        with open(path, 'w') as file:
+            json.dump(results, file, indent=2)
+        return path
@@ -0,0 +1,69 @@
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime                                       import datetime, timezone
+
+from osbot_docker.helpers.Metrics_Histogram         import Metrics_Histogram
+
+IMPORTS__SCENARIOS      = { 'import__osbot_docker'           : 'import osbot_docker'                                                               ,
+                            'import__api_docker'             : 'from osbot_docker.apis.API_Docker import API_Docker\nAPI_Docker()'                 ,
+                            'import__docker_container'       : 'from osbot_docker.apis.Docker_Container import Docker_Container'                   ,
+                            'import__docker_lambda_python'   : 'from osbot_docker.helpers.Docker_Lambda__Python import Docker_Lambda__Python'      ,
+                            'import__container_lambda'       : 'from osbot_docker.helpers.Container__Lambda_Python import Container__Lambda_Python',
+                            'import__lambda_python_pool'     : 'from osbot_docker.helpers.Lambda_Python_Pool import Lambda_Python_Pool'            }
+IMPORTS__HEAVY_MODULES  = ['docker', 'requests', 'urllib3', 'aiohttp']                 # should only be imported on first use
+IMPORTS__SCRIPT         = '''import json, sys, time, tracemalloc
+if {memory}: tracemalloc.start()
+start = time.perf_counter()
+{code}
+duration = (time.perf_counter() - start) * 1000
+print(json.dumps(dict(duration_ms    = duration                                                  ,
+                      memory_peak    = tracemalloc.get_traced_memory()[1] if {memory} else None  ,
+                      heavy_modules  = [name for name in {heavy_modules!r} if name in sys.modules],
+                      modules        = len(sys.modules)                                          )))'''
+DEFAULT__IMPORTS_ITERATIONS = 10
+
+
+class Docker_Benchmark__Imports:
+    """Measures the cold import (and API_Docker construction) time of the osbot_docker modules, each one in a fresh
+       python process. The results have the same format as Docker_Benchmark's (so they can be saved and compared),
+       plus the heavy modules (docker-py, requests, ...) that each import loaded"""
+
+    def __init__(self, iterations=DEFAULT__IMPORTS_ITERATIONS, scenarios=None):
+        self.iterations = iterations
+        self.scenarios  = scenarios or list(IMPORTS__SCENARIOS)
+
+    def execute(self, code, memory=False):
+        script   = IMPORTS__SCRIPT.format(code=code, memory=memory, heavy_modules=IMPORTS__HEAVY_MODULES)
+        root     = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        env      = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in (root, os.environ.get('PYTHONPATH')) if path))
+        process  = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, env=env, check=True)
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def measure(self, code):
+        self.execute(code)                                              # warm up (i.e. the .pyc files are written)
+        latency = Metrics_Histogram()
+        for _ in range(self.iterations):
+            latency.add(self.execute(code)['duration_ms'])
+        result = self.execute(code, memory=True)                        # separate run, since tracing slows down the imports
+        return dict(latency_ms     = {key: value if key == 'count' or value is None else round(value, 3) for key, value in latency.summary().items()},
+                    api_calls      = 0                                          ,
+                    memory_peak_kb = round(result['memory_peak'] / 1024, 1)     ,
+                    heavy_modules  = result['heavy_modules']                    ,
+                    modules        = result['modules']                          )
+
+    def run(self):
+        results = dict(meta      = dict(created     = datetime.now(timezone.utc).isoformat()   ,
+                                        engine      = 'imports'                                ,
+                                        iterations  = self.iterations                          ,
+                                        python      = platform.python_version()                ,
+                                        scale       = None                                     ),
+                       scenarios = {})
+        for name in self.scenarios:
+            try:
+                results['scenarios'][name] = self.measure(IMPORTS__SCENARIOS[name])
+            except Exception as error:
+                results['scenarios'][name] = dict(error=f'{type(error).__name__}: {error}')
+        return results
@@ -0,0 +1,82 @@
+import argparse
+import json
+import sys
+
+from osbot_docker.benchmarks.Docker_Benchmark          import Docker_Benchmark, BENCHMARK__SCENARIOS, DEFAULT__ITERATIONS, DEFAULT__SCALE, \
+                                                              DEFAULT__THRESHOLD, DEFAULT__LIST_IMAGE, DEFAULT__RUN_IMAGE
+from osbot_docker.benchmarks.Docker_Benchmark__Imports import Docker_Benchmark__Imports, IMPORTS__SCENARIOS
+
+
+def arguments(args=None):
+    parser = argparse.ArgumentParser(prog='python -m osbot_docker.benchmarks', description='Benchmarks the osbot_docker API hot paths')
+    parser.add_argument('--fake'      , action='store_true'                         , help='run against an in-process Fake_Docker_Engine (instead of the local daemon)')
+    parser.add_argument('--imports'   , action='store_true'                         , help='measure the cold import time of the modules (each in a new python process)')
+    parser.add_argument('--latency'   , type=float, default=0.0                     , help='latency (in seconds) added by the fake engine to each request')
+    parser.add_argument('--base-url'  , default=None                                , help='daemon to use, for example unix:///var/run/docker.sock')
+    parser.add_argument('--scale'     , type=int  , default=DEFAULT__SCALE          , help='number of containers (and image tags) created for the listings')
+    parser.add_argument('--iterations', type=int  , default=DEFAULT__ITERATIONS     , help='measured calls per scenario')
+    parser.add_argument('--scenarios' , default=None                                , help='comma separated list of scenarios (default: all)')
+    parser.add_argument('--list-image', default=DEFAULT__LIST_IMAGE                 , help='image of the (not started) containers used by the listings')
+    parser.add_argument('--run-image' , default=DEFAULT__RUN_IMAGE                  , help='image of the running container used by exec and logs')
+    parser.add_argument('--output'    , default=None                                , help='path of the JSON results file')
+    parser.add_argument('--baseline'  , default=None                                , help='JSON results to compare with (exit code is 1 on regressions)')
+    parser.add_argument('--threshold' , type=float, default=DEFAULT__THRESHOLD      , help='allowed slowdown vs the baseline (0.2 = 20%%)')
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    args      = arguments(args)
+    available = list(IMPORTS__SCENARIOS) if args.imports else BENCHMARK__SCENARIOS
+    scenarios = [scenario.strip() for scenario in (args.scenarios or ','.join(available)).split(',') if scenario.strip()]
+    unknown   = sorted(set(scenarios) - set(available))
+    if unknown:
+        print(f'unknown scenarios: {unknown} (available: {available})', file=sys.stderr)
+        return 2
+    if args.imports:
+        results = Docker_Benchmark__Imports(iterations=args.iterations, scenarios=scenarios).run()
+    else:
+        results = run_engine_scenarios(args, scenarios)
+    print_results(results)
+    if args.output:
+        Docker_Benchmark.save(results, args.output)
+    if args.baseline:
+        comparison = Docker_Benchmark.compare(results, Docker_Benchmark.load(args.baseline), threshold=args.threshold)
+        print(json.dumps(comparison, indent=2))
+        if any(item.get('regression') for item in comparison.values()):
+            return 1
+    return 0
+
+
+def run_engine_scenarios(args, scenarios):
+    engine = None
+    if args.fake:
+        from osbot_docker.helpers.Fake_Docker_Engine import Fake_Docker_Engine
+        engine     = Fake_Docker_Engine(latency=args.latency).start()
+        api_docker = engine.api_docker()
+    else:
+        from osbot_docker.apis.API_Docker import API_Docker
+        api_docker = API_Docker(base_url=args.base_url)
+    try:
+        with Docker_Benchmark(api_docker=api_docker, scale=args.scale, iterations=args.iterations, scenarios=scenarios,
+                              engine='fake' if args.fake else 'daemon', list_image=args.list_image, run_image=args.run_image) as benchmark:
+            results = benchmark.run()
+    finally:
+        if engine:
+            engine.stop()
+    return results
+
+
+def print_results(results):
+    meta = results.get('meta')
+    print(f"engine: {meta.get('engine')} | scale: {meta.get('scale')} | iterations: {meta.get('iterations')}")
+    print(f"{'scenario':<28}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'api calls':>11}{'mem peak KB':>13}")
+    for name, result in results.get('scenarios', {}).items():
+        latency = result.get('latency_ms')
+        if latency is None:
+            print(f"{name:<28}{result.get('skipped') or result.get('error')}")
+            continue
+        print(f"{name:<28}{latency.get('p50'):>10}{latency.get('p95'):>10}{latency.get('p99'):>10}{result.get('api_calls'):>11}{result.get('memory_peak_kb'):>13}")
+
+
+if __name__ == '__main__':
+    sys.exit(main())
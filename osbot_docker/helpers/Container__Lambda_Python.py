@@ -1,21 +1,72 @@
+from threading                                  import Lock
+from time                                       import monotonic, sleep
+
 from osbot_docker.helpers.Docker_Lambda__Python import Docker_Lambda__Python
 
+DEFAULT__READY_TIMEOUT = 10                     # seconds to wait for the lambda runtime to accept invocations
+
 
 class Container__Lambda_Python:
 
-    def __init__(self):
-        self.docker_lambda__python = Docker_Lambda__Python()
+    def __init__(self, host_port=9000, api_docker=None, image_tag='latest', lock=None):
+        self.docker_lambda__python = Docker_Lambda__Python(host_port=host_port, api_docker=api_docker, image_tag=image_tag)
         self.container             = None
+        self.in_flight             = 0          # invocations currently being executed (used by Lambda_Python_Pool)
+        self.invocations           = 0
+        self.lock                  = lock or Lock()     # Lambda_Python_Pool shares its lock (so that it can reserve members atomically)
 
     def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def invoke(self, payload=None, reserved=False, retries=None, timeout=None):
+        """Invokes the lambda, with reserved the caller has already incremented in_flight (see Lambda_Python_Pool.member),
+           retries and timeout override the ones of Docker_Lambda__Python (for this call)"""
+        if reserved is False:
+            with self.lock:
+                self.in_flight += 1
+        try:
+            return self.docker_lambda__python.invoke(payload=payload, retries=retries, timeout=timeout)
+        finally:
+            with self.lock:
+                self.in_flight   -= 1
+                self.invocations += 1
+
+    def invoke_metrics(self):
+        return self.docker_lambda__python.invoke_metrics(container=self.container)
+
+    def is_running(self):
+        return self.container is not None and self.container.refresh().status() == 'running'
+
+    def start(self, wait_for_ready=False):
         self.container = self.docker_lambda__python.create_container()
         self.container.start()
+        if self.docker_lambda__python.host_port is None:
+            self.docker_lambda__python.host_port_from_container(self.container)
+        if wait_for_ready:
+            self.wait_for_ready()
         return self
 
-    def __exit__(self, exc_type, exc_val, exc_tb):
+    def stop(self):
         self.container.stop()
         self.container.delete()
+        return self
 
-    def invoke(self, payload=None):
-        return self.docker_lambda__python.invoke(payload=payload)
-
+    def wait_for_ready(self, timeout=DEFAULT__READY_TIMEOUT, wait_delta=0.05):
+        """Makes a priming invocation, retrying until the runtime inside the container accepts connections (or timeout
+           seconds have passed). Each probe is made without the session's connection retries (and their backoff), so that
+           the timeout is honoured"""
+        from requests.exceptions import ConnectionError                         # note: imported here (requests is slow to import)
+        deadline = monotonic() + timeout
+        while True:
+            connect_timeout, read_timeout = self.docker_lambda__python.timeout
+            remaining                     = max(deadline - monotonic(), 0.01)
+            try:
+                return self.invoke(retries=0, timeout=(min(connect_timeout, remaining), read_timeout))
+            except ConnectionError:
+                remaining = deadline - monotonic()
+                if remaining <= 0:
+                    raise
+                sleep(min(wait_delta, remaining))
@@ -1,39 +1,152 @@
-import requests
+import os
+import re
+from collections import deque
+from time import perf_counter, time
 
 from osbot_docker.apis.Docker_Image import Docker_Image
-from osbot_utils.utils.Files import path_combine, file_contents
+from osbot_docker.helpers.Metrics_Histogram import Metrics_Histogram
 
 import docker_images
 
+DEFAULT__INVOKE_RETRIES = 3                                 # retries of connection errors (invocations that never reached the runtime)
+DEFAULT__INVOKE_TIMEOUT = (3, 60)                           # (connect, read) timeouts in seconds
+WARM_IMAGE__TAG         = 'warm'
+WARM_IMAGE__PRIME       = ['python', '-m', 'compileall', '-q', '/var/task', '/var/runtime']   # pre-compiles the handler and runtime .pyc files
+REGEX__RUNTIME_REPORT   = re.compile(r'REPORT RequestId: (\S+)(?:\s+Init Duration: ([\d.]+) ms)?\s+Duration: ([\d.]+) ms')
+
 
 class Docker_Lambda__Python:
 
-    def __init__(self, host_port=9000):
-        self.host_port     = host_port
-        self.image_name    = 'lambda_python__3_11'
-        self.api_docker    = None
-        self.docker_image  = Docker_Image(self.image_name, 'latest')
-        self.port_bindings = { 8080: self.host_port }
+    def __init__(self, host_port=9000, api_docker=None, timeout=DEFAULT__INVOKE_TIMEOUT, retries=DEFAULT__INVOKE_RETRIES, image_tag='latest'):
+        self.host_port       = host_port                                          # when None, docker picks a free host port (see host_port_from_container)
+        self.image_name      = 'lambda_python__3_11'
+        self.image_tag       = image_tag
+        self.api_docker      = api_docker
+        self.docker_image    = Docker_Image(self.image_name, image_tag, api_docker=api_docker)
+        self.port_bindings   = { 8080: self.host_port }
+        self.retries         = retries
+        self.timeout         = timeout
+        self.metrics         = dict(latency          = Metrics_Histogram(),     # client side, in ms
+                                    response_size    = Metrics_Histogram(),     # in bytes
+                                    runtime_duration = Metrics_Histogram(),     # as reported by the runtime (in the container's logs), in ms
+                                    runtime_init     = Metrics_Histogram())     # as reported by the runtime (cold starts only), in ms
+        self.runtime_reports = deque(maxlen=1000)                               # RequestIds of the runtime REPORT lines already collected
+        self.runtime_since   = None                                             # only the logs since the previous collection are read
+        self.http_sessions   = {}                                               # retries -> session, set by session() (keep-alive connections between invocations)
 
     def create_container(self):
         return self.docker_image.create_container(port_bindings=self.port_bindings)
 
-    def image_build(self):
-        return self.docker_image.build(self.path_lambda_python())
+    def host_port_from_container(self, container):
+        """Sets host_port to the port that docker mapped to the container's 8080 port"""
+        port_mappings  = container.refresh().info().get('ports') or {}
+        self.host_port = int(port_mappings.get('8080/tcp')[0].get('HostPort'))
+        return self.host_port
+
+    def image_build(self, force=False):
+        if force:
+            return self.docker_image.build(self.path_lambda_python())
+        return self.docker_image.build_if_changed(self.path_lambda_python())   # skips the build when the image already has the same build context hash
+
+    def image_build_stream(self):
+        return self.docker_image.build_stream(self.path_lambda_python())
 
-    def invoke(self, payload):
+    def invoke(self, payload, retries=None, timeout=None):
+        """Invokes the lambda, retries (default: self.retries) and timeout (default: self.timeout) are the ones of this call"""
         url      = f"http://localhost:{self.host_port}/2015-03-31/functions/function/invocations"
-        response = requests.post(url=url, json=payload or {})
+        start    = perf_counter()
+        response = self.session(retries).post(url=url, json=payload or {}, timeout=timeout or self.timeout)
+        self.metrics['latency'      ].add((perf_counter() - start) * 1000)
+        self.metrics['response_size'].add(len(response.content))
         return response.json()
 
+    def invoke_metrics(self, container=None):
+        """Percentiles of the invocations' metrics, when container is provided the runtime's REPORT lines are collected first"""
+        if container:
+            self.runtime_reports_collect(container)
+        return {name: histogram.summary() for name, histogram in self.metrics.items()}
+
     def dockerfile(self):
+        from osbot_utils.utils.Files import file_contents                       # note: imported here to keep the import of this module fast
         return file_contents(self.path_docker_dockerfile())
 
     def path_docker_dockerfile(self):
-        return path_combine(self.path_lambda_python(), 'Dockerfile')
+        return os.path.join(self.path_lambda_python(), 'Dockerfile')
 
     def path_docker_images(self):
         return docker_images.folder
 
     def path_lambda_python(self):
-        return path_combine(docker_images.folder, self.image_name)
+        return os.path.join(docker_images.folder, self.image_name)
+
+    def runtime_reports_collect(self, container):
+        """Adds the Duration and Init Duration of the (new) REPORT lines in the container's logs to the metrics"""
+        reports            = []
+        since              = self.runtime_since
+        self.runtime_since = int(time()) - 1                                    # 1 sec overlap (since is in seconds), the duplicates are skipped via their RequestId
+        for line in container.logs_stream(since=since):
+            match = REGEX__RUNTIME_REPORT.search(line)
+            if match is None:
+                continue
+            request_id, init_duration, duration = match.groups()
+            if request_id in self.runtime_reports:
+                continue
+            self.runtime_reports.append(request_id)
+            self.metrics['runtime_duration'].add(float(duration))
+            if init_duration:
+                self.metrics['runtime_init'].add(float(init_duration))
+            reports.append(dict(request_id=request_id, duration=float(duration), init_duration=init_duration and float(init_duration)))
+        return reports
+
+    def start_to_first_invoke(self, image_tag='latest'):
+        """Time (in ms) from creating a container (with image_tag) to the end of its first successful invocation"""
+        from osbot_docker.helpers.Container__Lambda_Python import Container__Lambda_Python     # note: we have to import here due to circular dependency
+        container_lambda = Container__Lambda_Python(host_port=None, api_docker=self.api_docker, image_tag=image_tag)
+        start            = perf_counter()
+        try:
+            container_lambda.start(wait_for_ready=True)
+            return round((perf_counter() - start) * 1000, 3)
+        finally:
+            if container_lambda.container:
+                container_lambda.stop()
+
+    def session(self, retries=None):
+        retries = self.retries if retries is None else retries
+        if retries in self.http_sessions:
+            return self.http_sessions[retries]
+        import requests                                                         # note: imported here (on first invoke) since it is slow to import
+        from requests.adapters  import HTTPAdapter
+        from urllib3.util.retry import Retry
+        retry   = Retry(total=retries, read=0, status=0, backoff_factor=0.1)    # POSTs are only retried when they didn't reach the runtime
+        adapter = HTTPAdapter(max_retries=retry)
+        session = requests.Session()                                            # keep-alive connections between invocations
+        session.mount('http://', adapter)
+        self.http_sessions[retries] = session
+        return session
+
+    def use_warm_image(self):
+        """Makes create_container use the warm image (created by warm_image_create)"""
+        self.image_tag    = WARM_IMAGE__TAG
+        self.docker_image = self.warm_image()
+        return self
+
+    def warm_image(self):
+        return Docker_Image(self.image_name, WARM_IMAGE__TAG, api_docker=self.api_docker)
+
+    def warm_image_compare(self):
+        """Compares the cold start (base image) with the warm start (warm image) times, in ms"""
+        cold_start = self.start_to_first_invoke(image_tag='latest'        )
+        warm_start = self.start_to_first_invoke(image_tag=WARM_IMAGE__TAG)
+        saved      = round(cold_start - warm_start, 3)
+        return dict(cold_start    = cold_start                              ,
+                    warm_start    = warm_start                              ,
+                    saved         = saved                                   ,
+                    saved_percent = round(saved / cold_start * 100, 1) if cold_start else 0)
+
+    def warm_image_create(self):
+        """Starts a container from the base image, primes it (invocation + pre-compiled .pyc files) and commits it as the warm image"""
+        from osbot_docker.helpers.Container__Lambda_Python import Container__Lambda_Python     # note: we have to import here due to circular dependency
+        with Container__Lambda_Python(host_port=None, api_docker=self.api_docker, image_tag='latest') as container_lambda:
+            container_lambda.wait_for_ready()
+            container_lambda.container.exec(WARM_IMAGE__PRIME)
+            return container_lambda.container.commit(repository=self.image_name, tag=WARM_IMAGE__TAG, message='osbot_docker warm image')
@@ -0,0 +1,728 @@
+import fnmatch
+import hashlib
+import io
+import json
+import os
+import re
+import shlex
+import socketserver
+import tarfile
+import tempfile
+from collections                        import Counter
+from datetime                           import datetime, timezone
+from threading                          import Condition, RLock, Thread
+from time                               import sleep, time, time_ns
+
+from osbot_docker.apis.API_Docker       import API_Docker
+from osbot_docker.apis.Docker_Clients   import docker_clients
+
+FAKE_ENGINE__API_VERSION    = '1.43'
+FAKE_ENGINE__HOST_PORTS     = 49153                     # first host port given to port bindings without a HostPort
+FAKE_ENGINE__IMAGES         = { 'hello-world:latest': dict(output='\nHello from Docker!\nThis message shows that your installation appears to be working correctly.\n',
+                                                           exits =True                     ,
+                                                           cmd   =['/hello']               )}
+FAKE_ENGINE__IMAGE_CMD      = ['true']                  # cmd of the images added without cmd, entrypoint or output (so that their containers exit)
+FAKE_ENGINE__REGISTRY       = { 'alpine:latest'     : dict(cmd=['/bin/sh'])            }    # images that can be pulled (besides the engine's initial images)
+FAKE_ENGINE__LAYER_SIZE     = 1024 * 1024               # size of the pulled layers (reported in the 'Downloading' progress)
+FAKE_ENGINE__LAYER_STEPS    = 4                         # 'Downloading' progress messages per layer
+FAKE_ENGINE__STATS_INTERVAL = 1.0                       # seconds between the samples of the stats stream (like the daemon)
+FAKE_ENGINE__STATS_CPUS     = 2
+
+
+def random_id(*parts):
+    return hashlib.sha256(f'{parts}{time_ns()}{os.urandom(8)}'.encode()).hexdigest()
+
+
+def now_iso():
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.%f') + '000Z'
+
+
+class Fake_Docker_Engine:
+    """In-process fake of the Docker Engine API, served over a unix socket, for hermetic tests and for benchmarking
+       this library's own overhead (the daemon's work is replaced by in-memory state and the optional injected latency).
+
+       It implements the endpoints used by API_Docker, Docker_Container and Docker_Image: containers (list, inspect,
+       create, start, stop, kill, wait, attach, remove, logs, stats, archive, commit), images (list, inspect, tag, remove, pull,
+       build), exec (create, start, inspect), events, version, info and ping. Containers don't run processes: on start
+       they 'print' their image's output (and exit when the image has exits=True) or run their command when it only
+       uses the commands registered in exec_handlers (echo, cat, sha256sum, find, sh -c, ...), which exec also runs
+       against each container's in-memory files.
+
+       Pulls (and the Dockerfile FROM images) only find the images in registry (FAKE_ENGINE__REGISTRY plus the initial
+       images, see registry_add), the others fail with the daemon's 404 errors.
+
+       Not supported: interactive exec/attach (stdin), Dockerfile RUN steps (only recorded), real registries and networks"""
+
+    def __init__(self, latency=0.0, socket_path=None, images=None):
+        self.latency        = latency                       # seconds added to every request (to simulate a remote or busy daemon)
+        self.socket_path    = socket_path
+        self.temp_dir       = None
+        self.server         = None
+        self.thread         = None
+        self.running        = False
+        self.lock           = RLock()
+        self.changed        = Condition(self.lock)          # notified on every event (used by the events, logs and wait streams)
+        self.containers     = {}                            # container id -> container data
+        self.images         = {}                            # image id     -> image data
+        self.execs          = {}                            # exec id      -> exec data
+        self.events         = []
+        self.layers         = set()                         # ids of the layers 'downloaded' by pulls
+        self.registry       = dict(FAKE_ENGINE__REGISTRY)   # reference -> image_add kwargs of the images that can be pulled
+        self.unpullable     = set()                         # references whose pull fails with 404 (even when they are in registry)
+        self.request_counts = Counter()                     # (method, route) -> number of requests
+        self.host_ports     = FAKE_ENGINE__HOST_PORTS
+        self.stats_interval = FAKE_ENGINE__STATS_INTERVAL
+        self.stats_samples  = Counter()                     # container id -> one-shot (stream=false) stats entries returned
+        self.exec_handlers  = dict(cat       = self.exec_cat       ,
+                                   echo      = self.exec_echo      ,
+                                   false     = lambda container, args: (1, '', ''),
+                                   find      = self.exec_find      ,
+                                   pwd       = lambda container, args: (0, '/\n', ''),
+                                   sh        = self.exec_sh        ,
+                                   bash      = self.exec_sh        ,
+                                   sha256sum = self.exec_sha256sum ,
+                                   true      = lambda container, args: (0, '', ''))
+        for name, config in (FAKE_ENGINE__IMAGES if images is None else images).items():
+            self.registry_add(name, **config)
+            self.image_add(name, **config)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def api_docker(self):
+        return API_Docker(base_url=self.base_url())
+
+    def base_url(self):
+        return f'unix://{self.socket_path}'
+
+    def event(self, event_type, action, actor_id, attributes=None):
+        with self.changed:
+            time_nano = time_ns()
+            event     = { 'Type'    : event_type                                        ,
+                          'Action'  : action                                            ,
+                          'Actor'   : {'ID': actor_id, 'Attributes': attributes or {}}  ,
+                          'scope'   : 'local'                                           ,
+                          'time'    : time_nano // 10**9                                ,
+                          'timeNano': time_nano                                         }
+            if event_type == 'container':
+                event.update(status=action, id=actor_id, **{'from': (attributes or {}).get('image')})
+            self.events.append(event)
+            self.changed.notify_all()
+            return event
+
+    def registry_add(self, reference, **config):
+        """Makes reference pullable (config are the image_add kwargs of the image the pull adds)"""
+        self.registry[self.image_reference(reference)] = config
+        return self
+
+    def requests_total(self):
+        return sum(self.request_counts.values())
+
+    def start(self):
+        from osbot_docker.helpers.Fake_Docker_Engine__Handler import Fake_Docker_Engine__Handler
+        if self.socket_path is None:
+            self.temp_dir    = tempfile.TemporaryDirectory()
+            self.socket_path = os.path.join(self.temp_dir.name, 'docker.sock')
+        self.server                 = socketserver.ThreadingUnixStreamServer(self.socket_path, Fake_Docker_Engine__Handler)
+        self.server.daemon_threads  = True
+        self.server.engine          = self
+        self.running                = True
+        self.thread                 = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        with self.changed:
+            self.running = False
+            self.changed.notify_all()                       # ends the open events/logs/wait streams
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+            docker_clients.remove(self.base_url())                  # the (shared) clients of this socket can't be reused
+        if os.path.exists(self.socket_path or ''):
+            os.remove(self.socket_path)
+        if self.temp_dir:
+            self.temp_dir.cleanup()
+            self.temp_dir    = None
+            self.socket_path = None
+        return self
+
+    def wait_for_change(self, timeout):
+        """Waits (with the lock held by the caller) for the next event, returns False when the engine is stopping"""
+        self.changed.wait(timeout)
+        return self.running
+
+    # containers
+
+    def container(self, container_ref):
+        """Container by id, id prefix or name (None when there is no match)"""
+        with self.lock:
+            if container_ref in self.containers:
+                return self.containers[container_ref]
+            for container in self.containers.values():
+                if container['Name'] == f'/{container_ref}' or container['Id'].startswith(container_ref):
+                    return container
+            return None
+
+    def container_create(self, config, name=None):
+        with self.lock:
+            image = self.image(config.get('Image'))
+            if image is None:
+                return None
+            container_id = random_id('container', name)
+            name         = name or f'fake_{container_id[:8]}'
+            image_config = image['Config']
+            port_bindings = (config.get('HostConfig') or {}).get('PortBindings') or {}
+            exposed_ports = set(config.get('ExposedPorts') or {}) | set(image_config.get('ExposedPorts') or {}) | set(port_bindings)
+            container = { 'Id'              : container_id                                                          ,
+                          'Name'            : f'/{name}'                                                            ,
+                          'Created'         : now_iso()                                                             ,
+                          'CreatedTime'     : int(time())                                                           ,
+                          'Args'            : (config.get('Cmd') or image_config.get('Cmd') or [])[1:]             ,
+                          'Image'           : image['Id']                                                           ,
+                          'Config'          : { 'Image'       : config.get('Image')                                         ,
+                                                'Cmd'         : config.get('Cmd') or image_config.get('Cmd')                ,
+                                                'Entrypoint'  : config.get('Entrypoint') or image_config.get('Entrypoint')  ,
+                                                'Env'         : (image_config.get('Env') or []) + (config.get('Env') or []) ,
+                                                'ExposedPorts': {port: {} for port in sorted(exposed_ports)}                ,
+                                                'Labels'      : {**(image_config.get('Labels') or {}), **(config.get('Labels') or {})},
+                                                'Tty'         : config.get('Tty') or False                                 ,
+                                                'Volumes'     : config.get('Volumes')                                       ,
+                                                'WorkingDir'  : config.get('WorkingDir') or image_config.get('WorkingDir') or ''},
+                          'HostConfig'      : {'LogConfig': {'Type': 'json-file', 'Config': {}}, 'NetworkMode': 'default', **(config.get('HostConfig') or {})},
+                          'NetworkSettings' : { 'Ports': {port: None for port in sorted(exposed_ports)}}            ,
+                          'State'           : self.container_state('created')                                       ,
+                          'Files'           : dict(image['Files'])                                                  ,
+                          'Logs'            : []                                                                    }       # (stream, bytes, timestamp) tuples
+            self.containers[container_id] = container
+            self.event('container', 'create', container_id, self.container_attributes(container))
+            return container
+
+    def container_attributes(self, container):
+        return {'image': container['Config']['Image'], 'name': container['Name'][1:], **container['Config']['Labels']}
+
+    def container_remove(self, container):
+        with self.lock:
+            self.containers.pop(container['Id'], None)
+            self.event('container', 'destroy', container['Id'], self.container_attributes(container))
+
+    def container_start(self, container):
+        with self.lock:
+            image         = self.image(container['Image']) or {}
+            port_bindings = container['HostConfig'].get('PortBindings') or {}
+            for port, bindings in port_bindings.items():
+                mappings = []
+                for binding in bindings or [{}]:
+                    host_port = (binding or {}).get('HostPort') or ''
+                    if host_port == '':
+                        host_port        = str(self.host_ports)
+                        self.host_ports += 1
+                    mappings.append({'HostIp': (binding or {}).get('HostIp') or '0.0.0.0', 'HostPort': host_port})
+                container['NetworkSettings']['Ports'][port] = mappings
+            container['State'] = self.container_state('running', StartedAt=now_iso())
+            self.event('container', 'start', container['Id'], self.container_attributes(container))
+            if image.get('Output'):
+                self.container_log(container, 1, image['Output'].encode())
+            if image.get('Exits'):
+                self.container_stop(container, exit_code=0)
+            elif not image.get('Output'):
+                self.container_process(container)
+
+    def container_log(self, container, stream, data):
+        container['Logs'].append((stream, data, now_iso()))                 # (the time is used by the logs' timestamps option)
+
+    def container_process(self, container):
+        """Runs the container's command (entrypoint + cmd) when all its commands are in exec_handlers, the others
+           (for example 'sleep') leave the container running until it is stopped or killed"""
+        command = (container['Config']['Entrypoint'] or []) + (container['Config']['Cmd'] or [])
+        if not command or not all(os.path.basename(argv[0]) in self.exec_handlers for argv in self.shell_commands(command)):
+            return
+        exit_code, stdout, stderr = self.exec_command(container, command)
+        for stream, data in ((1, stdout), (2, stderr)):
+            if data:
+                self.container_log(container, stream, data.encode())
+        self.container_stop(container, exit_code=exit_code, action=None)
+
+    def container_state(self, status, exit_code=0, **kwargs):
+        state = dict(Status=status, Running=status == 'running', Paused=False, Restarting=False, OOMKilled=False, Dead=False,
+                     Pid=0, ExitCode=exit_code, Error='', StartedAt='0001-01-01T00:00:00Z', FinishedAt='0001-01-01T00:00:00Z')
+        state.update(kwargs)
+        return state
+
+    def container_stats(self, container, sample):
+        """The sample-th entry of the container's stats stream: a steady 25% of each cpu (i.e. 50% in docker stats),
+           48Mb of memory (plus its files) and network and block IO counters that grow by a fixed amount per sample.
+           The entries of containers that are not running have no cpu and memory data (like the daemon's)"""
+        def cpu_stats(index):
+            return dict(cpu_usage        = dict(total_usage=index * 5 * 10**8, usage_in_kernelmode=0, usage_in_usermode=index * 5 * 10**8),
+                        system_cpu_usage = index * FAKE_ENGINE__STATS_CPUS * 10**9                                                    ,
+                        online_cpus      = FAKE_ENGINE__STATS_CPUS                                                                    ,
+                        throttling_data  = dict(periods=0, throttled_periods=0, throttled_time=0)                                     )
+        stats = dict(read=now_iso(), preread='0001-01-01T00:00:00Z', id=container['Id'], name=container['Name'], pids_stats={}, num_procs=0)
+        if container['State']['Status'] != 'running':
+            return dict(**stats, cpu_stats=dict(cpu_usage=dict(total_usage=0), throttling_data={}), precpu_stats=dict(cpu_usage=dict(total_usage=0), throttling_data={}),
+                        memory_stats={}, blkio_stats=dict(io_service_bytes_recursive=None))
+        files = sum(len(data) for data in container['Files'].values())
+        return dict(**stats                                                                                     ,
+                    cpu_stats    = cpu_stats(sample    )                                                        ,
+                    precpu_stats = cpu_stats(sample - 1)                                                        ,
+                    memory_stats = dict(usage=64 * 2**20 + files, limit=2 * 2**30, stats=dict(inactive_file=16 * 2**20)),
+                    networks     = dict(eth0=dict(rx_bytes=sample * 1500, rx_packets=sample, tx_bytes=sample * 500, tx_packets=sample)),
+                    blkio_stats  = dict(io_service_bytes_recursive=[dict(major=8, minor=0, op='read' , value=sample * 4096),
+                                                                    dict(major=8, minor=0, op='write', value=sample * 8192)]))
+
+    def container_stats_next(self, container):
+        """The next one-shot (stream=false) stats entry of the container, whose counters grow with each request (like the daemon's grow with time)"""
+        with self.lock:
+            self.stats_samples[container['Id']] += 1
+            sample = self.stats_samples[container['Id']]
+        return self.container_stats(container, sample)
+
+    def container_stop(self, container, exit_code=137, action='stop'):
+        with self.lock:
+            if container['State']['Status'] != 'running':
+                return False
+            started_at         = container['State']['StartedAt']
+            container['State'] = self.container_state('exited', exit_code=exit_code, StartedAt=started_at, FinishedAt=now_iso())
+            self.event('container', 'die', container['Id'], {**self.container_attributes(container), 'exitCode': str(exit_code)})
+            if action:
+                self.event('container', action, container['Id'], self.container_attributes(container))
+            return True
+
+    def container_summary(self, container):
+        ports = []
+        for port, mappings in container['NetworkSettings']['Ports'].items():
+            private_port, port_type = port.split('/')
+            for mapping in mappings or [None]:
+                summary = dict(PrivatePort=int(private_port), Type=port_type)
+                if mapping:
+                    summary.update(IP=mapping['HostIp'], PublicPort=int(mapping['HostPort']))
+                ports.append(summary)
+        return { 'Id'       : container['Id']                           ,
+                 'Names'    : [container['Name']]                       ,
+                 'Image'    : container['Config']['Image']              ,
+                 'ImageID'  : container['Image']                        ,
+                 'Command'  : ' '.join(container['Config']['Cmd'] or []),
+                 'Created'  : container['CreatedTime']                  ,
+                 'Ports'    : ports                                     ,
+                 'Labels'   : container['Config']['Labels']             ,
+                 'State'    : container['State']['Status']              ,
+                 'Status'   : container['State']['Status'].capitalize() ,
+                 'HostConfig'     : {'NetworkMode': 'default'}          ,
+                 'NetworkSettings': {'Networks': {}}                    ,
+                 'Mounts'   : []                                        }
+
+    def containers_list(self, all=False, filters=None, limit=-1):
+        with self.lock:
+            containers = sorted(self.containers.values(), key=lambda container: container['Created'], reverse=True)
+            matches    = []
+            for container in containers:
+                if not all and container['State']['Status'] != 'running' and 'status' not in (filters or {}):
+                    continue
+                if self.filters_match(filters, self.container_filter_values(container)):
+                    matches.append(self.container_summary(container))
+            return matches[:limit] if limit and limit > 0 else matches
+
+    def container_filter_values(self, container):
+        """Filter name -> function(value) -> bool, for the container filters supported by the daemon"""
+        labels = container['Config']['Labels']
+        return dict(ancestor = lambda value: self.image(value) is not None and self.image(value)['Id'] == container['Image'],
+                    exited   = lambda value: container['State']['Status'] == 'exited' and str(container['State']['ExitCode']) == value,
+                    id       = lambda value: container['Id'].startswith(value)                                           ,
+                    label    = lambda value: self.label_match(labels, value)                                             ,
+                    name     = lambda value: re.search(value, container['Name']) is not None                            ,
+                    status   = lambda value: container['State']['Status'] == value                                       )
+
+    # images
+
+    def image(self, image_ref):
+        """Image by id, id prefix or reference ('name' means 'name:latest'), None when there is no match"""
+        if not image_ref:
+            return None
+        with self.lock:
+            image_id = image_ref if image_ref.startswith('sha256:') else f'sha256:{image_ref}'
+            if image_id in self.images:
+                return self.images[image_id]
+            reference = self.image_reference(image_ref)
+            for image in self.images.values():
+                if reference in image['RepoTags']:
+                    return image
+            if re.fullmatch(r'(sha256:)?[0-9a-f]{6,64}', image_ref):
+                for image in self.images.values():
+                    if image['Id'].startswith(image_id):
+                        return image
+            return None
+
+    def image_add(self, reference, labels=None, output='', exits=False, cmd=None, entrypoint=None, env=None, working_dir='', files=None, exposed_ports=None, parent=''):
+        """Adds an image to the engine (the behaviour of its containers is set by output and exits, or by their command)"""
+        if not (cmd or entrypoint or output):
+            cmd = list(FAKE_ENGINE__IMAGE_CMD)
+        with self.lock:
+            reference = reference and self.image_reference(reference)                   # images committed without a repository are untagged
+            image_id  = f'sha256:{random_id("image", reference)}'
+            if reference:
+                self.image_untag(reference)
+            self.images[image_id] = { 'Id'           : image_id                                                     ,
+                                      'RepoTags'     : [reference] if reference else []                             ,
+                                      'RepoDigests'  : []                                                           ,
+                                      'Parent'       : parent                                                       ,
+                                      'Created'      : now_iso()                                                    ,
+                                      'CreatedTime'  : int(time())                                                  ,
+                                      'Architecture' : 'amd64'                                                      ,
+                                      'Os'           : 'linux'                                                      ,
+                                      'Size'         : sum(len(data) for data in (files or {}).values())            ,
+                                      'Config'       : { 'Cmd'          : cmd                                       ,
+                                                         'Entrypoint'   : entrypoint                                ,
+                                                         'Env'          : env or []                                 ,
+                                                         'ExposedPorts' : {port: {} for port in exposed_ports or []},
+                                                         'Labels'       : labels or {}                              ,
+                                                         'WorkingDir'   : working_dir                               },
+                                      'Files'        : dict(files or {})                                            ,
+                                      'Output'       : output                                                       ,
+                                      'Exits'        : exits                                                        }
+            if reference:
+                self.event('image', 'tag', image_id, {'name': reference})
+            return self.images[image_id]
+
+    def image_reference(self, image_ref):
+        if ':' in image_ref.split('/')[-1] or image_ref.startswith('sha256:'):
+            return image_ref
+        return f'{image_ref}:latest'
+
+    def image_summary(self, image):
+        return { 'Id'          : image['Id']                            ,
+                 'ParentId'    : image['Parent']                        ,
+                 'RepoTags'    : image['RepoTags'] or ['<none>:<none>'] ,
+                 'RepoDigests' : image['RepoDigests']                   ,
+                 'Created'     : image['CreatedTime']                   ,
+                 'Size'        : image['Size']                          ,
+                 'SharedSize'  : -1                                     ,
+                 'Labels'      : image['Config']['Labels']              ,
+                 'Containers'  : -1                                     }
+
+    def image_untag(self, reference):
+        """Removes reference from the image that has it (which becomes dangling when it has no other tags)"""
+        for image in self.images.values():
+            if reference in image['RepoTags']:
+                image['RepoTags'].remove(reference)
+                self.event('image', 'untag', image['Id'], {'name': reference})
+
+    def images_list(self, all=False, filters=None):
+        with self.lock:
+            images = sorted(self.images.values(), key=lambda image: image['Created'], reverse=True)
+            return [self.image_summary(image) for image in images
+                    if (all or image['RepoTags'] or not image['Parent']) and self.filters_match(filters, self.image_filter_values(image))]
+
+    def image_filter_values(self, image):
+        def reference(value):
+            for tag in image['RepoTags']:
+                name = tag.rsplit(':', 1)[0]
+                if fnmatch.fnmatchcase(tag, value) or fnmatch.fnmatchcase(name, value):
+                    return True
+            return False
+        return dict(dangling  = lambda value: (len(image['RepoTags']) == 0) == (value.lower() in ('true', '1')),
+                    label     = lambda value: self.label_match(image['Config']['Labels'], value)               ,
+                    reference = reference                                                                        )
+
+    # filters
+
+    def filters_match(self, filters, filter_values):
+        """The daemon's filter semantics: values of the same filter are ORed (labels are ANDed) and different filters are ANDed"""
+        for key, values in (filters or {}).items():
+            if type(values) is dict:                            # the older {"key": {"value": true}} format
+                values = [value for value, enabled in values.items() if enabled]
+            if key not in filter_values:
+                raise ValueError(f"invalid filter '{key}'")
+            check = filter_values[key]
+            if key == 'label':
+                if not all(check(value) for value in values):
+                    return False
+            elif not any(check(value) for value in values):
+                return False
+        return True
+
+    def label_match(self, labels, value):
+        if '=' in value:
+            key, expected = value.split('=', 1)
+            return labels.get(key) == expected
+        return value in labels
+
+    # exec
+
+    def exec_cat(self, container, args):
+        stdout, stderr, exit_code = '', '', 0
+        for path in args:
+            if path in container['Files']:
+                stdout += container['Files'][path].decode('utf-8', errors='replace')
+            else:
+                stderr    += f'cat: {path}: No such file or directory\n'
+                exit_code  = 1
+        return exit_code, stdout, stderr
+
+    def exec_command(self, container, command):
+        """Runs command (list or string) with the exec_handlers, returns (exit_code, stdout, stderr)"""
+        if type(command) is str:
+            command = shlex.split(command)
+        if not command:
+            return 126, '', 'no command\n'
+        handler = self.exec_handlers.get(os.path.basename(command[0]))
+        if handler is None:
+            return 127, '', f'OCI runtime exec failed: exec: "{command[0]}": executable file not found in $PATH\n'
+        return handler(container, command[1:])
+
+    def exec_echo(self, container, args):
+        return 0, ' '.join(args) + '\n', ''
+
+    def exec_find(self, container, args):
+        """find <path> [-type f] [-exec sha256sum {} +]"""
+        path   = args[0].rstrip('/') if args else '.'
+        files  = sorted(file for file in container['Files'] if file == path or file.startswith(f'{path}/'))
+        if not files:
+            return 1, '', f"find: '{path}': No such file or directory\n"
+        if '-exec' in args:
+            return self.exec_command(container, [arg for arg in args[args.index('-exec') + 1:] if arg not in ('{}', '+', ';')] + files)
+        return 0, ''.join(f'{file}\n' for file in files), ''
+
+    def exec_sh(self, container, args):
+        """sh -c 'command_a ; command_b && command_c' (only ; and && are supported)"""
+        if args[:1] != ['-c'] or len(args) < 2:
+            return 2, '', 'sh: only "sh -c <script>" is supported\n'
+        stdout, stderr, exit_code = '', '', 0
+        for operator, argv in self.shell_script(args[1]):
+            if operator == '&&' and exit_code != 0:
+                break
+            exit_code, command_stdout, command_stderr = self.exec_command(container, argv)
+            stdout += command_stdout
+            stderr += command_stderr
+        return exit_code, stdout, stderr
+
+    def shell_commands(self, command):
+        """All the argv lists that command would run (the ones inside 'sh -c' scripts included)"""
+        if os.path.basename(command[0]) in ('sh', 'bash') and command[1:2] == ['-c'] and len(command) > 2:
+            return [command[:1]] + [argv for _, argv in self.shell_script(command[2])]
+        return [command]
+
+    def shell_script(self, script):
+        """(operator, argv) tuples of the script's commands, operator is the ; or && before each command"""
+        lexer                    = shlex.shlex(script, posix=True, punctuation_chars=';&')
+        lexer.whitespace_split   = True
+        commands, operator, argv = [], ';', []
+        for token in lexer:
+            if token in (';', '&&'):
+                if argv:
+                    commands.append((operator, argv))
+                operator, argv = token, []
+            else:
+                argv.append(token)
+        if argv:
+            commands.append((operator, argv))
+        return commands
+
+    def exec_sha256sum(self, container, args):
+        stdout, stderr, exit_code = '', '', 0
+        for path in args:
+            if path == '--':
+                continue
+            if path in container['Files']:
+                stdout += f"{hashlib.sha256(container['Files'][path]).hexdigest()}  {path}\n"
+            else:
+                stderr    += f'sha256sum: {path}: No such file or directory\n'
+                exit_code  = 1
+        return exit_code, stdout, stderr
+
+    # archives
+
+    def archive_get(self, container, path):
+        """(tar bytes, stat) of path (a file or a folder) in the container, None when path doesn't exist"""
+        path  = path.rstrip('/') or '/'
+        files = {file: data for file, data in container['Files'].items() if file == path or file.startswith(f'{path.rstrip("/")}/')}
+        if not files:
+            return None
+        parent = os.path.dirname(path)
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode='w') as tar:
+            folders = set()
+            for file, data in sorted(files.items()):
+                arcname = os.path.relpath(file, parent)
+                for index in range(1, arcname.count('/') + 1):
+                    folder = '/'.join(arcname.split('/')[:index])
+                    if folder not in folders:
+                        folders.add(folder)
+                        tar.addfile(self.tar_info(folder, tarfile.DIRTYPE))
+                tar_info      = self.tar_info(arcname, tarfile.REGTYPE)
+                tar_info.size = len(data)
+                tar.addfile(tar_info, io.BytesIO(data))
+        is_folder = path not in files
+        stat      = dict(name=os.path.basename(path), size=0 if is_folder else len(files[path]), mode=(0o20000000000 | 0o755) if is_folder else 0o644,
+                         mtime=now_iso(), linkTarget='')
+        return buffer.getvalue(), stat
+
+    def archive_put(self, container, path, tar_bytes):
+        with tarfile.open(fileobj=io.BytesIO(tar_bytes), mode='r:*') as tar:
+            for member in tar:
+                if member.isfile():
+                    container['Files'][os.path.normpath(os.path.join(path, member.name))] = tar.extractfile(member).read()
+
+    def tar_info(self, name, tar_type):
+        tar_info       = tarfile.TarInfo(name)
+        tar_info.type  = tar_type
+        tar_info.mode  = 0o755 if tar_type == tarfile.DIRTYPE else 0o644
+        tar_info.mtime = int(time())
+        return tar_info
+
+    # build
+
+    def build(self, context_bytes, tag=None, labels=None, dockerfile='Dockerfile', nocache=False):
+        """Yields the classic builder's output (as dicts) while 'building' the Dockerfile in the context tar"""
+        with tarfile.open(fileobj=io.BytesIO(context_bytes), mode='r:*') as tar:
+            files = {os.path.normpath(member.name): tar.extractfile(member).read() for member in tar if member.isfile()}
+        if dockerfile not in files:
+            yield {'error': f'Cannot locate specified Dockerfile: {dockerfile}', 'errorDetail': {'message': f'Cannot locate specified Dockerfile: {dockerfile}'}}
+            return
+        instructions = self.dockerfile_instructions(files[dockerfile].decode())
+        config       = dict(labels={}, cmd=None, entrypoint=None, env=[], working_dir='', files={}, exposed_ports=[])
+        layer_id     = ''
+        for index, (line_number, instruction, arguments) in enumerate(instructions, start=1):
+            yield {'stream': f'Step {index}/{len(instructions)} : {instruction} {arguments}\n'}
+            if self.latency:
+                sleep(self.latency)
+            error = self.build_step(config, instruction, arguments, files)
+            if error:
+                message = f'dockerfile parse error line {line_number}: {error}'
+                yield {'error': message, 'errorDetail': {'message': message}}
+                return
+            step_key = f'{layer_id}{instruction}{arguments}'
+            if instruction in ('COPY', 'ADD'):
+                step_key += ''.join(f'{path}{hashlib.sha256(data).hexdigest()}' for path, data in sorted(config['files'].items()))
+            cache_key = hashlib.sha256(step_key.encode()).hexdigest()
+            if not nocache and f'sha256:{cache_key}' in self.images:
+                yield {'stream': ' ---> Using cache\n'}
+            elif instruction == 'RUN':
+                yield {'stream': f' ---> Running in {random_id("run")[:12]}\n'}
+            with self.lock:
+                self.images.setdefault(f'sha256:{cache_key}', self.image_layer(cache_key, layer_id, config))
+            layer_id = cache_key
+            yield {'stream': f' ---> {cache_key[:12]}\n'}
+        config['labels'].update(labels or {})
+        image = self.image_add(tag, **config) if tag else self.images[f'sha256:{layer_id}']
+        yield {'aux': {'ID': image['Id']}}
+        yield {'stream': f"Successfully built {image['Id'][7:19]}\n"}
+        if tag:
+            yield {'stream': f'Successfully tagged {self.image_reference(tag)}\n'}
+
+    def pull_error(self, reference):
+        """The daemon's error for a pull of reference that the registry doesn't have (None when it has it)"""
+        reference = self.image_reference(reference)
+        name      = reference.split('@')[0] if '@' in reference else reference.rsplit(':', 1)[0]
+        if reference in self.registry and reference not in self.unpullable:
+            return None
+        if any(known.rsplit(':', 1)[0] == name for known in self.registry):
+            return f'manifest for {reference} not found: manifest unknown: manifest unknown'
+        return (f"pull access denied for {name}, repository does not exist or may require 'docker login': denied: "
+                f"requested access to the resource is denied")
+
+    def pull(self, reference):
+        """Yields the daemon's pull output (as dicts) while 'downloading' the image's two layers: one shared by all
+           images (reported as 'Already exists' once the engine has it) and one specific to the image"""
+        name     = reference.rsplit(':', 1)[0] if '@' not in reference else reference.split('@')[0]
+        base_id  = hashlib.sha256(b'fake-base-layer').hexdigest()[:12]
+        image_id = hashlib.sha256(name.encode()).hexdigest()[:12]
+        yield {'status': f'Pulling from {name}', 'id': reference.split('@')[-1].rsplit(':', 1)[-1]}
+        for layer_id in (base_id, image_id):
+            with self.lock:
+                exists = layer_id in self.layers
+                self.layers.add(layer_id)
+            if exists:
+                yield {'status': 'Already exists', 'progressDetail': {}, 'id': layer_id}
+                continue
+            yield {'status': 'Pulling fs layer', 'progressDetail': {}, 'id': layer_id}
+            for step in range(1, FAKE_ENGINE__LAYER_STEPS + 1):
+                if self.latency:
+                    sleep(self.latency)
+                current = FAKE_ENGINE__LAYER_SIZE * step // FAKE_ENGINE__LAYER_STEPS
+                yield {'status': 'Downloading', 'progressDetail': {'current': current, 'total': FAKE_ENGINE__LAYER_SIZE}, 'id': layer_id}
+            yield {'status': 'Download complete', 'progressDetail': {}, 'id': layer_id}
+            yield {'status': 'Pull complete'    , 'progressDetail': {}, 'id': layer_id}
+        if self.image(reference) is None:
+            self.image_add(reference, **self.registry.get(self.image_reference(reference), {}))
+            status = f'Status: Downloaded newer image for {reference}'
+        else:
+            status = f'Status: Image is up to date for {reference}'
+        yield {'status': f'Digest: sha256:{random_id(reference)}'}
+        yield {'status': status}
+
+    def build_step(self, config, instruction, arguments, files):
+        if instruction == 'FROM':
+            base = arguments.split()[0]
+            if base != 'scratch' and self.image(base) is None:
+                error = self.pull_error(base)
+                if error:
+                    return error
+                self.image_add(base, **self.registry[self.image_reference(base)])          # 'pulls' the base image
+        elif instruction == 'LABEL':
+            for item in shlex.split(arguments):
+                key, _, value = item.partition('=')
+                config['labels'][key] = value
+        elif instruction == 'ENV':
+            config['env'].append('='.join(arguments.split('=', 1)) if '=' in arguments else '='.join(arguments.split(None, 1)))
+        elif instruction == 'WORKDIR':
+            config['working_dir'] = arguments
+        elif instruction == 'EXPOSE':
+            config['exposed_ports'] += [port if '/' in port else f'{port}/tcp' for port in arguments.split()]
+        elif instruction in ('CMD', 'ENTRYPOINT'):
+            value = json.loads(arguments) if arguments.startswith('[') else ['/bin/sh', '-c', arguments]
+            config['cmd' if instruction == 'CMD' else 'entrypoint'] = value
+        elif instruction in ('COPY', 'ADD'):
+            *sources, target = shlex.split(arguments)
+            for source in sources:
+                source = os.path.normpath(source)
+                for file, data in files.items():
+                    if source == '.' or file == source or file.startswith(f'{source}/'):
+                        relative = os.path.basename(file) if file == source else os.path.relpath(file, source)
+                        config['files'][os.path.normpath(os.path.join(target, relative))] = data
+        elif instruction not in ('RUN', 'ARG', 'USER', 'VOLUME', 'SHELL', 'HEALTHCHECK', 'STOPSIGNAL', 'ONBUILD', 'MAINTAINER'):
+            return f'unknown instruction: {instruction}'
+
+    def image_layer(self, layer_id, parent_id, config):
+        """Untagged image with the config after a build step (also used as the build cache)"""
+        return { 'Id'          : f'sha256:{layer_id}'                                         ,
+                 'RepoTags'    : []                                                          ,
+                 'RepoDigests' : []                                                          ,
+                 'Created'     : now_iso()                                                   ,
+                 'CreatedTime' : int(time())                                                 ,
+                 'Architecture': 'amd64'                                                     ,
+                 'Os'          : 'linux'                                                     ,
+                 'Size'        : 0                                                           ,
+                 'Config'      : { 'Cmd'          : config['cmd']                             ,
+                                   'Entrypoint'   : config['entrypoint']                      ,
+                                   'Env'          : list(config['env'])                       ,
+                                   'ExposedPorts' : {}                                        ,
+                                   'Labels'       : dict(config['labels'])                    ,
+                                   'WorkingDir'   : config['working_dir']                     },
+                 'Files'       : dict(config['files'])                                       ,
+                 'Output'      : ''                                                          ,
+                 'Exits'       : False                                                       ,
+                 'Parent'      : parent_id and f'sha256:{parent_id}'                         }
+
+    def dockerfile_instructions(self, dockerfile):
+        """(line number, INSTRUCTION, arguments) tuples (comments removed and continuation lines joined)"""
+        instructions = []
+        pending      = ''
+        start_line   = 0
+        for line_number, line in enumerate(dockerfile.splitlines(), start=1):
+            stripped = line.strip()
+            if not pending and (not stripped or stripped.startswith('#')):
+                continue
+            if not pending:
+                start_line = line_number
+            if stripped.endswith('\\'):
+                pending += stripped[:-1] + ' '
+                continue
+            instruction, _, arguments = (pending + stripped).partition(' ')
+            instructions.append((start_line, instruction.upper(), arguments.strip()))
+            pending = ''
+        return instructions
@@ -0,0 +1,529 @@
+import base64
+import json
+import re
+import struct
+from http.server                                    import BaseHTTPRequestHandler
+from time                                           import sleep, time
+from urllib.parse                                   import parse_qs, urlparse, unquote
+
+from osbot_docker.helpers.Fake_Docker_Engine        import FAKE_ENGINE__API_VERSION, random_id
+
+EXEC__HIJACK_DELAY  = 0.01                  # pause between the 101 headers and the exec output, so that the client has read the headers before the raw stream starts
+ROUTES              = [ ('GET'   , r'/_ping'                             , 'ping'              ),
+                        ('HEAD'  , r'/_ping'                             , 'ping'              ),
+                        ('GET'   , r'/version'                           , 'version'           ),
+                        ('GET'   , r'/info'                              , 'info'              ),
+                        ('GET'   , r'/events'                            , 'events'            ),
+                        ('GET'   , r'/containers/json'                   , 'containers_list'   ),
+                        ('POST'  , r'/containers/create'                 , 'container_create'  ),
+                        ('GET'   , r'/containers/(?P<id>[^/]+)/json'     , 'container_inspect' ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/start'    , 'container_start'   ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/stop'     , 'container_stop'    ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/kill'     , 'container_kill'    ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/wait'     , 'container_wait'    ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/attach'   , 'container_attach'  ),
+                        ('GET'   , r'/containers/(?P<id>[^/]+)/logs'     , 'container_logs'    ),
+                        ('GET'   , r'/containers/(?P<id>[^/]+)/stats'    , 'container_stats'   ),
+                        ('GET'   , r'/containers/(?P<id>[^/]+)/archive'  , 'archive_get'       ),
+                        ('HEAD'  , r'/containers/(?P<id>[^/]+)/archive'  , 'archive_stat'      ),
+                        ('PUT'   , r'/containers/(?P<id>[^/]+)/archive'  , 'archive_put'       ),
+                        ('POST'  , r'/containers/(?P<id>[^/]+)/exec'     , 'exec_create'       ),
+                        ('DELETE', r'/containers/(?P<id>[^/]+)'          , 'container_remove'  ),
+                        ('POST'  , r'/exec/(?P<id>[^/]+)/start'          , 'exec_start'        ),
+                        ('POST'  , r'/exec/(?P<id>[^/]+)/resize'         , 'exec_resize'       ),
+                        ('GET'   , r'/exec/(?P<id>[^/]+)/json'           , 'exec_inspect'      ),
+                        ('GET'   , r'/images/json'                       , 'images_list'       ),
+                        ('POST'  , r'/images/create'                     , 'image_pull'        ),
+                        ('GET'   , r'/images/(?P<name>.+)/json'          , 'image_inspect'     ),
+                        ('POST'  , r'/images/(?P<name>.+)/tag'           , 'image_tag'         ),
+                        ('DELETE', r'/images/(?P<name>.+)'               , 'image_remove'      ),
+                        ('POST'  , r'/build'                             , 'build'             ),
+                        ('POST'  , r'/commit'                            , 'commit'            )]
+ROUTES__COMPILED    = [(method, re.compile(f'^{pattern}$'), name) for method, pattern, name in ROUTES]
+REGEX__API_VERSION  = re.compile(r'^/v[\d.]+(/.*)$')
+
+
+class Fake_Docker_Engine__Handler(BaseHTTPRequestHandler):
+    """HTTP handler of the Fake_Docker_Engine (one instance per connection, the routes use the engine's state)"""
+
+    protocol_version = 'HTTP/1.1'                                   # keep-alive, like the real daemon
+
+    def do_DELETE(self): self.dispatch('DELETE')
+    def do_GET   (self): self.dispatch('GET'   )
+    def do_HEAD  (self): self.dispatch('HEAD'  )
+    def do_POST  (self): self.dispatch('POST'  )
+    def do_PUT   (self): self.dispatch('PUT'   )
+
+    def dispatch(self, method):
+        self.engine = self.server.engine
+        url         = urlparse(self.path)
+        path        = unquote(url.path)
+        match       = REGEX__API_VERSION.match(path)
+        if match:
+            path = match.group(1)
+        self.params = {key: values[-1] for key, values in parse_qs(url.query, keep_blank_values=True).items()}
+        self.body   = self.read_request_body()                     # always read (so that the connection can be reused, whatever the route does)
+        for route_method, regex, name in ROUTES__COMPILED:
+            route_match = regex.match(path)
+            if route_method == method and route_match:
+                with self.engine.lock:
+                    self.engine.request_counts[(method, name)] += 1
+                if self.engine.latency:
+                    sleep(self.engine.latency)
+                try:
+                    return getattr(self, f'route__{name}')(**route_match.groupdict())
+                except ValueError as error:
+                    return self.send_error_json(400, f'{error}')
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True
+                    return
+                except Exception as error:                          # like the daemon, unexpected errors are returned as 500s
+                    return self.send_error_json(500, f'{type(error).__name__}: {error}')
+        self.send_error_json(404, 'page not found')
+
+    def log_message(self, format, *args):                          # the default logs to stderr (and uses client_address, which is empty for unix sockets)
+        pass
+
+    # helpers
+
+    def frame(self, stream, data, tty=False):
+        if tty:
+            return data
+        return struct.pack('>BxxxL', stream, len(data)) + data
+
+    def param_bool(self, name, default=False):
+        value = self.params.get(name)
+        if value is None:
+            return default
+        return value.lower() in ('1', 'true', 'yes')
+
+    def param_json(self, name, default=None):
+        value = self.params.get(name)
+        return json.loads(value) if value else default
+
+    def read_body(self):
+        return self.body
+
+    def read_request_body(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            body = bytearray()
+            while True:
+                size = int(self.rfile.readline().split(b';')[0].strip() or b'0', 16)
+                if size == 0:
+                    self.rfile.readline()                           # the empty line after the last chunk
+                    return bytes(body)
+                body += self.rfile.read(size)
+                self.rfile.readline()
+        length = int(self.headers.get('Content-Length') or 0)
+        return self.rfile.read(length) if length else b''
+
+    def read_json(self):
+        body = self.read_body()
+        return json.loads(body) if body else {}
+
+    def send_chunk(self, data):
+        if data:
+            self.wfile.write(f'{len(data):x}\r\n'.encode() + data + b'\r\n')
+            self.wfile.flush()
+
+    def send_chunks_end(self):
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+    def send_chunks_start(self, content_type='application/json', status=200):
+        self.send_response(status)
+        self.send_header('Content-Type'     , content_type)
+        self.send_header('Transfer-Encoding', 'chunked'   )
+        self.end_headers()
+
+    def send_bytes(self, data, status=200, content_type='application/json', headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status in (204, 304):
+            self.end_headers()
+            return
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(data)
+
+    def send_error_json(self, status, message):
+        self.send_json({'message': message}, status=status)
+
+    def send_json(self, data, status=200):
+        self.send_bytes(json.dumps(data).encode(), status=status)
+
+    def send_json_lines(self, items):
+        self.send_chunks_start()
+        for item in items:
+            self.send_chunk(json.dumps(item).encode() + b'\r\n')
+        self.send_chunks_end()
+
+    def with_container(self, container_id):
+        container = self.engine.container(container_id)
+        if container is None:
+            self.send_error_json(404, f'No such container: {container_id}')
+        return container
+
+    # routes: system
+
+    def route__events(self):
+        since    = float(self.params.get('since') or time())
+        until    = self.params.get('until')
+        until    = float(until) if until else None
+        filters  = self.param_json('filters', {})
+        index    = 0
+        self.send_chunks_start()
+        while self.engine.running:
+            with self.engine.changed:
+                if index == len(self.engine.events):
+                    timeout = 1 if until is None else min(1, until - time())
+                    if timeout > 0:
+                        self.engine.wait_for_change(timeout)
+                events = self.engine.events[index:]
+                index  = len(self.engine.events)
+            for event in events:                                    # sent without holding the lock (the client could be slow)
+                if event['timeNano'] / 10**9 >= since and (until is None or event['time'] <= until) and self.event_match(event, filters):
+                    self.send_chunk(json.dumps(event).encode() + b'\n')
+            if until is not None and time() >= until:
+                break
+        self.send_chunks_end()
+
+    def event_match(self, event, filters):
+        attributes = event['Actor']['Attributes']
+        checks     = dict(container = lambda value: event['Type'] == 'container' and (event['Actor']['ID'].startswith(value) or attributes.get('name') == value),
+                          event     = lambda value: event['Action'] == value                                                                            ,
+                          image     = lambda value: attributes.get('image') == value or attributes.get('name') == value                                 ,
+                          label     = lambda value: self.engine.label_match(attributes, value)                                                          ,
+                          type      = lambda value: event['Type'] == value                                                                              )
+        return self.engine.filters_match(filters, checks)
+
+    def route__info(self):
+        with self.engine.lock:
+            containers = list(self.engine.containers.values())
+            self.send_json({ 'ID'                : 'fake-docker-engine'                                         ,
+                             'Containers'        : len(containers)                                              ,
+                             'ContainersRunning' : sum(c['State']['Status'] == 'running' for c in containers)   ,
+                             'ContainersStopped' : sum(c['State']['Status'] != 'running' for c in containers)   ,
+                             'Images'            : len(self.engine.images)                                      ,
+                             'KernelMemory'      : True                                                         ,
+                             'OperatingSystem'   : 'Fake Docker Engine'                                         ,
+                             'ServerVersion'     : f'fake-{FAKE_ENGINE__API_VERSION}'                            })
+
+    def route__ping(self):
+        self.send_bytes(b'OK', content_type='text/plain', headers={'Api-Version': FAKE_ENGINE__API_VERSION})
+
+    def route__version(self):
+        self.send_json({ 'ApiVersion'    : FAKE_ENGINE__API_VERSION         ,
+                         'MinAPIVersion' : '1.12'                           ,
+                         'Version'       : f'fake-{FAKE_ENGINE__API_VERSION}',
+                         'Os'            : 'linux'                          ,
+                         'Arch'          : 'amd64'                          ,
+                         'KernelVersion' : 'fake'                           })
+
+    # routes: containers
+
+    def route__container_attach(self, id):
+        """Output only (no stdin): streams the container's logs over the hijacked connection until the container exits"""
+        container = self.with_container(id)
+        if container is None:
+            return
+        streams  = {1} if self.param_bool('stdout') else set()
+        streams |= {2} if self.param_bool('stderr') else set()
+        tty      = container['Config']['Tty']
+        sent     = 0 if self.param_bool('logs') else len(container['Logs'])
+        self.close_connection = True
+        self.wfile.write(b'HTTP/1.1 101 UPGRADED\r\nContent-Type: application/vnd.docker.raw-stream\r\nConnection: Upgrade\r\nUpgrade: tcp\r\n\r\n')
+        self.wfile.flush()
+        sleep(EXEC__HIJACK_DELAY)
+        while self.engine.running:
+            with self.engine.changed:
+                new_logs = container['Logs'][sent:]
+                sent     = len(container['Logs'])
+                done     = container['State']['Status'] not in ('created', 'running') or container['Id'] not in self.engine.containers
+                if not new_logs and not done:
+                    self.engine.wait_for_change(timeout=1)
+                    continue
+            for stream, data, _ in new_logs:
+                if stream in streams:
+                    self.wfile.write(self.frame(stream, data, tty))
+            self.wfile.flush()
+            if done:
+                break
+
+    def route__container_create(self):
+        config    = self.read_json()
+        container = self.engine.container_create(config, name=self.params.get('name'))
+        if container is None:
+            return self.send_error_json(404, f"No such image: {config.get('Image')}")
+        self.send_json({'Id': container['Id'], 'Warnings': []}, status=201)
+
+    def route__container_inspect(self, id):
+        container = self.with_container(id)
+        if container:
+            self.send_json({key: value for key, value in container.items() if key not in ('Files', 'Logs', 'CreatedTime')})
+
+    def route__container_kill(self, id):
+        container = self.with_container(id)
+        if container:
+            if self.engine.container_stop(container, exit_code=137, action='kill') is False:
+                return self.send_error_json(409, f'Container {id} is not running')
+            self.send_bytes(b'', status=204)
+
+    def route__container_logs(self, id):
+        container = self.with_container(id)
+        if container is None:
+            return
+        streams  = {1} if self.param_bool('stdout') else set()
+        streams |= {2} if self.param_bool('stderr') else set()
+        tty      = container['Config']['Tty']
+        tail     = self.params.get('tail', 'all')
+        follow   = self.param_bool('follow')
+        stamps   = self.param_bool('timestamps')
+
+        def lines(entries):                                                 # one frame per line (prefixed with its RFC3339 time, with timestamps)
+            return [(stream, f'{timestamp} '.encode() + line if stamps else line) for stream, data, timestamp in entries if stream in streams
+                                                                                  for line in data.splitlines(keepends=True)]
+        with self.engine.lock:
+            logs = lines(container['Logs'])
+            sent = len(container['Logs'])
+        if tail not in ('all', '', None) and int(tail) >= 0:
+            logs = logs[len(logs) - int(tail):] if int(tail) else []
+        self.send_chunks_start('application/vnd.docker.raw-stream' if tty else 'application/vnd.docker.multiplexed-stream')
+        for stream, data in logs:
+            self.send_chunk(self.frame(stream, data, tty))
+        while follow and self.engine.running:
+            with self.engine.changed:
+                if container['State']['Status'] != 'running' or container['Id'] not in self.engine.containers:
+                    break
+                self.engine.wait_for_change(timeout=1)
+                new_logs = lines(container['Logs'][sent:])
+                sent     = len(container['Logs'])
+            for stream, data in new_logs:
+                self.send_chunk(self.frame(stream, data, tty))
+        self.send_chunks_end()
+
+    def route__container_remove(self, id):
+        container = self.with_container(id)
+        if container is None:
+            return
+        if container['State']['Status'] == 'running':
+            if not self.param_bool('force'):
+                return self.send_error_json(409, f'You cannot remove a running container {container["Id"]}. Stop the container before attempting removal or force remove')
+            self.engine.container_stop(container, action='kill')
+        self.engine.container_remove(container)
+        self.send_bytes(b'', status=204)
+
+    def route__container_start(self, id):
+        container = self.with_container(id)
+        if container:
+            if container['State']['Status'] == 'running':
+                return self.send_bytes(b'', status=304)
+            self.engine.container_start(container)
+            self.send_bytes(b'', status=204)
+
+    def route__container_stats(self, id):
+        """One entry every stats_interval seconds until the container stops (only the next one when stream is false)"""
+        container = self.with_container(id)
+        if container is None:
+            return
+        if not self.param_bool('stream', default=True):
+            return self.send_json(self.engine.container_stats_next(container))
+        self.send_chunks_start()
+        sample = 1
+        while self.engine.running:
+            self.send_chunk(json.dumps(self.engine.container_stats(container, sample)).encode() + b'\n')
+            with self.engine.changed:
+                deadline = time() + self.engine.stats_interval
+                while container['State']['Status'] == 'running' and time() < deadline and self.engine.wait_for_change(deadline - time()):
+                    pass
+                if container['State']['Status'] != 'running':
+                    break
+            sample += 1
+        self.send_chunks_end()
+
+    def route__container_stop(self, id):
+        container = self.with_container(id)
+        if container:
+            if self.engine.container_stop(container, exit_code=0) is False:
+                return self.send_bytes(b'', status=304)
+            self.send_bytes(b'', status=204)
+
+    def route__container_wait(self, id):
+        container = self.with_container(id)
+        if container is None:
+            return
+        with self.engine.changed:
+            while container['State']['Status'] == 'running' and self.engine.wait_for_change(timeout=1):
+                pass
+        self.send_json({'StatusCode': container['State']['ExitCode'], 'Error': None})
+
+    def route__containers_list(self):
+        containers = self.engine.containers_list(all     = self.param_bool('all')              ,
+                                                 filters = self.param_json('filters')           ,
+                                                 limit   = int(self.params.get('limit') or -1)  )
+        self.send_json(containers)
+
+    # routes: archives
+
+    def archive_stat_header(self, stat):
+        return {'X-Docker-Container-Path-Stat': base64.b64encode(json.dumps(stat).encode()).decode()}
+
+    def route__archive_get(self, id):
+        container = self.with_container(id)
+        if container is None:
+            return
+        archive = self.engine.archive_get(container, self.params.get('path', '/'))
+        if archive is None:
+            return self.send_error_json(404, f"Could not find the file {self.params.get('path')} in container {id}")
+        tar_bytes, stat = archive
+        self.send_bytes(tar_bytes, content_type='application/x-tar', headers=self.archive_stat_header(stat))
+
+    def route__archive_put(self, id):
+        body      = self.read_body()
+        container = self.with_container(id)
+        if container:
+            self.engine.archive_put(container, self.params.get('path', '/'), body)
+            self.send_bytes(b'', status=200)
+
+    def route__archive_stat(self, id):
+        container = self.with_container(id)
+        if container:
+            archive = self.engine.archive_get(container, self.params.get('path', '/'))
+            if archive is None:
+                return self.send_bytes(b'', status=404)
+            self.send_bytes(b'', headers=self.archive_stat_header(archive[1]))
+
+    # routes: exec
+
+    def route__exec_create(self, id):
+        config    = self.read_json()
+        container = self.with_container(id)
+        if container is None:
+            return
+        if container['State']['Status'] != 'running':
+            return self.send_error_json(409, f'Container {container["Id"]} is not running')
+        exec_id = random_id('exec')
+        with self.engine.lock:
+            self.engine.execs[exec_id] = dict(ID=exec_id, ContainerID=container['Id'], Running=False, ExitCode=None, Pid=0,
+                                              ProcessConfig=dict(entrypoint=(config.get('Cmd') or [''])[0], arguments=(config.get('Cmd') or [])[1:], tty=config.get('Tty', False)),
+                                              Config=config)
+        self.send_json({'Id': exec_id}, status=201)
+
+    def route__exec_inspect(self, id):
+        exec_data = self.engine.execs.get(id)
+        if exec_data is None:
+            return self.send_error_json(404, f'No such exec instance: {id}')
+        self.send_json({key: value for key, value in exec_data.items() if key != 'Config'})
+
+    def route__exec_resize(self, id):
+        self.send_bytes(b'', status=200)
+
+    def route__exec_start(self, id):
+        self.read_body()
+        exec_data = self.engine.execs.get(id)
+        if exec_data is None:
+            return self.send_error_json(404, f'No such exec instance: {id}')
+        container = self.engine.container(exec_data['ContainerID'])
+        config    = exec_data['Config']
+        exit_code, stdout, stderr = self.engine.exec_command(container, config.get('Cmd'))
+        exec_data.update(ExitCode=exit_code, Running=False)
+        tty    = config.get('Tty', False)
+        output = b''
+        if stdout and config.get('AttachStdout', True):
+            output += self.frame(1, stdout.encode(), tty)
+        if stderr and config.get('AttachStderr', True):
+            output += self.frame(2, stderr.encode(), tty)
+        self.close_connection = True                                # like the daemon, the output is sent over the hijacked connection (which is then closed)
+        if self.headers.get('Upgrade'):
+            self.wfile.write(b'HTTP/1.1 101 UPGRADED\r\nContent-Type: application/vnd.docker.raw-stream\r\nConnection: Upgrade\r\nUpgrade: tcp\r\n\r\n')
+            self.wfile.flush()
+            sleep(EXEC__HIJACK_DELAY)
+            self.wfile.write(output)
+            self.wfile.flush()
+            return
+        self.send_bytes(output, content_type='application/vnd.docker.raw-stream' if tty else 'application/vnd.docker.multiplexed-stream')
+
+    # routes: images
+
+    def route__build(self):
+        context = self.read_body()
+        labels  = self.param_json('labels', {})
+        events  = self.engine.build(context, tag=self.params.get('t'), labels=labels, dockerfile=self.params.get('dockerfile') or 'Dockerfile',
+                                    nocache=self.param_bool('nocache'))
+        self.send_json_lines(events)
+
+    def route__commit(self):
+        config    = self.read_json()
+        container = self.with_container(self.params.get('container', ''))
+        if container is None:
+            return
+        image      = self.engine.image(container['Image']) or {}
+        repository = self.params.get('repo')
+        reference  = f"{repository}:{self.params.get('tag') or 'latest'}" if repository else None
+        committed  = self.engine.image_add(reference                                                                ,
+                                           labels      = {**container['Config']['Labels'], **(config.get('Labels') or {})},
+                                           cmd         = container['Config']['Cmd']                                 ,
+                                           entrypoint  = container['Config']['Entrypoint']                          ,
+                                           env         = container['Config']['Env']                                 ,
+                                           working_dir = container['Config']['WorkingDir']                          ,
+                                           files       = container['Files']                                         ,
+                                           output      = image.get('Output', '')                                    ,
+                                           exits       = image.get('Exits', False)                                  ,
+                                           parent      = container['Image']                                         )
+        self.send_json({'Id': committed['Id']}, status=201)
+
+    def route__image_inspect(self, name):
+        image = self.engine.image(name)
+        if image is None:
+            return self.send_error_json(404, f'No such image: {name}')
+        self.send_json({key: value for key, value in image.items() if key not in ('Files', 'Output', 'Exits', 'CreatedTime')})
+
+    def route__image_pull(self):
+        self.read_body()
+        name      = self.params.get('fromImage', '')
+        tag       = self.params.get('tag') or 'latest'
+        reference = name if '@' in name else f'{name}:{tag}'
+        error     = self.engine.pull_error(reference)
+        if error:
+            return self.send_error_json(404, error)
+        self.send_json_lines(self.engine.pull(reference))
+
+    def route__image_remove(self, name):
+        image = self.engine.image(name)
+        if image is None:
+            return self.send_error_json(404, f'No such image: {name}')
+        force = self.param_bool('force')
+        with self.engine.lock:
+            users = [container for container in self.engine.containers.values() if container['Image'] == image['Id']]
+            if users and not force:
+                return self.send_error_json(409, f"conflict: unable to remove repository reference \"{name}\" (must force) - container {users[0]['Id'][:12]} is using its referenced image {image['Id'][7:19]}")
+            reference = self.engine.image_reference(name)
+            result    = []
+            if reference in image['RepoTags']:
+                self.engine.image_untag(reference)
+                result.append({'Untagged': reference})
+            if not image['RepoTags'] or force:
+                for tag in list(image['RepoTags']):
+                    self.engine.image_untag(tag)
+                    result.append({'Untagged': tag})
+                self.engine.images.pop(image['Id'], None)
+                self.engine.event('image', 'delete', image['Id'])
+                result.append({'Deleted': image['Id']})
+        self.send_json(result)
+
+    def route__image_tag(self, name):
+        image = self.engine.image(name)
+        if image is None:
+            return self.send_error_json(404, f'No such image: {name}')
+        reference = self.engine.image_reference(f"{self.params.get('repo')}:{self.params.get('tag') or 'latest'}")
+        with self.engine.lock:
+            self.engine.image_untag(reference)
+            image['RepoTags'].append(reference)
+            self.engine.event('image', 'tag', image['Id'], {'name': reference})
+        self.send_bytes(b'', status=201)
+
+    def route__images_list(self):
+        self.send_json(self.engine.images_list(all=self.param_bool('all'), filters=self.param_json('filters')))
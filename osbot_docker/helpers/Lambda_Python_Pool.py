@@ -0,0 +1,135 @@
+from threading                                      import Lock
+
+from osbot_docker.apis.API_Docker                   import API_Docker
+from osbot_docker.helpers.Container__Lambda_Python  import Container__Lambda_Python
+
+DEFAULT__POOL_SIZE   = 4
+POOL__STRATEGIES     = ['least_busy', 'round_robin']
+
+
+class Lambda_Python_Pool:
+    """Pool of warm Lambda containers (on docker allocated host ports) that invocations are dispatched to"""
+
+    def __init__(self, size=DEFAULT__POOL_SIZE, strategy='least_busy', api_docker=None):
+        if strategy not in POOL__STRATEGIES:
+            raise ValueError(f'strategy must be one of {POOL__STRATEGIES}, and it was: {strategy}')
+        self.api_docker   = api_docker or API_Docker()
+        self.size         = size
+        self.strategy     = strategy
+        self.members      = []
+        self.lock         = Lock()
+        self.next_member  = 0                   # used by the round_robin strategy
+        self.recycled     = 0
+        self.replacements = {}                  # recycled member -> the member that replaced it
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def invoke(self, payload=None):
+        from requests.exceptions import ConnectionError                         # note: imported here (requests is slow to import)
+        member = self.member()
+        try:
+            return member.invoke(payload, reserved=True)
+        except ConnectionError:
+            if member.is_running():
+                raise
+            member = self.member_reserve(self.member_recycle(member))
+            return member.invoke(payload, reserved=True)                # retry (once) on the container that replaced the dead one
+
+    def invoke_many(self, payloads, max_workers=None):
+        """Invokes the lambdas in parallel, returns the results in the same order as the payloads"""
+        from concurrent.futures import ThreadPoolExecutor                   # note: imported here to keep the import of this module fast
+        max_workers = max_workers or self.size
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(self.invoke, payloads))
+
+    def member(self):
+        """Picks the member of the next invocation and reserves it (i.e. increments its in_flight, with the lock held,
+           so that concurrent invocations see each other's picks), member.invoke(..., reserved=True) releases it"""
+        with self.lock:
+            if not self.members:
+                raise ValueError('Lambda_Python_Pool has no containers (was start() called?)')
+            if self.strategy == 'round_robin':
+                member           = self.members[self.next_member % len(self.members)]
+                self.next_member += 1
+            else:
+                member = min(self.members, key=lambda member: (member.in_flight, member.invocations))     # ties go to the least used
+            member.in_flight += 1
+            return member
+
+    def member_create(self):
+        return Container__Lambda_Python(host_port=None, api_docker=self.api_docker, lock=self.lock).start(wait_for_ready=True)
+
+    def member_recycle(self, member):
+        """Replaces member with a new container, when another thread has already replaced it, returns that replacement"""
+        with self.lock:
+            if member not in self.members:
+                return self.member_replacement(member)
+        new_member = self.member_create()
+        with self.lock:
+            replaced = member in self.members
+            if replaced:
+                self.members[self.members.index(member)] = new_member
+                self.replacements[member]                = new_member
+                self.recycled += 1
+        if replaced is False:                                           # replaced by another thread while new_member was starting
+            self.member_remove(new_member)
+            with self.lock:
+                return self.member_replacement(member)
+        self.member_remove(member)
+        return new_member
+
+    def member_replacement(self, member):                               # (called with the lock held)
+        replacement = self.replacements.get(member)
+        if replacement is None:
+            raise ValueError('the container is not in the Lambda_Python_Pool (was stop() called?)')
+        return replacement
+
+    def member_reserve(self, member):
+        with self.lock:
+            member.in_flight += 1
+        return member
+
+    def member_remove(self, member):
+        try:
+            member.stop()
+        except Exception:
+            pass                                # the container might already be gone
+
+    def recycle(self):
+        """Replaces the containers that are not running anymore, returns how many were replaced"""
+        dead_members = [member for member in list(self.members) if member.is_running() is False]
+        for member in dead_members:
+            self.member_recycle(member)
+        return len(dead_members)
+
+    def start(self):
+        from concurrent.futures import ThreadPoolExecutor                   # note: imported here to keep the import of this module fast
+        with ThreadPoolExecutor(max_workers=self.size) as executor:
+            futures = [executor.submit(self.member_create) for _ in range(self.size)]
+        members = [future.result() for future in futures if future.exception() is None]
+        if len(members) < self.size:                                    # don't leave half a pool running
+            for member in members:
+                self.member_remove(member)
+            raise next(future.exception() for future in futures if future.exception())
+        self.members = members
+        return self
+
+    def stats(self):
+        with self.lock:
+            return dict(size        = len(self.members)                                   ,
+                        in_flight   = sum(member.in_flight   for member in self.members)  ,
+                        invocations = sum(member.invocations for member in self.members)  ,
+                        recycled    = self.recycled                                       )
+
+    def stop(self):
+        from concurrent.futures import ThreadPoolExecutor                   # note: imported here to keep the import of this module fast
+        with self.lock:
+            members, self.members = self.members, []
+            self.replacements     = {}
+        with ThreadPoolExecutor(max_workers=max(1, len(members))) as executor:
+            list(executor.map(self.member_remove, members))
+        return self
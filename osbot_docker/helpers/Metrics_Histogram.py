@@ -0,0 +1,55 @@
+from collections                        import deque
+from threading                          import Lock
+
+DEFAULT__MAX_SAMPLES = 10000                    # percentiles are computed over the most recent samples
+
+
+class Metrics_Histogram:
+    """Thread-safe collector of numeric samples that reports count/min/max/mean (over all samples) and p50/p95/p99"""
+
+    def __init__(self, max_samples=DEFAULT__MAX_SAMPLES):
+        self.samples = deque(maxlen=max_samples)
+        self.count   = 0
+        self.total   = 0
+        self.min     = None
+        self.max     = None
+        self.lock    = Lock()
+
+    def add(self, value):
+        with self.lock:
+            self.samples.append(value)
+            self.count += 1
+            self.total += value
+            self.min    = value if self.min is None else min(self.min, value)
+            self.max    = value if self.max is None else max(self.max, value)
+        return self
+
+    def percentile(self, percent, sorted_samples=None):
+        if sorted_samples is None:
+            with self.lock:
+                sorted_samples = sorted(self.samples)
+        if not sorted_samples:
+            return None
+        index = round(percent / 100 * (len(sorted_samples) - 1))           # nearest rank
+        return sorted_samples[index]
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.count = 0
+            self.total = 0
+            self.min   = None
+            self.max   = None
+        return self
+
+    def summary(self):
+        with self.lock:
+            sorted_samples = sorted(self.samples)
+            count, total, min_value, max_value = self.count, self.total, self.min, self.max
+        return dict(count = count                                               ,
+                    min   = min_value                                           ,
+                    max   = max_value                                           ,
+                    mean  = total / count if count else None                    ,
+                    p50   = self.percentile(50, sorted_samples)                 ,
+                    p95   = self.percentile(95, sorted_samples)                 ,
+                    p99   = self.percentile(99, sorted_samples)                 )
@@ -58,6 +58,46 @@ class test_API_Docker(TestCase):
         assert container.short_id() in containers
         assert container.delete() is True
 
+    def test_containers_records(self):
+        labels    = {'osbot_docker.test': 'test_containers_records'}
+        container = self.api_docker.container_create('hello-world', labels=labels)
+        records   = self.api_docker.containers_records(filters={'label': 'osbot_docker.test=test_containers_records'})
+        assert [record.id for record in records] == [container.container_id]
+        assert records[0].labels                 == labels
+        assert records[0].container().exists()   is True
+        assert container.delete() is True
+
+    def test_containers_query(self):
+        labels     = {'osbot_docker.test': 'test_containers_query'}
+        containers = [self.api_docker.container_create('hello-world', labels=labels) for _ in range(2)]
+        records    = self.api_docker.containers_query(labels=labels, image='hello-world', status='created')
+        assert type(records).__name__ == 'generator'
+        assert sorted(record.id for record in records) == sorted(container.container_id for container in containers)
+        assert len(list(self.api_docker.containers_query(labels=labels, limit=1)))        == 1
+        assert list(self.api_docker.containers_query(labels=labels, status='running'))      == []
+        name = containers[0].info().get('name').lstrip('/')
+        assert [record.name() for record in self.api_docker.containers_query(name=name)]   == [name]
+        for container in containers:
+            assert container.delete() is True
+
+    def test_containers_start__stop__delete(self):
+        labels        = {'osbot_docker.test': 'test_containers_start__stop__delete'}
+        filters       = {'label': 'osbot_docker.test=test_containers_start__stop__delete'}
+        containers    = [self.api_docker.container_create('hello-world', labels=labels) for _ in range(3)]
+        container_ids = sorted(container.container_id for container in containers)
+        assert sorted(self.api_docker.containers_select(filters=filters)) == container_ids
+        assert self.api_docker.containers_select() == []
+
+        for action in [self.api_docker.containers_start, self.api_docker.containers_stop, self.api_docker.containers_delete]:
+            results = action(filters=filters, max_workers=2)
+            assert sorted(results) == container_ids
+            assert set(result.get('status') for result in results.values()) == {'ok'}
+
+        assert self.api_docker.containers_select(filters=filters) == []
+        result = self.api_docker.containers_delete(container_ids=['aaaa-not-exists']).get('aaaa-not-exists')
+        assert result.get('status') == 'error'
+        assert 'No such container' in result.get('error')
+
     def test_docker_params_append_options(self):
         docker_params = ['run']
         options        = {'key': '-v', 'value':'/a:/b'}
@@ -148,6 +188,16 @@ class test_API_Docker(TestCase):
         images = self.api_docker.images()
         assert len(images) > 0
 
+    def test_images_records(self):
+        records = self.api_docker.images_records(filters={'reference': 'hello-world'})
+        assert records[0].tags()              == ['hello-world:latest']
+        assert records[0].image().exists()   is True
+
+    def test_images_delete(self):
+        result = self.api_docker.images_delete(['aaaa-not-exists:bbbb']).get('aaaa-not-exists:bbbb')
+        assert result.get('status') == 'error'
+        assert self.api_docker.images_delete([]) == {}
+
     def test_images_names(self):
         names = self.api_docker.images_names()
         assert 'hello-world' in names
@@ -0,0 +1,51 @@
+import os
+from unittest                               import IsolatedAsyncioTestCase, TestCase
+
+from osbot_docker.apis.AsyncAPI_Docker      import AsyncAPI_Docker
+from osbot_docker.apis.AsyncDocker_Container import AsyncDocker_Container
+
+
+class test_AsyncAPI_Docker(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.api_docker = AsyncAPI_Docker()
+
+    async def asyncTearDown(self):
+        await self.api_docker.close()
+
+    async def test_client_api_version(self):
+        api_version = await self.api_docker.client_api_version()
+        assert api_version.startswith('1.')
+        assert self.api_docker.api_version == api_version
+
+    async def test_containers(self):
+        container  = await self.api_docker.container_create('hello-world')
+        containers = await self.api_docker.containers()
+        assert type(container) is AsyncDocker_Container
+        assert container.container_id in [_.container_id for _ in containers]
+        assert await container.delete() is True
+
+    async def test_images_names(self):
+        assert 'hello-world' in await self.api_docker.images_names()
+
+    async def test_server_info(self):
+        server_info = await self.api_docker.server_info()
+        assert server_info.get('OSType') == 'linux'
+
+
+class test_AsyncAPI_Docker__Socket_Path(TestCase):
+
+    def test_socket_path_from_env(self):
+        docker_host = os.environ.pop('DOCKER_HOST', None)
+        try:
+            assert AsyncAPI_Docker().socket_path == '/var/run/docker.sock'
+            os.environ['DOCKER_HOST'] = 'unix:///tmp/docker.sock'
+            assert AsyncAPI_Docker().socket_path == '/tmp/docker.sock'
+            os.environ['DOCKER_HOST'] = 'tcp://127.0.0.1:2375'
+            with self.assertRaises(ValueError):                                            # instead of silently using the default socket
+                AsyncAPI_Docker()
+            assert AsyncAPI_Docker(socket_path='/tmp/docker.sock').socket_path == '/tmp/docker.sock'
+        finally:
+            os.environ.pop('DOCKER_HOST', None)
+            if docker_host is not None:
+                os.environ['DOCKER_HOST'] = docker_host
@@ -0,0 +1,66 @@
+from time                                       import monotonic
+from unittest                                   import IsolatedAsyncioTestCase
+
+from osbot_docker.apis.AsyncAPI_Docker          import AsyncAPI_Docker
+from osbot_docker.apis.AsyncDocker_Image        import AsyncDocker_Image
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_AsyncDocker_Container(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.api_docker       = AsyncAPI_Docker()
+        self.docker_container = await self.api_docker.container_create(image_name='hello-world')
+
+    async def asyncTearDown(self):
+        assert await self.docker_container.delete() is True
+        await self.api_docker.close()
+
+    async def test_exists(self):
+        assert await self.docker_container.exists() is True
+        assert await self.api_docker.container('aaaa-not-exists').exists() is False
+
+    async def test_start__logs(self):
+        container = self.docker_container
+        assert await container.status() == 'created'
+        assert await container.image () == 'hello-world:latest'
+        assert await container.start(wait_for_running=False) is True
+        assert await container.wait_for_container_status('exited', timeout=10) is True
+        assert 'Hello from Docker!' in await container.logs()
+
+
+class test_AsyncDocker_Container__Fake_Engine(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine     = Fake_Docker_Engine(images={'service:latest': dict(cmd=['sleep', '600'])}).start()
+        self.api_docker = AsyncAPI_Docker(socket_path=self.engine.socket_path)
+
+    async def asyncTearDown(self):
+        await self.api_docker.close()
+        self.engine.stop()
+
+    async def test_exec(self):
+        container = await AsyncDocker_Image('service', api_docker=self.api_docker).create_container()
+        assert await container.start() is True
+        assert await container.exec('echo a;b') == 'a;b\n'                       # split like Docker_Container.exec (no shell)
+
+    async def test_logs_stream(self):
+        output = 'first line\nsecond line\nno line ending'
+        self.engine.image_add('hello-world:latest', output=output, exits=True)
+        for tty in (False, True):
+            container = await AsyncDocker_Image('hello-world', api_docker=self.api_docker).create_container(tty=tty)
+            assert await container.start(wait_for_running=False) is True
+            assert await container.wait_for_container_status('exited', timeout=2) is True
+            assert [line async for line in container.logs_stream()]                    == ['first line\n', 'second line\n', 'no line ending']
+            assert [line async for line in container.logs_stream(demux=True, tail=1)]  == [('stdout', 'no line ending')]
+            assert ''.join([line async for line in container.logs_stream(chunk_size=3, max_line=4)]) == output      # (read in small chunks)
+            assert await container.logs() == output
+            assert await container.delete() is True
+        assert await self.api_docker.container('aaaa-not-exists').logs() == ''
+
+    async def test_wait_for_container_status(self):
+        self.engine.image_add('hello-world:latest', output='Hello from Docker!\n', exits=True)
+        container = await AsyncDocker_Image('hello-world', api_docker=self.api_docker).create_container()
+        start     = monotonic()
+        assert await container.start(wait_timeout=5) is False                        # hello-world exits straight after start
+        assert monotonic() - start < 1
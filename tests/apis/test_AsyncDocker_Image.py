@@ -0,0 +1,58 @@
+import os
+import tempfile
+from unittest                               import IsolatedAsyncioTestCase
+
+import docker_images
+from osbot_utils.utils.Files                import path_combine
+
+from osbot_docker.apis.AsyncAPI_Docker      import AsyncAPI_Docker
+from osbot_docker.apis.AsyncDocker_Image    import AsyncDocker_Image
+from osbot_docker.helpers.Fake_Docker_Engine import Fake_Docker_Engine
+
+
+class test_AsyncDocker_Image(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.api_docker = AsyncAPI_Docker()
+        self.image      = AsyncDocker_Image(image_name='hello-world', image_tag='latest', api_docker=self.api_docker)
+
+    async def asyncTearDown(self):
+        await self.api_docker.close()
+
+    async def test_build(self):
+        path   = path_combine(docker_images.folder, 'scratch')
+        image  = AsyncDocker_Image(image_name='osbot_docker__test_async_build', image_tag='latest', api_docker=self.api_docker)
+        result = await image.build(path)
+        assert result.get('status') == 'ok'
+        assert result.get('tags'  ) == ['osbot_docker__test_async_build:latest']
+        assert await image.delete() is True
+
+    async def test_info(self):
+        info = await self.image.info()
+        assert 'Architecture' in info
+        assert info.get('Tags') == ['hello-world:latest']
+        assert await AsyncDocker_Image('aaaa-not-exits-bbb', 'aaaa-bbbb', api_docker=self.api_docker).info() == {}
+
+    async def test_pull(self):
+        assert await self.image.pull  () is True
+        assert await self.image.exists() is True
+
+
+class test_AsyncDocker_Image__Fake_Engine(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.engine     = Fake_Docker_Engine().start()
+        self.api_docker = AsyncAPI_Docker(socket_path=self.engine.socket_path)
+
+    async def asyncTearDown(self):
+        await self.api_docker.close()
+        self.engine.stop()
+
+    async def test_build(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            for name, contents in [('Dockerfile', 'FROM scratch\nCOPY file_a /file_a\n'), ('file_a', 'aaaa')]:
+                with open(os.path.join(temp_dir, name), 'w') as file:
+                    file.write(contents)
+            result = await AsyncDocker_Image(image_name='async_build', api_docker=self.api_docker).build(temp_dir)
+        assert result.get('status') == 'ok'
+        assert result.get('tags'  ) == ['async_build:latest']
@@ -0,0 +1,98 @@
+import os
+import tempfile
+from unittest                                       import TestCase
+
+from osbot_docker.apis.Docker_Archive               import Docker_Archive, Chunks_Reader
+from osbot_docker.helpers.Container__Lambda_Python  import Container__Lambda_Python
+
+
+class test_Docker_Archive(TestCase):
+
+    def setUp(self):
+        self.temp_dir       = tempfile.TemporaryDirectory()
+        self.source         = os.path.join(self.temp_dir.name, 'source')
+        self.target         = os.path.join(self.temp_dir.name, 'target')
+        self.docker_archive = Docker_Archive(chunk_size=1024)
+        self.write('file_a.txt'        , 'aaaa'      )
+        self.write('sub_folder/file_b' , 'b' * 5000  )
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write(self, name, contents):
+        path = os.path.join(self.source, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(contents)
+
+    def test_chunks_reader(self):
+        chunks = [b'', b'a' * 10, b'', b'bcd']
+        reader = Chunks_Reader(chunks)
+        assert reader.read(4)  == b'aaaa'                                                  # reads smaller than a chunk
+        assert reader.read(8)  == b'aaaaaa'                                                # (never cross a chunk boundary)
+        assert reader.read(8)  == b'bcd'
+        assert reader.read(8)  == b''
+        assert reader.bytes    == 13
+        assert Chunks_Reader(chunks).readall() == b''.join(chunks)
+
+    def test_local_entries(self):
+        entries = list(self.docker_archive.local_entries(self.source))
+        assert [arcname for _, arcname in entries] == ['source', 'source/sub_folder', 'source/file_a.txt', 'source/sub_folder/file_b']
+        assert entries[0][0] == self.source
+
+    def test_parse_sha256sum(self):
+        digest = 'a' * 64
+        output = f'{digest}  /var/task/file_a\n{digest}  /tmp/other\nsha256sum: /var/task/missing: No such file or directory\n'
+        assert self.docker_archive.parse_sha256sum(output                    ) == {'/var/task/file_a': digest, '/tmp/other': digest}
+        assert self.docker_archive.parse_sha256sum(output, prefix='/var/task/') == {'file_a': digest}
+
+    def test_tar_stream__extract_stream(self):
+        entries   = self.docker_archive.local_entries(self.source)
+        chunks    = list(self.docker_archive.tar_stream(entries))
+        assert max(len(chunk) for chunk in chunks[:-1]) <= 4 * 512              # files are read (and sent) in chunks (the last one is the end of archive padding)
+        assert self.docker_archive.bytes == sum(len(chunk) for chunk in chunks)
+        extracted = self.docker_archive.extract_stream(iter(chunks), self.target, skip={'source/file_a.txt'})
+        assert extracted == ['source', 'source/sub_folder', 'source/sub_folder/file_b']
+        assert self.docker_archive.file_sha256(os.path.join(self.target, 'source/sub_folder/file_b')) == \
+               self.docker_archive.file_sha256(os.path.join(self.source, 'sub_folder/file_b'))
+        assert os.path.exists(os.path.join(self.target, 'source/file_a.txt')) is False
+
+
+class test_Docker_Container__copy(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.container_lambda = Container__Lambda_Python(host_port=None).start()
+        cls.container        = cls.container_lambda.container
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.container_lambda.stop()
+
+    def test_copy_to__copy_from(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            source = os.path.join(temp_dir, 'source')
+            os.makedirs(source)
+            for name, contents in [('file_a', 'aaaa'), ('file_b', 'bbbb')]:
+                with open(os.path.join(source, name), 'w') as file:
+                    file.write(contents)
+
+            result = self.container.copy_to('/tmp', source)
+            assert result.get('copied' ) == ['source/file_a', 'source/file_b']
+            assert result.get('skipped') == []
+            assert result.get('bytes'  ) >  0
+            assert self.container.exec(['cat', '/tmp/source/file_a']) == 'aaaa'
+
+            with open(os.path.join(source, 'file_b'), 'w') as file:
+                file.write('changed')
+            result = self.container.copy_to('/tmp', source)
+            assert result.get('copied' ) == ['source/file_b']                   # only the changed file is sent
+            assert result.get('skipped') == ['source/file_a']
+
+            target = os.path.join(temp_dir, 'target')
+            result = self.container.copy_from('/tmp/source', target)
+            assert result.get('skipped') == []
+            assert sorted(result.get('copied')) == ['source', 'source/file_a', 'source/file_b']
+            with open(os.path.join(target, 'source/file_b')) as file:
+                assert file.read() == 'changed'
+            assert self.container.copy_from('/tmp/source', target).get('skipped') == ['source/file_a', 'source/file_b']
@@ -0,0 +1,69 @@
+import io
+import os
+import tarfile
+import tempfile
+from unittest                               import TestCase
+
+import docker_images
+from osbot_utils.utils.Files                import path_combine
+
+from osbot_docker.apis.Docker_Build_Context import Docker_Build_Context
+
+
+class test_Docker_Build_Context(TestCase):
+
+    def setUp(self):
+        self.temp_dir      = tempfile.TemporaryDirectory()
+        self.path          = self.temp_dir.name
+        self.manifest_path = f'{self.path}.manifest.json'
+        self.write('Dockerfile'   , 'FROM scratch\nCOPY . /data\n')
+        self.write('file_a.txt'   , 'aaaa')
+        self.write('ignored.log'  , 'log')
+        self.write('.dockerignore', '# comment\n*.log\n')
+        self.build_context = Docker_Build_Context(self.path, manifest_path=self.manifest_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+        if os.path.exists(self.manifest_path):
+            os.remove(self.manifest_path)
+
+    def write(self, name, contents):
+        with open(os.path.join(self.path, name), 'w') as file:
+            file.write(contents)
+
+    def test_dockerignore_patterns(self):
+        assert self.build_context.dockerignore_patterns() == ['*.log']
+        assert Docker_Build_Context(path_combine(docker_images.folder, 'scratch')).dockerignore_patterns() == []
+
+    def test_files(self):
+        assert self.build_context.files() == ['.dockerignore', 'Dockerfile', 'file_a.txt']
+
+    def test_hash(self):
+        hash_1 = self.build_context.hash()
+        assert self.build_context.files_hashed == 3
+        assert self.build_context.hash()       == hash_1
+        self.write('ignored.log', 'changed')                                    # files in .dockerignore don't change the hash
+        assert self.build_context.hash()       == hash_1
+        self.write('file_a.txt', 'bbbb')
+        hash_2 = self.build_context.hash()
+        assert hash_2 != hash_1
+        self.write('file_a.txt', 'aaaa')
+        assert self.build_context.hash()       == hash_1
+
+    def test_hash__reuses_manifest(self):
+        old_time = 1_000_000_000
+        for name in self.build_context.files():
+            os.utime(os.path.join(self.path, name), (old_time, old_time))       # files older than the racy window
+        hash_1 = self.build_context.hash()
+        assert self.build_context.files_hashed == 3
+        assert self.build_context.hash()       == hash_1
+        assert self.build_context.files_hashed == 0                             # size and mtime unchanged, so no file was read
+
+    def test_tar_stream(self):
+        for gzip in [False, True]:
+            chunks  = list(self.build_context.tar_stream(gzip=gzip, chunk_size=2))
+            tar     = tarfile.open(fileobj=io.BytesIO(b''.join(chunks)), mode='r:gz' if gzip else 'r')
+            assert sorted(tar.getnames())                   == ['.dockerignore', 'Dockerfile', 'file_a.txt']
+            assert tar.extractfile('file_a.txt').read()     == b'aaaa'
+        chunks = list(self.build_context.tar_stream(chunk_size=2))
+        assert max(len(chunk) for chunk in chunks[:-1]) <= 4 * 512                      # (pax) headers, 2 byte file chunks and padding
@@ -0,0 +1,59 @@
+from unittest                           import TestCase
+
+from osbot_docker.apis.Docker_Build_Log import Docker_Build_Log
+
+
+class test_Docker_Build_Log(TestCase):
+
+    def setUp(self):
+        self.build_log = Docker_Build_Log()
+
+    def events(self, *messages):
+        events = []
+        for message in messages:
+            events.extend(self.build_log.parse(message))
+        return events
+
+    def test_parse(self):
+        events = self.events({'stream': 'Step 1/3 : FROM centos:8'                   },
+                             {'stream': '\n'                                         },
+                             {'stream': ' ---> 5d0da3dc9764\n'                       },
+                             {'stream': 'Step 2/3 : COPY handler.py /var/task\n'     },
+                             {'stream': ' ---> Using cache\n ---> 0a1b2c3d4e5f\n'    },
+                             {'stream': 'Step 3/3 : RUN echo hello\n'                },
+                             {'stream': ' ---> Running in 4c6f2d3e1a0b\n'            },
+                             {'stream': 'hello\n'                                    },
+                             {'stream': 'Removing intermediate container 4c6f2d3e1a0b\n'},
+                             {'stream': ' ---> 9f8e7d6c5b4a\n'                       },
+                             {'aux'   : {'ID': 'sha256:9f8e7d6c5b4a3210'}           },
+                             {'stream': 'Successfully built 9f8e7d6c5b4a\n'          },
+                             {'stream': 'Successfully tagged an_image:latest\n'      })
+        event_types = [event.get('event') for event in events]
+        assert event_types == ['step_start', 'step_layer',
+                               'step_end'  , 'step_start', 'step_cache_hit', 'step_layer',
+                               'step_end'  , 'step_start', 'step_cache_miss', 'output', 'output', 'step_layer',
+                               'step_end'  , 'tagged']
+        assert events[1] .get('layer'       ) == '5d0da3dc9764'
+        assert events[8] .get('container_id') == '4c6f2d3e1a0b'
+        assert events[9] .get('line'        ) == 'hello'
+
+        summary = self.build_log.summary()
+        assert summary.get('status'         ) == 'ok'
+        assert summary.get('image_id'       ) == 'sha256:9f8e7d6c5b4a3210'
+        assert summary.get('tags'           ) == ['an_image:latest']
+        assert summary.get('cache_hits'     ) == 1
+        assert summary.get('cache_misses'   ) == 1
+        assert summary.get('cache_hit_ratio') == 0.5
+        assert [step.get('layer' ) for step in summary.get('steps')] == ['5d0da3dc9764', '0a1b2c3d4e5f', '9f8e7d6c5b4a']
+        assert [step.get('cached') for step in summary.get('steps')] == [None, True, False]
+        assert all(step.get('duration') >= 0 for step in summary.get('steps'))
+
+    def test_parse__error(self):
+        events = self.events({'stream': 'Step 1/2 : FROM aaaa-not-exists'            },
+                             {'errorDetail': {'message': 'pull access denied'}, 'error': 'pull access denied'})
+        assert [event.get('event') for event in events] == ['step_start', 'step_end', 'error']
+        assert events[2].get('step') is None
+        summary = self.build_log.summary()
+        assert summary.get('status'         ) == 'error'
+        assert summary.get('error'          ) == 'pull access denied'
+        assert summary.get('cache_hit_ratio') == 0.0
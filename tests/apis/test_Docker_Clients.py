@@ -0,0 +1,52 @@
+from concurrent.futures                         import ThreadPoolExecutor
+from unittest                                   import TestCase
+
+from osbot_docker.apis.Docker_Clients           import Docker_Clients, docker_clients, DEFAULT__CLIENT_POOL_SIZE
+from osbot_docker.apis.Docker_Container         import Docker_Container
+from osbot_docker.apis.Docker_Image             import Docker_Image
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Docker_Clients(TestCase):
+
+    def setUp(self):
+        self.engine = Fake_Docker_Engine().start()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_client_api(self):
+        base_url = self.engine.base_url()
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            clients = list(executor.map(lambda _: self.engine.api_docker().client_api(), range(16)))
+        assert all(client is clients[0] for client in clients)
+        assert self.engine.api_docker().client_docker().api  is clients[0]
+        assert self.engine.request_counts[('GET', 'version')] == 1                          # the api version is only negotiated once
+        assert base_url in docker_clients.endpoints()
+        assert clients[0]._custom_adapter.max_pool_size      == DEFAULT__CLIENT_POOL_SIZE
+
+    def test_wrappers(self):
+        api_docker = self.engine.api_docker()
+        images     = api_docker.images()
+        assert all(image.client_api() is api_docker.client_api() for image in images)
+        image      = Docker_Image('hello-world', api_docker=self.engine.api_docker())
+        container  = Docker_Container(image.create_container().container_id, api_docker=self.engine.api_docker())
+        assert container.client_api() is image.client_api() is api_docker.client_api()
+        assert container.delete() is True
+
+    def test_configure__remove(self):
+        clients  = Docker_Clients()
+        base_url = self.engine.base_url()
+        client   = clients.client_api(base_url)
+        assert clients.configure(pool_size=32)       is clients
+        assert clients.client_api(base_url)          is not client
+        assert clients.client_api(base_url)._custom_adapter.max_pool_size == 32
+        assert clients.remove(base_url)              is True
+        assert clients.remove(base_url)              is False
+        assert clients.endpoints()                   == []
+
+    def test_configure__api_version(self):
+        clients = Docker_Clients().configure(api_version='1.41')
+        assert clients.client_api(self.engine.base_url()).api_version == '1.41'
+        assert self.engine.request_counts[('GET', 'version')]         == 0              # pinned version, no negotiation
+        clients.reset()
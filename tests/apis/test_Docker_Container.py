@@ -20,3 +20,55 @@ class test_Docker_Container(TestCase):
     def test_exists(self):
         assert self.docker_container.exists() is True
 
+    def test_info__snapshot(self):
+        container = self.docker_container
+        assert container.snapshot is None
+        info = container.info()
+        assert container.snapshot      is info                              # first call populates the snapshot
+        assert container.info()        is info                              # next calls (within max_age) reuse it
+        assert container.status()      == 'created'
+        assert container.image()       == f'{self.image_name}:{self.tag}'
+        assert container.set_snapshot_max_age(0).snapshot_expired() is True
+        assert container.set_snapshot_max_age(None).snapshot_expired() is False
+        assert container.set_snapshot_live().snapshot_expired() is True
+        assert container.info()        is not info                          # live mode always makes a new inspect call
+        assert container.refresh().snapshot == info
+
+    def test_info__snapshot__from_containers(self):
+        containers = self.api_docker.containers_all__by_id()
+        container  = containers.get(self.docker_container.short_id())
+        assert container.snapshot is not None                               # seeded from the container_raw used in the listing
+        assert container.info()   is container.snapshot
+        assert container.status() == 'created'
+
+    def test_wait_for_container_status(self):
+        container = self.docker_container
+        assert container.wait_for_container_status('running', timeout=1                  ) is False   # container was created but not started
+        assert container.wait_for_container_status('created', timeout=1                  ) is True
+        assert container.start(wait_for_running=False                                      ) is True
+        assert container.wait_for_container_status('exited' , timeout=10                 ) is True    # hello-world exits as soon as it prints its message
+        assert container.wait_for_container_status('exited' , timeout=10, use_events=False) is True
+        assert self.api_docker.container('aaaa-not-exists').wait_for_container_status('running') is False
+        with self.assertWarns(DeprecationWarning):
+            assert container.wait_for_container_status('exited', 0.1, wait_count=5) is True      # previous signature (wait_delta, wait_count)
+
+    def test_logs_stream(self):
+        container = self.docker_container
+        assert container.logs() == ''
+        assert container.start(wait_for_running=False) is True
+        assert container.wait_for_container_status('exited', timeout=10) is True
+        lines = list(container.logs_stream())
+        assert 'Hello from Docker!\n' in lines
+        assert ''.join(lines)         == container.logs()
+        assert list(container.logs_stream(tail=2))   == lines[-2:]
+        assert set(stream for stream, _ in container.logs_stream(demux=True)) == {'stdout'}
+        assert list(container.logs_stream(stdout=False)) == []
+        assert list(container.logs_stream(timestamps=True))[0].startswith(str(container.info_raw().get('State').get('StartedAt'))[:4])
+        assert self.api_docker.container('aaaa-not-exists').logs() == ''
+
+    def test_commit(self):
+        image = self.docker_container.commit(repository='osbot_docker__test_commit', tag='abc')
+        assert image.image_name_with_tag() == 'osbot_docker__test_commit:abc'
+        assert image.exists()              is True
+        assert image.info().get('Id').endswith(image.image_id)
+        assert image.delete()              is True
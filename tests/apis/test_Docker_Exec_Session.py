@@ -0,0 +1,59 @@
+from unittest                                       import TestCase
+
+from osbot_docker.helpers.Container__Lambda_Python  import Container__Lambda_Python
+
+
+class test_Docker_Exec_Session(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.container_lambda = Container__Lambda_Python(host_port=None).start()
+        cls.container        = cls.container_lambda.container
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.container_lambda.stop()
+
+    def test_run(self):
+        with self.container.exec_session() as exec_session:
+            result = exec_session.run('echo hello; echo an_error >&2')
+            assert result.get('stdout'   ) == 'hello\n'
+            assert result.get('stderr'   ) == 'an_error\n'
+            assert result.get('exit_code') == 0
+            assert result.get('duration' ) >  0
+            assert exec_session.run("printf 'no new line'").get('stdout') == 'no new line'
+            assert exec_session.run('exit 3'             ).get('exit_code') == 3        # commands run in a subshell, so the session is still open
+            assert exec_session.run('if'                 ).get('exit_code') == 2        # and so are syntax errors
+            assert exec_session.run("echo 'a' \"b\""     ).get('stdout'   ) == 'a b\n'
+            assert exec_session.is_open() is True
+        assert exec_session.is_open() is False
+
+    def test_run__not_isolated(self):
+        with self.container.exec_session(isolate=False) as exec_session:
+            exec_session.run('cd /tmp; export AN_VAR=42')
+            assert exec_session.run('pwd; echo $AN_VAR').get('stdout') == '/tmp\n42\n'
+            with self.assertRaises(EOFError):
+                exec_session.run('exit 1')
+            assert exec_session.is_open() is False
+
+    def test_run__timeout(self):
+        exec_session = self.container.exec_session()
+        with self.assertRaises(TimeoutError):
+            exec_session.run('sleep 5', timeout=0.5)
+        assert exec_session.is_open() is False
+
+    def test_run_many(self):
+        with self.container.exec_session(workdir='/var/task') as exec_session:
+            results = exec_session.run_many([f'echo {i}' for i in range(200)] + ['pwd'])
+            assert [result.get('stdout') for result in results[:200]] == [f'{i}\n' for i in range(200)]
+            assert results[200].get('stdout') == '/var/task\n'
+            assert exec_session.commands_run  == 201
+            assert results[0  ].get('duration') >  0                     # the first command was written when no other was pending
+            assert results[1  ].get('duration') is None                  # the others were queued behind it
+            assert [result.get('duration') > 0 for result in exec_session.run_many(['echo 1', 'echo 2'], pipeline=1)] == [True, True]
+
+    def test_exec_stream(self):
+        chunks = list(self.container.exec_stream(['/bin/sh', '-c', 'echo out; echo err >&2; exit 5']))
+        assert ('exit_code', 5) == chunks[-1]
+        assert ''.join(text for stream, text in chunks if stream == 'stdout') == 'out\n'
+        assert ''.join(text for stream, text in chunks if stream == 'stderr') == 'err\n'
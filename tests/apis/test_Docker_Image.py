@@ -1,6 +1,8 @@
 from unittest import TestCase
 
+import docker_images
 from osbot_docker.apis.Docker_Image import Docker_Image
+from osbot_utils.utils.Files import path_combine
 from osbot_utils.utils.Dev import pprint
 
 from osbot_docker.apis.API_Docker import API_Docker
@@ -22,6 +24,41 @@ class test_Docker_Image(TestCase):
         images = self.api_docker.images_names()
         assert self.image_name in images
 
+    def test_build_if_changed(self):
+        path   = path_combine(docker_images.folder, 'scratch')
+        image  = Docker_Image(image_name='osbot_docker__test_build_if_changed', image_tag='latest', api_docker=self.api_docker)
+        result_1 = image.build_if_changed(path)
+        result_2 = image.build_if_changed(path)
+        assert result_1.get('status'      ) == 'ok'
+        assert result_2.get('skipped'     ) is True
+        assert result_2.get('context_hash') == result_1.get('context_hash')
+        assert result_2.get('image').get('Id') == image.info().get('Id')
+        assert image.delete() is True
+
+    def test_build__stream_context(self):
+        path   = path_combine(docker_images.folder, 'lambda_python__3_11')
+        image  = Docker_Image(image_name='osbot_docker__test_build__stream_context', image_tag='latest', api_docker=self.api_docker)
+        for gzip in [False, True]:
+            result = image.build(path, stream_context=True, gzip=gzip)
+            assert result.get('status') == 'ok'
+            assert result.get('tags'  ) == ['osbot_docker__test_build__stream_context:latest']
+        assert image.delete() is True
+
+    def test_build_stream(self):
+        path    = path_combine(docker_images.folder, 'scratch')
+        image   = Docker_Image(image_name='osbot_docker__test_build_stream', image_tag='latest', api_docker=self.api_docker)
+        events  = list(image.build_stream(path))
+        summary = events[-1]
+        assert events[0].get('event'     ) == 'step_start'
+        assert summary  .get('event'     ) == 'build_summary'
+        assert summary  .get('status'    ) == 'ok'
+        assert summary  .get('tags'      ) == ['osbot_docker__test_build_stream:latest']
+        assert [step.get('instruction') for step in summary.get('steps')] == ['FROM scratch', 'VOLUME /data']
+        assert image.delete() is True
+
+        events = list(Docker_Image(None, None).build_stream(None))
+        assert [event.get('event') for event in events] == ['error', 'build_summary']
+
     def test_info(self):
         info = self.image.info()
         assert 'Architecture' in info
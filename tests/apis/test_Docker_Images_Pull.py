@@ -0,0 +1,55 @@
+from unittest                                   import TestCase
+
+from osbot_docker.apis.Docker_Images_Pull       import Docker_Images_Pull
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine, FAKE_ENGINE__LAYER_SIZE
+
+
+class test_Docker_Images_Pull(TestCase):
+
+    def setUp(self):
+        self.engine     = Fake_Docker_Engine().start()
+        for image_name in ('image_a', 'image_b', 'image_c'):
+            self.engine.registry_add(image_name)
+        self.api_docker = self.engine.api_docker()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def test_events(self):
+        images_pull = Docker_Images_Pull(self.api_docker, ['image_a', 'image_b:latest', 'image_a:latest'])
+        events      = list(images_pull.events())
+        assert images_pull.images          == ['image_a:latest', 'image_b:latest']
+        assert events[-1].get('event')     == 'pulls_summary'
+        by_type = {}
+        for event in events:
+            by_type.setdefault(event['event'], []).append(event)
+        assert sorted(event['image'] for event in by_type['pull_start']) == ['image_a:latest', 'image_b:latest']
+        assert sorted(event['image'] for event in by_type['pull_end'  ]) == ['image_a:latest', 'image_b:latest']
+        downloading = [event for event in by_type['layer'] if event['status'] == 'Downloading']
+        assert len({event['layer'] for event in downloading}) == 3                          # the shared (base) layer is only downloaded once
+        assert all(event['total'] == FAKE_ENGINE__LAYER_SIZE for event in downloading)
+
+    def test_images_pull(self):
+        summary = self.api_docker.images_pull(['image_a', 'image_b', 'image_c'], max_workers=2)
+        images  = summary.get('images')
+        assert summary.get('status') == 'ok'
+        assert summary.get('layers') == 4                                                   # one shared layer + one per image
+        assert summary.get('bytes' ) == 4 * FAKE_ENGINE__LAYER_SIZE
+        assert sum(image['bytes'] for image in images.values()) == summary.get('bytes')       # shared layer counted once
+        assert sum(len(image['shared_layers']) for image in images.values()) == 2
+        for reference in ('image_a:latest', 'image_b:latest', 'image_c:latest'):
+            assert images[reference]['status'] == 'ok'
+            assert images[reference]['duration'] >= 0
+            assert self.engine.image(reference) is not None
+
+        summary = self.api_docker.images_pull(['image_a'])                                  # all layers already exist
+        assert summary.get('bytes') == 0
+        assert summary.get('images').get('image_a:latest').get('status') == 'ok'
+
+    def test_images_pull__error(self):
+        summary = self.api_docker.images_pull(['not_in_registry', 'image_a'])
+        error   = summary.get('images').get('not_in_registry:latest')
+        assert summary.get('status')                               == 'error'
+        assert error.get('status')                                 == 'error'
+        assert 'pull access denied' in error.get('error')
+        assert summary.get('images').get('image_a:latest').get('status') == 'ok'
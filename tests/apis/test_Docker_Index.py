@@ -0,0 +1,104 @@
+from threading                                  import Thread
+from unittest                                   import TestCase
+
+from osbot_utils.utils.Misc                     import wait_for
+
+from osbot_docker.apis.API_Docker               import API_Docker
+from osbot_docker.apis.Docker_Image             import Docker_Image
+from osbot_docker.apis.Docker_Index             import image_reference
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Docker_Index(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.api_docker   = API_Docker()
+        cls.docker_index = cls.api_docker.live_index_start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api_docker.live_index_stop()
+        assert cls.api_docker.docker_index is None
+
+    def wait_for_index(self, condition, wait_count=50):
+        while wait_count > 0:                                   # the index is updated by a background thread
+            if condition():
+                return True
+            wait_for(0.1)
+            wait_count -= 1
+        return False
+
+    def test_containers(self):
+        labels    = {'osbot_docker.test': 'test_Docker_Index'}
+        container = self.api_docker.container_create('hello-world', labels=labels)
+        short_id  = container.short_id()
+        assert self.wait_for_index(lambda: short_id in self.api_docker.containers_all__by_id()) is True
+
+        by_labels = self.api_docker.containers_all__by_labels()
+        assert short_id in by_labels['osbot_docker.test']['test_Docker_Index']
+        assert container.container_id in [_.container_id for _ in self.docker_index.containers_with_label('osbot_docker.test', 'test_Docker_Index')]
+        assert container.container_id in [_.container_id for _ in self.api_docker.containers_all__with_image('hello-world')]
+        assert self.docker_index.container_by_name(container.name()).container_id == container.container_id
+
+        assert container.delete() is True
+        assert self.wait_for_index(lambda: short_id not in self.api_docker.containers_all__by_id()) is True
+        assert self.docker_index.containers_with_label('osbot_docker.test', 'test_Docker_Index') == []
+
+    def test_image_by_tag(self):
+        assert 'hello-world:latest' in self.docker_index.image_by_tag('hello-world').get('RepoTags')
+        assert self.docker_index.stats().get('images') > 0
+
+    def test_image_reference(self):
+        assert image_reference('hello-world'              ) == 'hello-world:latest'
+        assert image_reference('hello-world:abc'          ) == 'hello-world:abc'
+        assert image_reference('localhost:5000/aaa'       ) == 'localhost:5000/aaa:latest'
+        assert image_reference('aaa@sha256:1234'          ) == 'aaa@sha256:1234'
+        assert image_reference('sha256:1234'              ) == 'sha256:1234'
+
+
+class test_Docker_Index__Fake_Engine(TestCase):
+
+    def setUp(self):
+        self.engine       = Fake_Docker_Engine().start()
+        self.api_docker   = self.engine.api_docker()
+        self.docker_index = self.api_docker.live_index_start()
+
+    def tearDown(self):
+        self.api_docker.live_index_stop()
+        self.engine.stop()
+
+    def test_reload__interleaved_event(self):
+        container = self.api_docker.container_create('hello-world')
+        for _ in range(50):
+            if container.container_id in self.docker_index.containers:
+                break
+            wait_for(0.02)
+        self.engine.latency = 0.3                                       # the reload lists the containers, then the images (0.3s each)
+        reload = Thread(target=self.docker_index.reload)
+        reload.start()
+        wait_for(0.45)                                                  # after the containers listing, before the reload's apply
+        self.engine.container_remove(self.engine.container(container.container_id))   # 'destroy' event
+        reload.join()
+        self.engine.latency = 0
+        for _ in range(50):
+            if container.container_id not in self.docker_index.containers:
+                break
+            wait_for(0.02)
+        assert container.container_id not in self.docker_index.containers         # the event was applied after the (stale) listing
+
+    def test_containers_with_image(self):
+        self.engine.registry_add('tests/hello-world')
+        assert Docker_Image('tests/hello-world', api_docker=self.api_docker).pull() is True
+        container_1 = self.api_docker.container_create('hello-world')
+        container_2 = self.api_docker.container_create('tests/hello-world')
+        expected    = sorted([container_1.container_id, container_2.container_id])
+        for _ in range(50):
+            if container_2.container_id in self.docker_index.containers:
+                break
+            wait_for(0.02)
+        assert sorted(_.container_id for _ in self.api_docker.containers_all__with_image('hello-world')) == expected   # substring match (index)
+        assert [_.container_id for _ in self.docker_index.containers_with_image('hello-world')]          == [container_1.container_id]
+        self.api_docker.live_index_stop()
+        assert sorted(_.container_id for _ in self.api_docker.containers_all__with_image('hello-world')) == expected   # substring match (daemon)
+        assert [_.id for _ in self.api_docker.containers_query(image='hello-world')]                     == [container_1.container_id]
@@ -0,0 +1,87 @@
+import json
+import os
+import tempfile
+from unittest                                       import TestCase
+
+from osbot_docker.apis.Docker_Instrumentation       import Docker_Instrumentation
+from osbot_docker.helpers.Fake_Docker_Engine        import Fake_Docker_Engine
+
+
+class test_Docker_Instrumentation(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine          = Fake_Docker_Engine().start()
+        cls.api_docker      = cls.engine.api_docker()
+        cls.instrumentation = cls.api_docker.instrumentation_enable(trace=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.api_docker.instrumentation_disable()
+        cls.engine.stop()
+
+    def test_endpoint(self):
+        endpoint = self.instrumentation.endpoint
+        assert endpoint('/v1.43/containers/json'                    ) == '/containers/json'
+        assert endpoint('/v1.43/containers/create'                  ) == '/containers/create'
+        assert endpoint('/v1.43/containers/abc123/json'             ) == '/containers/{id}/json'
+        assert endpoint('/v1.43/containers/abc123'                  ) == '/containers/{id}'
+        assert endpoint('/v1.43/exec/abc123/start'                  ) == '/exec/{id}/start'
+        assert endpoint('/v1.43/images/localhost:5000/an/image:1/json') == '/images/{name}/json'
+        assert endpoint('/v1.43/images/hello-world'                 ) == '/images/{name}'
+        assert endpoint('/version'                                  ) == '/version'
+
+    def test_api_calls(self):
+        container = self.api_docker.container_create('hello-world')
+        with self.api_docker.api_calls() as calls:
+            container.status()
+            container.labels()                                                      # served from the snapshot
+            container.refresh()
+        report = calls.report()
+        assert report.get('calls'    ) == 2
+        assert report.get('endpoints') == {'GET /containers/{id}/json': 2}
+        assert report.get('callers'  ) == {'Docker_Container.status': 1, 'Docker_Container.refresh': 1}
+        assert calls.calls[0].get('call_site') == 'Docker_Container.info_raw'
+        assert calls.calls[0].get('status'   ) == 200
+        assert calls.calls[0].get('bytes_received') > 0
+        with self.api_docker.api_calls() as calls:
+            assert container.delete() is True
+        assert calls.count == 2                                                     # inspect + delete
+        summary = self.instrumentation.summary()
+        assert summary.get('endpoints').get('GET /containers/{id}/json').get('count') >= 3
+
+    def test_export(self):
+        self.api_docker.images()
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path_jsonl = self.instrumentation.export_jsonl(os.path.join(temp_dir, 'trace.jsonl'))
+            with open(path_jsonl) as file:
+                calls = [json.loads(line) for line in file]
+            assert calls[-1].get('endpoint') == '/images/json'
+        otlp  = self.instrumentation.export_otlp()
+        spans = otlp['resourceSpans'][0]['scopeSpans'][0]['spans']
+        assert len(spans)                 == len(calls)
+        assert spans[-1]['name']          == 'GET /images/json'
+        assert spans[-1]['kind']          == 3
+        assert {'key': 'osbot_docker.caller', 'value': {'stringValue': 'API_Docker.images'}} in spans[-1]['attributes']
+
+    def test_owner(self):
+        other_api_docker = self.engine.api_docker()                                 # same daemon, so same (shared) client_api
+        assert other_api_docker.client_api() is self.api_docker.client_api()
+        with self.api_docker.api_calls() as calls:
+            other_api_docker.images()
+            other_api_docker.client_api().version()
+        assert calls.count == 0                                                     # only the calls made on behalf of self.api_docker are recorded
+        with self.api_docker.api_calls() as calls:
+            self.api_docker.images()
+            self.api_docker.containers_delete(container_ids=['not-found'])          # from bulk_execute's worker threads
+        assert calls.by_endpoint() == {'GET /images/json': 1, 'DELETE /containers/{id}': 1}
+
+    def test_uninstall(self):
+        instrumentation = Docker_Instrumentation()
+        session         = self.engine.api_docker().client_api()
+        instrumentation.install(session)
+        session.version()
+        assert instrumentation.summary().get('calls') == 1
+        instrumentation.uninstall()
+        session.version()
+        assert instrumentation.summary().get('calls') == 1
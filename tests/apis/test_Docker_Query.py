@@ -0,0 +1,53 @@
+from unittest                                   import TestCase
+
+from osbot_docker.apis.Docker_Query             import Docker_Query
+from osbot_docker.apis.Docker_Records           import Docker_Container_Record
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Docker_Query(TestCase):
+
+    def record(self, name, image, labels):
+        return Docker_Container_Record({'Id': name * 8, 'Names': [f'/{name}'], 'Image': image, 'Labels': labels})
+
+    def test_filters(self):
+        query = Docker_Query(labels   = {'exists': None, 'equals': 'abc', 'any_of': ['a', 'b'], 'check': lambda value: value == 'ok'},
+                             image    = 'hello-world'                                                                       ,
+                             name     = 'an.name'                                                                           ,
+                             status   = ['running', 'exited']                                                               ,
+                             dangling = False                                                                               ,
+                             health   = None                                                                                )
+        assert query.filters == { 'label'    : ['exists', 'equals=abc', 'any_of', 'check']  ,
+                                  'ancestor' : ['hello-world']                              ,
+                                  'name'     : [r'^/an\.name$']                             ,
+                                  'status'   : ['running', 'exited']                        ,
+                                  'dangling' : ['false']                                    }
+        assert len(query.post_filters) == 3                                                 # any_of, check and the exact image match
+        assert query.daemon_limit(10) is None                                               # can't be pushed to the daemon when there are post filters
+        assert Docker_Query(status='running').daemon_limit(10) == 10
+
+    def test_apply(self):
+        records = [self.record('a', 'hello-world'       , {'env': 'dev' }),
+                   self.record('b', 'hello-world:latest', {'env': 'prod'}),
+                   self.record('c', 'child-of-hello'    , {'env': 'dev' }),            # returned by the daemon's ancestor filter
+                   self.record('d', 'hello-world'       , {'env': 'qa'  })]
+        query   = Docker_Query(image='hello-world', labels={'env': ['dev', 'prod']})
+        assert [record.name() for record in query.apply(records         )] == ['a', 'b']
+        assert [record.name() for record in query.apply(records, limit=1)] == ['a']
+
+    def test_images(self):
+        query = Docker_Query(image='hello-world', dangling=False, target='images')
+        assert query.filters      == {'reference': ['hello-world:latest'], 'dangling': ['false']}        # /images/json has no 'image' (or 'ancestor') filter
+        assert query.post_filters == []
+        with self.assertRaises(ValueError):
+            Docker_Query(target='volumes')
+
+    def test_images_query(self):
+        engine = Fake_Docker_Engine(images={'hello-world:latest': {}, 'hello-world:other': {}, 'service:latest': {}}).start()    # (it rejects invalid filters, like the daemon)
+        try:
+            api_docker = engine.api_docker()
+            assert [record.tags() for record in api_docker.images_query(image='hello-world'      )] == [['hello-world:latest']]
+            assert [record.tags() for record in api_docker.images_query(image='hello-world:other')] == [['hello-world:other' ]]
+            assert len(list(api_docker.images_query(reference='hello-world'))) == 2
+        finally:
+            engine.stop()
@@ -0,0 +1,46 @@
+from unittest                           import TestCase
+
+from osbot_docker.apis.Docker_Records   import Docker_Container_Record, Docker_Image_Record
+
+
+class test_Docker_Records(TestCase):
+
+    def setUp(self):
+        self.container_raw = { 'Id'             : 'a' * 64                                                          ,
+                               'Names'          : ['/an_container']                                                 ,
+                               'Image'          : 'lambda_python__3_11:latest'                                      ,
+                               'State'          : 'running'                                                         ,
+                               'Labels'         : {'an_label': 'an_value'}                                          ,
+                               'Created'        : 1700000000                                                        ,
+                               'Ports'          : [{'IP': '0.0.0.0', 'PrivatePort': 8080, 'PublicPort': 9000, 'Type': 'tcp'},
+                                                   {'PrivatePort': 22, 'Type': 'tcp'}]                              ,
+                               'NetworkSettings': {'Networks': {'bridge': {}}}                                      ,
+                               'Mounts'         : []                                                                }
+        self.image_raw     = { 'Id'             : 'sha256:' + 'b' * 64                                              ,
+                               'RepoTags'       : ['localhost:5000/an_image:latest', '<none>:<none>']               ,
+                               'Labels'         : None                                                              ,
+                               'Size'           : 1234                                                              ,
+                               'Created'        : 1700000000                                                        }
+
+    def test_container_record(self):
+        record = Docker_Container_Record(self.container_raw)
+        assert hasattr(record, '__dict__') is False                                         # only the slots are allocated
+        assert record.short_id()  == 'a' * 12
+        assert record.name()      == 'an_container'
+        assert record.created()   == '2023-11-14 22:13'
+        assert record.ports()     == {'8080/tcp': [{'HostIp': '0.0.0.0', 'HostPort': '9000'}], '22/tcp': None}
+        assert record.to_dict()   == dict(created = '2023-11-14 22:13'          ,
+                                          id      = 'a' * 64                    ,
+                                          image   = 'lambda_python__3_11:latest',
+                                          labels  = {'an_label': 'an_value'}    ,
+                                          names   = ['an_container']            ,
+                                          ports   = record.ports()              ,
+                                          state   = 'running'                   )
+
+    def test_image_record(self):
+        record = Docker_Image_Record(self.image_raw)
+        assert hasattr(record, '__dict__') is False
+        assert record.short_id() == 'b' * 12
+        assert record.tags()     == ['localhost:5000/an_image:latest']
+        assert record.labels     == {}
+        assert record.to_dict()  == dict(created='2023-11-14 22:13', id='sha256:' + 'b' * 64, labels={}, size=1234, tags=['localhost:5000/an_image:latest'])
@@ -0,0 +1,72 @@
+import os
+from unittest                                   import TestCase
+
+from osbot_docker.apis.Docker_Run               import Docker_Run
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Docker_Run(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine     = Fake_Docker_Engine(images={'alpine:latest': dict(cmd=['/bin/sh'])}).start()
+        cls.api_docker = cls.engine.api_docker().set_docker_run_engine('api')
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.stop()
+
+    def test_config(self):
+        docker_run = Docker_Run(self.api_docker)
+        config     = docker_run.config(['--rm', '-e', 'A=1', '--label=an_label=an_value', '-p', '127.0.0.1:8080:80', '-v', '/tmp:/data:ro',
+                                        '--entrypoint', '/bin/sh', '-w', '/data', '--cpus', '0.5', 'alpine', '-c', 'echo 42'])
+        assert config.get('image'      ) == 'alpine'
+        assert config.get('command'    ) == ['-c', 'echo 42']
+        assert config.get('entrypoint' ) == ['/bin/sh']
+        assert config.get('environment') == ['A=1']
+        assert config.get('labels'     ) == {'an_label': 'an_value'}
+        assert config.get('ports'      ) == [80]
+        assert config.get('working_dir') == '/data'
+        host_config = config.get('host_config')
+        assert host_config.get('Binds'       ) == ['/tmp:/data:ro']
+        assert host_config.get('NanoCpus'    ) == 500000000
+        assert host_config.get('PortBindings') == {'80/tcp': [{'HostIp': '127.0.0.1', 'HostPort': '8080'}]}
+        with self.assertRaises(ValueError):
+            docker_run.config(['--detach', 'alpine'])
+
+    def test_split(self):
+        docker_run = Docker_Run(self.api_docker)
+        assert docker_run.split(['--entrypoint=', '-e=A=1', 'alpine', 'echo']) == ([('--entrypoint', ''), ('-e', 'A=1')], 'alpine', ['echo'])
+        os.environ['OSBOT_DOCKER_TEST_VAR'] = '42'
+        try:
+            assert docker_run.split(['-e', 'OSBOT_DOCKER_TEST_VAR', '-e', 'OSBOT_DOCKER_NOT_SET', 'alpine'])[0] == [('-e', 'OSBOT_DOCKER_TEST_VAR=42')]
+        finally:
+            del os.environ['OSBOT_DOCKER_TEST_VAR']
+
+    def test_docker_run_bash(self):
+        containers_before = len(self.engine.containers)
+        result            = self.api_docker.docker_run_bash('alpine', 'echo hello; echo world', bash_binary='/bin/sh')
+        assert result.get('status'   ) == 'ok'
+        assert result.get('stdout'   ) == 'hello\nworld\n'
+        assert result.get('exit_code') == 0
+        assert len(self.engine.containers) == containers_before                             # removed, like --rm
+
+        result = self.api_docker.docker_run_bash('alpine', 'cat /not-found', bash_binary='/bin/sh', options={'key': '-e', 'value': 'A=1'})
+        assert result.get('status'   ) == 'ok'
+        assert result.get('stderr'   ) == 'cat: /not-found: No such file or directory\n'
+        assert result.get('exit_code') == 1
+
+    def test_docker_run_stream(self):
+        items = list(self.api_docker.docker_run_stream(['--entrypoint', 'echo', 'alpine', 'hello']))
+        assert items == [('stdout', 'hello\n'), ('exit_code', 0)]
+
+    def test_docker_run__timeout(self):
+        self.api_docker.set_docker_run_timeout(0.2)
+        try:
+            result = self.api_docker.docker_run_bash('alpine', 'sleep 10', bash_binary='/bin/sh')     # the fake engine doesn't run sleep (the container stays running)
+        finally:
+            self.api_docker.set_docker_run_timeout(None)
+        assert result.get('status'   ) == 'error'
+        assert type(result.get('error')) is TimeoutError
+        assert result.get('exit_code') == 137
+        assert result.get('duration' ) < 5
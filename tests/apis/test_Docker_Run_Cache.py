@@ -0,0 +1,68 @@
+import os
+import tempfile
+from unittest                                   import TestCase
+
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Docker_Run_Cache(TestCase):
+
+    def setUp(self):
+        self.temp_dir   = tempfile.TemporaryDirectory()
+        self.engine     = Fake_Docker_Engine(images={'alpine:latest': dict(cmd=['/bin/sh'])}).start()
+        self.api_docker = self.engine.api_docker().set_docker_run_engine('api')
+        self.cache      = self.api_docker.docker_run_cache_enable(path=self.temp_dir.name)
+
+    def tearDown(self):
+        self.engine.stop()
+        self.temp_dir.cleanup()
+
+    def test_run(self):
+        result_1 = self.api_docker.docker_run_bash('alpine', 'echo 42', bash_binary='/bin/sh')
+        result_2 = self.api_docker.docker_run_bash('alpine', 'echo 42', bash_binary='/bin/sh')
+        result_3 = self.api_docker.docker_run_bash('alpine', 'echo 43', bash_binary='/bin/sh')
+        assert result_1.get('stdout') == '42\n'
+        assert result_1.get('cached') is None
+        assert result_2 == {**result_1, 'cached': True}                                     # same shape (and original duration) as the miss
+        assert result_3.get('stdout') == '43\n'
+        assert self.cache.stats()     == dict(hits=1, misses=2, stores=2, expired=0, evictions=0, uncacheable=0, hit_ratio=0.333)
+
+        self.engine.image_add('alpine:latest', cmd=['/bin/sh'])                             # the tag moves to a new image
+        assert self.api_docker.docker_run_bash('alpine', 'echo 42', bash_binary='/bin/sh').get('cached') is None
+        assert self.cache.stats().get('misses') == 3
+
+    def test_run__uncacheable(self):
+        result = self.api_docker.docker_run(['--detach', 'alpine'])                          # not supported by Docker_Run (so not cached)
+        assert result.get('status')                  == 'error'
+        assert self.cache.stats().get('uncacheable') == 1
+        assert self.cache.files()                    == []
+
+    def test_run__cli_engine(self):
+        api_docker = self.engine.api_docker()                                               # default docker_run_engine: 'cli'
+        with self.assertRaises(ValueError):
+            api_docker.docker_run_cache_enable(path=self.temp_dir.name)                     # its results would never be cached
+        assert api_docker.docker_run_cache is None
+        with self.assertRaises(ValueError):
+            self.api_docker.set_docker_run_engine('cli')
+        assert self.api_docker.docker_run_cache_disable().set_docker_run_engine('cli').docker_run_engine == 'cli'
+
+    def test_run__no_exit_code(self):
+        docker_params = self.api_docker.docker_run_params(['alpine', 'echo', '42'])
+        execute       = lambda params: dict(status='ok', stdout='', stderr='failed\n', exit_code=None)     # like the docker CLI's results
+        assert self.cache.run(docker_params, execute).get('cached') is None
+        assert self.cache.run(docker_params, execute).get('cached') is None
+        assert self.cache.stats().get('stores')                      == 0
+        assert self.cache.files()                                    == []
+
+    def test_ttl__evict(self):
+        self.api_docker.docker_run_bash('alpine', 'echo 42', bash_binary='/bin/sh')
+        self.cache.ttl = -1
+        assert self.api_docker.docker_run_bash('alpine', 'echo 42', bash_binary='/bin/sh').get('cached') is None
+        assert self.cache.stats().get('expired') == 1
+
+        self.cache.ttl       = 60
+        self.cache.max_bytes = int(os.path.getsize(self.cache.files()[0]) * 1.5)            # room for one entry (their sizes vary a bit, e.g. the duration)
+        self.api_docker.docker_run_bash('alpine', 'echo 43', bash_binary='/bin/sh')
+        assert self.cache.stats().get('evictions') == 1
+        assert len(self.cache.files())             == 1
+        assert self.api_docker.docker_run_bash('alpine', 'echo 43', bash_binary='/bin/sh').get('cached') is True
@@ -0,0 +1,100 @@
+import threading
+from unittest                                   import TestCase
+
+from osbot_docker.apis.Docker_Image             import Docker_Image
+from osbot_docker.apis.Docker_Stats             import Docker_Stats__Ring, STATS__WIDTH, stats_sample
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+from osbot_utils.utils.Misc                     import wait_for
+
+
+class test_Docker_Stats(TestCase):
+
+    def setUp(self):
+        self.engine                = Fake_Docker_Engine(images={'service:latest': dict(cmd=['sleep', '600'])}).start()
+        self.engine.stats_interval = 0.01
+        self.api_docker            = self.engine.api_docker()
+
+    def tearDown(self):
+        self.engine.stop()
+
+    def container(self, labels):
+        container = Docker_Image('service', api_docker=self.api_docker).create_container(labels=labels)
+        container.start()
+        return container
+
+    def wait_for_samples(self, stats, samples):
+        for _ in range(200):
+            if all(stats.samples(container_id) >= samples for container_id in stats.rings):
+                return True
+            wait_for(0.01)
+        return False
+
+    def test_ring(self):
+        ring = Docker_Stats__Ring(capacity=3)
+        assert ring.last() is None
+        for index in range(5):
+            ring.add([index] * STATS__WIDTH)
+        assert len(ring)                        == 3
+        assert list(ring.column('cpu_percent')) == [2, 3, 4]                    # the two oldest were overwritten
+        assert list(ring.column('net_rx', 2))   == [3, 4]
+        assert ring.last()['block_write']       == 4
+        assert len(ring.data)                   == 3 * STATS__WIDTH
+
+    def test_stats(self):
+        container = self.container(labels={'team': 'a'})
+        stats     = container.stats()
+        assert stats['cpu_percent' ] == 50.0
+        assert stats['memory_usage'] == 48 * 2**20
+        assert stats['net_rx'      ] == 1500
+        container.stop()
+        assert container.stats() is None
+        assert stats_sample(self.engine.container_stats(self.engine.container(container.container_id), 1)) is None
+
+    def test_aggregate(self):
+        container_a1 = self.container(labels={'team': 'a'})
+        container_a2 = self.container(labels={'team': 'a'})
+        container_b  = self.container(labels={'team': 'b'})
+        self.container(labels={'other': 'c'})
+        with self.api_docker.containers_stats(labels={'team': None}, capacity=10, interval=0.01) as stats:
+            assert sorted(stats.rings) == sorted([container_a1.container_id, container_a2.container_id, container_b.container_id])
+            assert self.wait_for_samples(stats, 10)
+            summary   = stats.summary(container_b.container_id)
+            aggregate = stats.aggregate('team', window=5)
+        assert summary['samples'     ] == 10
+        assert summary['cpu_percent' ] == 50.0
+        assert summary['memory_limit'] == 2 * 2**30
+        assert summary['net_rx_rate' ] > 0
+        assert aggregate['a']['containers'  ] == 2
+        assert aggregate['a']['cpu_percent' ] == 100.0
+        assert aggregate['a']['memory_usage'] == 2 * 48 * 2**20
+        assert aggregate['b']['cpu_percent' ] == 50.0
+        assert stats.errors == 0
+        assert stats.thread is None
+
+    def test_max_workers(self):
+        for index in range(6):
+            self.container(labels={'index': str(index)})
+        def stats_threads():
+            return [thread for thread in threading.enumerate() if thread.name.startswith('Docker_Stats')]
+        with self.api_docker.containers_stats(interval=0.01, max_workers=2) as stats:
+            assert len(stats.rings) == 6
+            assert self.wait_for_samples(stats, 3)
+            assert len(stats_threads()) == 1 + 2                                        # the sampling thread plus the worker pool (not one per container)
+        assert stats_threads() == []
+        assert stats.errors == 0
+
+    def test_container_stops(self):
+        container = self.container(labels={'team': 'a'})
+        stats     = self.api_docker.containers_stats(container_ids=[container.container_id], interval=0.01).start()
+        assert self.wait_for_samples(stats, 2)
+        container.stop()
+        for _ in range(200):
+            if not stats.active:
+                break
+            wait_for(0.01)
+        assert stats.active == set()                                            # the container is not sampled once it stops
+        samples = stats.samples(container.container_id)
+        assert samples >= 2
+        wait_for(0.05)
+        assert stats.samples(container.container_id) == samples
+        stats.stop()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+from unittest                                       import TestCase
+
+from osbot_docker.benchmarks.Docker_Benchmark       import Docker_Benchmark
+from osbot_docker.benchmarks.__main__               import main
+from osbot_docker.helpers.Fake_Docker_Engine        import Fake_Docker_Engine
+
+
+class test_Docker_Benchmark(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine = Fake_Docker_Engine().start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.stop()
+
+    def test_run(self):
+        api_docker = self.engine.api_docker()
+        with Docker_Benchmark(api_docker=api_docker, scale=5, iterations=3, engine='fake') as benchmark:
+            assert len(self.engine.containers) == 6                                 # scale containers + the running container
+            results = benchmark.run()
+        scenarios = results.get('scenarios')
+        assert results.get('meta').get('scale')               == 5
+        assert scenarios.get('containers'        ).get('api_calls') == 7            # the listing plus one inspect per container (6)
+        assert scenarios.get('containers_records').get('api_calls') == 1
+        assert scenarios.get('container_exec'    ).get('latency_ms').get('count') == 3
+        assert scenarios.get('lambda_cycle'      ).get('skipped') is not None
+        assert self.engine.containers == {}                                         # teardown deletes what setup created
+        assert api_docker.instrumentation is None                                   # (and disables the instrumentation it enabled)
+
+    def test_compare(self):
+        baseline = {'scenarios': {'images': {'latency_ms': {'p50': 1.0, 'p95': 2.0}, 'api_calls': 1, 'memory_peak_kb': 10}}}
+        results  = {'scenarios': {'images': {'latency_ms': {'p50': 1.5, 'p95': 2.1}, 'api_calls': 1, 'memory_peak_kb': 10}}}
+        assert Docker_Benchmark.compare(results, baseline) == {'images': {'ratios'     : {'p50': 1.5, 'p95': 1.05, 'api_calls': 1.0, 'memory_peak_kb': 1.0},
+                                                                          'regressions': ['p50'],
+                                                                          'regression' : True }}
+
+    def test_main(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            output = os.path.join(temp_dir, 'results.json')
+            assert main(['--fake', '--scale', '2', '--iterations', '2', '--scenarios', 'images,container_status', '--output', output]) == 0
+            assert sorted(Docker_Benchmark.load(output).get('scenarios')) == ['container_status', 'images']
+            assert main(['--fake', '--scenarios', 'not_a_scenario']) == 2
@@ -0,0 +1,19 @@
+from unittest                                           import TestCase
+
+from osbot_docker.benchmarks.Docker_Benchmark__Imports  import Docker_Benchmark__Imports
+from osbot_docker.benchmarks.__main__                   import main
+
+
+class test_Docker_Benchmark__Imports(TestCase):
+
+    def test_run(self):
+        results  = Docker_Benchmark__Imports(iterations=2, scenarios=['import__api_docker', 'import__docker_lambda_python', 'import__lambda_python_pool']).run()
+        for name, result in results.get('scenarios').items():
+            assert result.get('heavy_modules')              == []                       # docker-py and requests are only imported on first use
+            assert result.get('latency_ms').get('count')    == 2
+            assert result.get('memory_peak_kb')             > 0
+        assert results.get('meta').get('engine') == 'imports'
+
+    def test_main(self):
+        assert main(['--imports', '--iterations', '1', '--scenarios', 'import__osbot_docker']) == 0
+        assert main(['--imports', '--scenarios', 'containers'                              ]) == 2
@@ -1,5 +1,9 @@
+import socket
+from time     import monotonic
 from unittest import TestCase
 
+from requests.exceptions import ConnectionError
+
 from osbot_docker.apis.Docker_Container import Docker_Container
 from osbot_utils.utils.Dev import pprint
 
@@ -15,9 +19,26 @@ class test_Container__Lambda_Python(TestCase):
             print(_.container.logs())
             assert _.invoke(               ) == 'docker - hello world!'
             assert _.invoke({'name':'aaaa'}) == 'docker - hello aaaa!'
+            metrics = _.invoke_metrics()
+            assert metrics.get('latency'         ).get('count') == 2
+            assert metrics.get('response_size'   ).get('min'  ) == len('"docker - hello aaaa!"')
+            assert metrics.get('runtime_duration').get('count') == 2
+            assert metrics.get('runtime_init'    ).get('count') == 1          # only the first invocation initialises the runtime
+            assert _.invoke_metrics().get('runtime_duration').get('count') == 2
 
         assert _.container.exists() is False
 
+    def test_wait_for_ready__timeout(self):
+        with socket.socket() as server:                                             # a port that refuses connections
+            server.bind(('localhost', 0))
+            host_port = server.getsockname()[1]
+        container_lambda = Container__Lambda_Python(host_port=host_port)
+        start            = monotonic()
+        with self.assertRaises(ConnectionError):
+            container_lambda.wait_for_ready(timeout=1)
+        assert monotonic() - start < 2                                              # the session's connection retries don't extend the timeout
+        assert container_lambda.in_flight == 0
+
     def test_docker_setup(self):
         container_id = 'd8d90564323a'
         container = Docker_Container(container_id=container_id)
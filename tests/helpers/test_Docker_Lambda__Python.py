@@ -32,6 +32,28 @@ class test_Docker_Lambda__Python(TestCase):
         result = self.docker_lambda__python.image_build()
         assert result.get('status') == 'ok'
 
+    def test_image_build_stream(self):
+        events  = list(self.docker_lambda__python.image_build_stream())
+        summary = events[-1]
+        assert summary.get('status') == 'ok'
+        assert summary.get('tags'  ) == [f'{self.docker_lambda__python.image_name}:latest']
+        assert 0 <= summary.get('cache_hit_ratio') <= 1
+
+    def test_warm_image(self):
+        warm_image = self.docker_lambda__python.warm_image_create()
+        assert warm_image.image_name_with_tag() == f'{self.docker_lambda__python.image_name}:warm'
+        assert warm_image.exists() is True
+
+        comparison = self.docker_lambda__python.warm_image_compare()
+        assert comparison.get('cold_start') > 0
+        assert comparison.get('warm_start') > 0
+        assert comparison.get('saved'     ) == round(comparison.get('cold_start') - comparison.get('warm_start'), 3)
+
+        container = self.docker_lambda__python.use_warm_image().create_container()
+        assert container.info().get('image') == f'{self.docker_lambda__python.image_name}:warm'
+        assert container.delete() is True
+        assert warm_image.delete() is True
+
     def test_dockerfile(self):
         assert self.docker_lambda__python.dockerfile().startswith('FROM public.ecr.aws/lambda/python:3.11')
 
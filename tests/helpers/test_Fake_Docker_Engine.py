@@ -0,0 +1,179 @@
+import os
+import re
+import tempfile
+from time                                       import monotonic
+from unittest                                   import TestCase
+
+from requests                                   import Response
+
+from osbot_docker.apis.Docker_Image             import Docker_Image
+from osbot_docker.helpers.Fake_Docker_Engine    import Fake_Docker_Engine
+
+
+class test_Fake_Docker_Engine(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.engine     = Fake_Docker_Engine().start()
+        cls.api_docker = cls.engine.api_docker()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.engine.stop()
+
+    def test_api_docker(self):
+        assert self.api_docker.base_url             == f'unix://{self.engine.socket_path}'
+        assert self.api_docker.client_api_version() == '1.43'
+        assert 'KernelMemory' in self.api_docker.server_info()
+        assert 'hello-world'  in self.api_docker.images_names()
+
+    def test_container_run(self):
+        result = self.api_docker.container_run('hello-world')
+        assert result.get('status') == 'ok'
+        assert 'Hello from Docker!' in result.get('output')
+
+    def test_container_run__not_in_registry(self):
+        error_bad_tag        = self.api_docker.container_run(image_name='hello-world', tag='bbbb').get('error')
+        error_bad_image_name = self.api_docker.container_run(image_name='aaaa'       , tag='bbbb').get('error')
+        assert 'Not Found ("manifest for hello-world:bbbb not found: manifest unknown: manifest unknown")' in error_bad_tag
+        assert 'Not Found ("pull access denied for aaaa, repository does not exist'                       in error_bad_image_name
+        assert self.engine.image('hello-world:bbbb') is None
+
+        self.engine.registry_add('fake_plain')                                               # no cmd, entrypoint or output configured
+        image     = Docker_Image('fake_plain', api_docker=self.api_docker)
+        assert image.pull() is True
+        container = image.create_container()
+        container.start(wait_for_running=False)
+        assert container.wait_for_container_status('exited', timeout=2) is True               # (so its container exits, like hello-world)
+        assert container.delete() is True
+        assert image.delete()     is True
+
+    def test_containers(self):
+        labels    = {'test': 'test_containers'}
+        container = self.api_docker.container_create('hello-world', labels=labels)
+        assert container.exists()  is True
+        assert container.status()  == 'created'
+        assert container.labels()  == labels
+        assert container.short_id() in self.api_docker.containers_all__by_id()
+        assert [record.id for record in self.api_docker.containers_query(labels=labels)] == [container.container_id]
+        container.start(wait_for_running=False)
+        assert container.wait_for_container_status('exited', timeout=2) is True              # hello-world exits after printing its output
+        with self.assertWarns(DeprecationWarning):
+            assert container.wait_for_container_status('running', .05, wait_count=2) is False    # previous signature: (wait_delta, wait_count), i.e. a 0.1s timeout
+        assert 'Hello from Docker!' in container.logs()
+        assert container.delete() is True
+        assert container.exists() is False
+
+    def test_wait_for_container_status(self):
+        container = self.api_docker.container_create('hello-world')
+        start     = monotonic()
+        assert container.start(wait_timeout=5) is False                                      # hello-world exits straight after start
+        assert monotonic() - start < 1                                                        # (so the wait gives up without waiting for the timeout)
+        assert container.delete() is True
+
+        self.engine.registry_add('fake_wait', cmd=['sleep', '600'])
+        image     = Docker_Image('fake_wait', api_docker=self.api_docker)
+        assert image.pull() is True
+        container = image.create_container()
+        assert container.start() is True
+        for use_events in (True, False):
+            start = monotonic()
+            assert container.wait_for_container_status('exited', timeout=0.5, use_events=use_events) is False
+            assert 0.5 <= monotonic() - start < 0.9                                          # the timeout is enforced by the client
+        assert container.stop()   is True
+        assert container.delete() is True
+        assert image.delete()     is True
+
+    def test_exec__copy__commit(self):
+        self.engine.registry_add('fake_service', cmd=['sleep', '600'])
+        image     = Docker_Image('fake_service', api_docker=self.api_docker)
+        assert image.pull() is True
+        container = image.create_container(port_bindings={8080: None})
+        container.start()
+        assert container.status()                                  == 'running'
+        assert container.info().get('ports').get('8080/tcp')[0]    == {'HostIp': '0.0.0.0', 'HostPort': '49153'}
+        assert container.exec(['echo', 'hello'])                   == 'hello\n'
+        assert list(container.exec_stream(['cat', '/not-found']))  == [('stderr', 'cat: /not-found: No such file or directory\n'), ('exit_code', 1)]
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'file_a'), 'w') as file:
+                file.write('aaaa')
+            assert container.copy_to('/tmp', os.path.join(temp_dir, 'file_a')).get('copied' ) == ['file_a']
+            assert container.copy_to('/tmp', os.path.join(temp_dir, 'file_a')).get('skipped') == ['file_a']
+            assert container.exec(['cat', '/tmp/file_a'])                                     == 'aaaa'
+            with open(os.path.join(temp_dir, 'file_b'), 'w') as file:
+                file.write('bbbb')
+            container.copy_to('/tmp', os.path.join(temp_dir, 'file_b'))
+
+            target  = os.path.join(temp_dir, 'target')
+            result  = container.copy_from('/tmp', target)                                          # full archive
+            assert sorted(result.get('copied')) == ['tmp', 'tmp/file_a', 'tmp/file_b']
+            with open(os.path.join(target, 'tmp', 'file_a'), 'w') as file:
+                file.write('changed')
+            fetches = self.engine.request_counts[('GET', 'archive_get')]
+            result  = container.copy_from('/tmp', target)                                          # only the changed file is fetched
+            assert result.get('copied'       ) == ['tmp/file_a']
+            assert result.get('skipped'      ) == ['tmp/file_b']
+            with open(os.path.join(target, 'tmp', 'file_a')) as file:
+                assert file.read()            == 'aaaa'
+            result  = container.copy_from('/tmp', target)                                          # nothing changed, nothing fetched
+            assert result.get('copied'       ) == []
+            assert result.get('skipped'      ) == ['tmp/file_a', 'tmp/file_b']
+            assert result.get('skipped_bytes') == 8
+            assert result.get('bytes'        ) == 0
+            assert self.engine.request_counts[('GET', 'archive_get')] == fetches + 1
+        committed = container.commit(repository='fake_service', tag='committed')
+        assert committed.exists() is True
+        assert container.stop()   is True
+        assert container.delete() is True
+        assert self.api_docker.images_delete(['fake_service:committed', 'fake_service:latest']) == {'fake_service:committed': {'status': 'ok', 'result': True},
+                                                                                                'fake_service:latest'   : {'status': 'ok', 'result': True}}
+
+    def test_image_build(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            with open(os.path.join(temp_dir, 'Dockerfile'), 'w') as file:
+                file.write('FROM scratch\nLABEL an_label=an_value\nCMD ["/run"]\n')
+            image   = Docker_Image('fake_build', api_docker=self.api_docker)
+            events  = list(image.build_stream(temp_dir))
+            summary = events[-1]
+            assert summary.get('status')    == 'ok'
+            assert summary.get('tags')      == ['fake_build:latest']
+            assert len(summary.get('steps')) == 3
+            assert image.info().get('Labels') == {'an_label': 'an_value'}
+            assert image.build_if_changed(temp_dir).get('skipped') is False
+            assert image.build_if_changed(temp_dir).get('skipped') is True
+            assert image.delete() is True
+
+    def test_logs_stream(self):
+        output = '\x01\x00\x00\x00\x00\x00\x00\x02ab\nsecond line\n'                          # tty output that looks like a frame header
+        self.engine.image_add('fake_tty:latest', output=output, exits=True)
+        for tty in (True, False):
+            container = self.api_docker.container_create('fake_tty', tty=tty)
+            container.start(wait_for_running=False)
+            assert container.wait_for_container_status('exited', timeout=2) is True
+            assert ''.join(container.logs_stream())                   == output        # the format comes from the Content-Type, not from the first bytes
+            assert {stream for stream, _ in container.logs_stream(demux=True)} == {'stdout'}
+            assert container.logs_multiplexed(Response())             is not tty     # no Content-Type (API < 1.42): decided by Config.Tty
+            assert container.delete() is True
+        assert self.api_docker.images_delete(['fake_tty:latest']) == {'fake_tty:latest': {'status': 'ok', 'result': True}}
+
+    def test_logs_stream__timestamps(self):
+        container = self.api_docker.container_create('hello-world')
+        container.start(wait_for_running=False)
+        assert container.wait_for_container_status('exited', timeout=2) is True
+        lines     = list(container.logs_stream(timestamps=True))
+        assert len(lines) == len(list(container.logs_stream()))                               # one timestamp per line
+        for line, plain_line in zip(lines, container.logs_stream()):
+            timestamp, text = line.split(' ', 1)
+            assert re.match(r'^\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d\.\d{9}Z$', timestamp)          # RFC3339 with nanoseconds, as the daemon sends it
+            assert text == plain_line
+        assert container.delete() is True
+
+    def test_latency(self):
+        self.engine.latency = 0.05
+        try:
+            requests_before = self.engine.requests_total()
+            assert self.api_docker.containers_records() is not None
+            assert self.engine.requests_total() == requests_before + 1
+            assert self.engine.request_counts[('GET', 'containers_list')] > 0
+        finally:
+            self.engine.latency = 0.0
@@ -0,0 +1,71 @@
+from concurrent.futures                             import ThreadPoolExecutor
+from unittest                                       import TestCase
+
+from osbot_docker.helpers.Container__Lambda_Python  import Container__Lambda_Python
+from osbot_docker.helpers.Lambda_Python_Pool        import Lambda_Python_Pool
+
+
+class test_Lambda_Python_Pool(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.pool = Lambda_Python_Pool(size=2).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        containers = [member.container for member in cls.pool.members]
+        cls.pool.stop()
+        assert [container.exists() for container in containers] == [False, False]
+
+    def test__init__(self):
+        with self.assertRaises(ValueError):
+            Lambda_Python_Pool(strategy='aaaa')
+
+    def test_invoke(self):
+        ports = [member.docker_lambda__python.host_port for member in self.pool.members]
+        assert len(set(ports)) == 2                                     # each container has its own (docker allocated) host port
+        assert self.pool.invoke(               ) == 'docker - hello world!'
+        assert self.pool.invoke({'name':'aaaa'}) == 'docker - hello aaaa!'
+
+    def test_invoke_many(self):
+        payloads = [{'name': f'name_{i}'} for i in range(20)]
+        results  = self.pool.invoke_many(payloads)
+        assert results == [f'docker - hello name_{i}!' for i in range(20)]
+        assert self.pool.stats().get('in_flight') == 0
+
+    def test_recycle(self):
+        member = self.pool.members[0]
+        member.container.stop()
+        assert self.pool.recycle()                        == 1
+        assert member not in self.pool.members
+        assert self.pool.stats().get('size')              == 2
+        assert self.pool.invoke({'name': 'recycled'})     == 'docker - hello recycled!'
+        assert member.container.exists()                  is False
+
+
+class test_Lambda_Python_Pool__members(TestCase):                    # the pool's member selection (no containers are started)
+
+    def test_member__reserve(self):
+        pool         = Lambda_Python_Pool(size=3)
+        pool.members = [Container__Lambda_Python(host_port=None, lock=pool.lock) for _ in range(3)]
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            picks = list(executor.map(lambda _: pool.member(), range(3)))
+        assert len(set(picks))                    == 3                  # each pick sees the previous ones' reservations
+        assert pool.stats().get('in_flight')      == 3
+
+    def test_member_recycle__replaced(self):
+        pool              = Lambda_Python_Pool(size=1)
+        member            = Container__Lambda_Python(host_port=None, lock=pool.lock)
+        replacement       = Container__Lambda_Python(host_port=None, lock=pool.lock)
+        pool.members      = [replacement]                               # member was already replaced by another thread
+        pool.replacements = {member: replacement}
+        assert pool.member_recycle(member) is replacement
+        assert pool.members                == [replacement]
+        with self.assertRaises(ValueError):
+            pool.member_recycle(Container__Lambda_Python(host_port=None))          # not in the pool (and never was)
+
+    def test_strategy__round_robin(self):
+        pool         = Lambda_Python_Pool(size=2, strategy='round_robin')
+        pool.members = [Container__Lambda_Python(host_port=None, lock=pool.lock) for _ in range(2)]
+        assert [pool.member() for _ in range(3)] == [pool.members[0], pool.members[1], pool.members[0]]
+        assert [member.in_flight for member in pool.members] == [2, 1]
@@ -0,0 +1,26 @@
+from unittest                                   import TestCase
+
+from osbot_docker.helpers.Metrics_Histogram     import Metrics_Histogram
+
+
+class test_Metrics_Histogram(TestCase):
+
+    def setUp(self):
+        self.histogram = Metrics_Histogram()
+
+    def test_summary(self):
+        assert self.histogram.summary() == dict(count=0, min=None, max=None, mean=None, p50=None, p95=None, p99=None)
+        for value in range(1, 101):
+            self.histogram.add(value)
+        summary = self.histogram.summary()
+        assert summary == dict(count=100, min=1, max=100, mean=50.5, p50=51, p95=95, p99=99)
+        assert self.histogram.reset().summary().get('count') == 0
+
+    def test_max_samples(self):
+        histogram = Metrics_Histogram(max_samples=10)
+        for value in range(100):
+            histogram.add(value)
+        summary = histogram.summary()
+        assert summary.get('count') == 100                                     # count/min/max/mean are over all samples
+        assert summary.get('min'  ) == 0
+        assert summary.get('p50'  ) == 94                                      # percentiles are over the most recent samples